@@ -0,0 +1,155 @@
+# duplicate_detector.py
+import hashlib
+import operator
+import re
+import struct
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Numbering that differs between otherwise identical items ("Day 12:", "Week 3") and
+# parenthetical asides such as the "(Advanced Version: ...)" markers on repeated tasks
+_MARKERS = re.compile(r'\b(?:day|week|month)\s+\d+\b:?|\([^)]*\)')
+_DIGITS = re.compile(r'\d+')
+_WORD = re.compile(r'\w+')
+
+# Shingle hash vectors and signatures are memoized; a memo is dropped once it holds this many
+_MEMO_LIMIT = 50_000
+
+PLAN_SECTIONS = ("monthlyTasks", "weeklyTasks", "dailyTasks")
+
+Signature = Tuple[int, ...]
+
+
+def item_text(item: Any) -> str:
+    """The text a plan item is compared by: its tasks joined"""
+    if not isinstance(item, dict) or not isinstance(item.get("tasks"), list):
+        return ""
+    return " ".join(str(task) for task in item["tasks"])
+
+
+class NearDuplicateDetector:
+    """Finds near-duplicate plan items in linear time with MinHash signatures and LSH.
+
+    Item text is normalized (lowercased, numbering markers and parenthetical asides
+    dropped, digits collapsed) and cut into word shingles. Each shingle gets `num_perm`
+    independent 32-bit hashes from one SHAKE-128 digest, and a signature of the per-position
+    minimums estimates the Jaccard similarity of two items' shingle sets; items are
+    bucketed by `bands` slices of their signature, so an item is only compared with the
+    few earlier items sharing a bucket instead of with every earlier item.
+    """
+
+    def __init__(self, threshold: float = 0.6, num_perm: int = 64, bands: int = 16, shingle_size: int = 2,
+                 seed: int = 1):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self._salt = seed.to_bytes(8, "little")
+        self._unpack = struct.Struct(f"<{num_perm}I").unpack
+        self._shingle_hashes: Dict[str, Tuple[int, ...]] = {}
+        # Long fallback plans repeat the same text many times
+        self._signatures: Dict[str, Optional[Signature]] = {}
+
+    @staticmethod
+    def normalize(text: str) -> List[str]:
+        return _WORD.findall(_DIGITS.sub("0", _MARKERS.sub(" ", text.lower())))
+
+    def shingles(self, text: str) -> List[str]:
+        words = self.normalize(text)
+        size = self.shingle_size
+        if len(words) <= size:
+            return [" ".join(words)] if words else []
+        return [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+
+    def _hash_vector(self, shingle: str) -> Tuple[int, ...]:
+        vector = self._shingle_hashes.get(shingle)
+        if vector is None:
+            if len(self._shingle_hashes) >= _MEMO_LIMIT:
+                self._shingle_hashes.clear()
+            digest = hashlib.shake_128(self._salt + shingle.encode()).digest(4 * self.num_perm)
+            vector = self._shingle_hashes[shingle] = self._unpack(digest)
+        return vector
+
+    def signature(self, text: str) -> Optional[Signature]:
+        """MinHash signature of the text, or None if nothing is left after normalization"""
+        if text in self._signatures:
+            return self._signatures[text]
+        vectors = [self._hash_vector(shingle) for shingle in set(self.shingles(text))]
+        if len(vectors) > 1:
+            signature = tuple(map(min, *vectors))
+        else:
+            signature = vectors[0] if vectors else None
+        if len(self._signatures) >= _MEMO_LIMIT:
+            self._signatures.clear()
+        self._signatures[text] = signature
+        return signature
+
+    @staticmethod
+    def similarity(a: Signature, b: Signature) -> float:
+        """Estimated Jaccard similarity: the share of positions where the signatures agree"""
+        return sum(map(operator.eq, a, b)) / len(a)
+
+    def find_duplicates(self, texts: Sequence[str]) -> Dict[int, int]:
+        """Map each near-duplicate's index to the earlier text it repeats; first occurrences are kept"""
+        index = DuplicateIndex(self)
+        duplicates = {}
+        for position, text in enumerate(texts):
+            signature = self.signature(text)
+            match = index.match(signature)
+            if match is not None:
+                duplicates[position] = match
+            index.add(signature, position)
+        return duplicates
+
+    def find_plan_duplicates(self, plan: Dict[str, Any]) -> Dict[str, List[int]]:
+        """Near-duplicate item indices per section, in the format of PlanRepairer.arepair's `replace`
+
+        Sections are checked separately: a week summarizing its days is not a repeat.
+        """
+        found = {}
+        for section in PLAN_SECTIONS:
+            duplicates = self.find_duplicates([item_text(item) for item in plan.get(section) or []])
+            if duplicates:
+                found[section] = sorted(duplicates)
+        return found
+
+
+class DuplicateIndex:
+    """Incremental LSH index over signatures, for checking items against those added so far"""
+
+    def __init__(self, detector: NearDuplicateDetector):
+        self.detector = detector
+        self._signatures: Dict[int, Signature] = {}
+        self._buckets: Dict[Tuple[int, Signature], List[int]] = {}
+        # Exact repeats are common in long plans; they are found by one lookup and not bucketed again
+        self._first_by_signature: Dict[Signature, int] = {}
+
+    def _band_keys(self, signature: Signature):
+        # (band number, that band's rows of the signature)
+        return enumerate(zip(*[iter(signature)] * self.detector.rows))
+
+    def match(self, signature: Optional[Signature]) -> Optional[int]:
+        """Key of the first indexed item at least `threshold` similar, or None"""
+        if signature is None:
+            return None
+        if signature in self._first_by_signature:
+            return self._first_by_signature[signature]
+        seen = set()
+        for key in self._band_keys(signature):
+            for candidate in self._buckets.get(key, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                if self.detector.similarity(signature, self._signatures[candidate]) >= self.detector.threshold:
+                    return candidate
+        return None
+
+    def add(self, signature: Optional[Signature], key: int) -> None:
+        if signature is None or signature in self._first_by_signature:
+            return
+        self._first_by_signature[signature] = key
+        self._signatures[key] = signature
+        for band_key in self._band_keys(signature):
+            self._buckets.setdefault(band_key, []).append(key)
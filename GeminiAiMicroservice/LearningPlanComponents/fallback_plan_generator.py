@@ -1,18 +1,43 @@
 # fallback_plan_generator.py
 import random
-from typing import Dict, Any, List
-from LearningPlanComponents.curricula import DetailedCurricula
+import re
+from typing import Dict, Any, List, Optional
+from LearningPlanComponents.curricula import CurriculumRegistry, get_curriculum_registry
+from LearningPlanComponents.duplicate_detector import NearDuplicateDetector, PLAN_SECTIONS, item_text
 from LearningPlanComponents.utils import DurationParser
 from LearningPlanComponents.subject_detector import SubjectDetector
 from LearningPlanComponents.task_generator import TaskGenerator
 
+# Integration tasks replacing items a long plan repeats once it has cycled through its
+# task pool. Each repeat is combined with the nearest item it has not been paired with
+# yet (in either order), so the pair, which makes up most of the text, differs from every
+# other rewritten item; the next template is used once all pairs are taken.
+INTEGRATION_TEMPLATES = [
+    'Combine "{focus}" with "{partner}" in one small project',
+    'Rework "{focus}" using what you practised in "{partner}"',
+    'Compare how you approached "{focus}" and "{partner}" and note what carries over',
+]
+
+_FOCUS_END = re.compile(r'[:,;(]')
+_FOCUS_WORDS = 6
+
+
+def _focus(task: str) -> str:
+    """Opening clause of a task, at most _FOCUS_WORDS words"""
+    return " ".join(_FOCUS_END.split(task, 1)[0].split()[:_FOCUS_WORDS])
+
 
 class FallbackPlanGenerator:
-    def __init__(self):
-        self.curricula = DetailedCurricula.get_curricula()
+    def __init__(self, curricula: Optional[CurriculumRegistry] = None,
+                 subject_detector: Optional[SubjectDetector] = None,
+                 task_generator: Optional[TaskGenerator] = None,
+                 duplicate_detector: Optional[NearDuplicateDetector] = None, rewrite_duplicates: bool = True):
+        self.curricula = curricula or get_curriculum_registry()
         self.duration_parser = DurationParser()
-        self.subject_detector = SubjectDetector()
-        self.task_generator = TaskGenerator()
+        self.subject_detector = subject_detector or SubjectDetector(self.curricula)
+        self.task_generator = task_generator or TaskGenerator(self.curricula)
+        self.duplicate_detector = duplicate_detector or NearDuplicateDetector()
+        self.rewrite_duplicates = rewrite_duplicates
     
     def create_intelligent_fallback_plan(self, goal: str, duration: str, user_context: Dict[str, Any] = None) -> Dict[str, Any]:
         duration_dict = self.duration_parser.parse_duration(duration)
@@ -52,8 +77,53 @@ class FallbackPlanGenerator:
             goal, subject_category, totals["total_days"], user_context
         )
         
+        # Plans longer than the task pools would otherwise repeat the same items with a suffix
+        if self.rewrite_duplicates:
+            self.rewrite_repeated_items(plan)
+        
         return plan
     
+    def rewrite_repeated_items(self, plan: Dict[str, Any]) -> int:
+        """Replace near-duplicate items in place with integration tasks; returns how many were rewritten"""
+        rewritten = 0
+        for section in PLAN_SECTIONS:
+            items = plan[section]
+            duplicates = self.duplicate_detector.find_duplicates([item_text(item) for item in items])
+            originals = [position for position in range(len(items)) if position not in duplicates]
+            if len(originals) < 2:
+                continue
+            rank = {position: i for i, position in enumerate(originals)}
+            focuses = {position: [_focus(task) for task in items[position]["tasks"]] for position in originals}
+            used = set()
+            # Combinations before an item's cursor are all taken, so each search resumes there
+            cursors: Dict[int, int] = {}
+            combinations = len(INTEGRATION_TEMPLATES) * (len(originals) - 1)
+            for position in sorted(duplicates):
+                original = duplicates[position]
+                while original in duplicates:
+                    original = duplicates[original]
+                cursor = cursors.get(original, 0)
+                while cursor < combinations:
+                    template, step = divmod(cursor, len(originals) - 1)
+                    partner = originals[(rank[original] + step + 1) % len(originals)]
+                    key = (template, min(original, partner), max(original, partner))
+                    cursor += 1
+                    if key not in used:
+                        break
+                else:
+                    cursors[original] = cursor
+                    continue
+                cursors[original] = cursor
+                used.add(key)
+                partner_focuses = focuses[partner]
+                items[position]["tasks"] = [
+                    INTEGRATION_TEMPLATES[template].format(
+                        focus=focus, partner=partner_focuses[min(offset, len(partner_focuses) - 1)])
+                    for offset, focus in enumerate(focuses[original])
+                ]
+                rewritten += 1
+        return rewritten
+    
     def _create_dynamic_monthly_tasks(self, goal: str, category: str, num_months: int, user_context: Dict) -> List[Dict]:
         monthly_tasks = []
         skill_level = user_context.get("skill_level", "beginner")
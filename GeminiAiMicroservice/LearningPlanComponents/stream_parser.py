@@ -0,0 +1,116 @@
+# stream_parser.py
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+PLAN_SECTIONS = ("monthlyTasks", "weeklyTasks", "dailyTasks")
+
+_STRUCTURAL = re.compile(r'[{}\[\]":]')
+_STRING_END = re.compile(r'[\\"]')
+
+
+class IncrementalPlanParser:
+    """Extracts complete task items from a plan JSON document as it arrives.
+
+    Text is fed in arbitrary chunks (markdown fences and all). Every object inside
+    one of the top-level monthlyTasks/weeklyTasks/dailyTasks arrays is decoded and
+    returned as soon as its closing brace is seen, so callers can forward items
+    long before the full document is complete. A truncated document still yields
+    every item that was finished before the cut.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.items: Dict[str, List[Any]] = {section: [] for section in PLAN_SECTIONS}
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._string_start = 0
+        self._last_key: Optional[str] = None
+        self._current_key: Optional[str] = None
+        self._section: Optional[str] = None
+        self._item_start: Optional[int] = None
+        self._started = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, int, Any]]:
+        """Consume more text and return (section, index, item) for each newly completed item"""
+        self.text += chunk
+        completed = []
+        text = self.text
+        pos = self._pos
+
+        if not self._started:
+            start = text.find("{", pos)
+            if start == -1:
+                self._pos = len(text)
+                return completed
+            self._started = True
+            pos = start
+
+        while pos < len(text):
+            if self._in_string:
+                match = _STRING_END.search(text, pos)
+                if match is None:
+                    pos = len(text)
+                    break
+                if match.group() == "\\":
+                    if match.end() >= len(text):
+                        # Escape split across chunks; resume from the backslash next time
+                        pos = match.start()
+                        break
+                    pos = match.end() + 1
+                    continue
+                self._in_string = False
+                pos = match.end()
+                if self._depth == 1:
+                    try:
+                        self._last_key = json.loads(text[self._string_start:pos])
+                    except ValueError:
+                        self._last_key = None
+                continue
+
+            match = _STRUCTURAL.search(text, pos)
+            if match is None:
+                pos = len(text)
+                break
+            char = match.group()
+            pos = match.end()
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = match.start()
+            elif char == ":":
+                if self._depth == 1:
+                    self._current_key = self._last_key
+            elif char in "{[":
+                self._depth += 1
+                if char == "[" and self._depth == 2 and self._current_key in PLAN_SECTIONS:
+                    self._section = self._current_key
+                elif char == "{" and self._depth == 3 and self._section is not None:
+                    self._item_start = match.start()
+            else:
+                if char == "}" and self._depth == 3 and self._item_start is not None:
+                    completed.extend(self._complete_item(text[self._item_start:pos]))
+                    self._item_start = None
+                elif char == "]" and self._depth == 2:
+                    self._section = None
+                self._depth -= 1
+
+        self._pos = pos
+        return completed
+
+    def _complete_item(self, raw: str) -> List[Tuple[str, int, Any]]:
+        try:
+            item = json.loads(raw)
+        except ValueError:
+            return []
+        section_items = self.items[self._section]
+        section_items.append(item)
+        return [(self._section, len(section_items) - 1, item)]
+
+
+def salvage_plan_items(text: str) -> Dict[str, List[Any]]:
+    """Every complete task item in a possibly truncated or malformed plan response"""
+    parser = IncrementalPlanParser()
+    parser.feed(text)
+    return parser.items
@@ -1,54 +1,128 @@
 # subject_detector.py
-from LearningPlanComponents.curricula import DetailedCurricula
+import re
+from bisect import bisect_right
+from typing import Dict, List, Optional, Tuple
+from LearningPlanComponents.curricula import CurriculumRegistry, get_curriculum_registry
+
+# Context keywords per category, in tie-break priority order. Curriculum keys themselves
+# (e.g. "python", "weight loss" for weight_loss) are matched too, with a higher weight;
+# multi-word keywords weigh one unit per word since they are more specific.
+CATEGORY_KEYWORDS = {
+    "dsa": ['algorithm', 'data structure', 'coding', 'leetcode', 'competitive programming'],
+    "python": ['python', 'django', 'flask', 'fastapi', 'pandas'],
+    "react": ['react', 'jsx', 'frontend', 'component', 'nextjs'],
+    "hindi": ['हिंदी', 'hindi', 'devanagari'],
+    "english": ['english', 'grammar', 'vocabulary', 'speaking', 'writing'],
+    "photography": ['photo', 'camera', 'photography', 'portrait', 'landscape'],
+    "music": ['music', 'instrument', 'guitar', 'piano', 'singing', 'composition'],
+    "gate": ['gate', 'graduate aptitude test', 'engineering entrance'],
+    "jee": ['jee', 'joint entrance', 'iit', 'nit'],
+    "upsc": ['upsc', 'civil services', 'ias', 'ips', 'public service'],
+    "fitness": ['fitness', 'workout', 'exercise', 'gym', 'health', 'get fit'],
+    "weight_loss": ['weight loss', 'lose weight', 'losing weight', 'weight reduction', 'fat loss', 'slim down', 'get lean'],
+    "cooking": ['cooking', 'recipe', 'chef', 'culinary', 'baking'],
+}
+
+KEY_WEIGHT = 3.0
+KEYWORD_WEIGHT = 1.0
+
+
+def _trie_alternation(keywords) -> str:
+    """Regex alternation with shared prefixes factored out, e.g. photo(?:graphy)?
+
+    Equivalent to joining the keywords with "|" (longest first) but lets the regex engine
+    reject a position after one character instead of trying every keyword in turn.
+    """
+    trie: Dict[str, dict] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        if '' in node:
+            return '(?:' + '|'.join(branches) + ')?'
+        return branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+
+    return build(trie)
 
 
 class SubjectDetector:
-    def __init__(self):
-        self.curricula = DetailedCurricula.get_curricula()
-    
+    """Classifies goals into curriculum categories with one compiled regex pass.
+
+    Keywords only match as whole words (optionally pluralised), so "nit" no longer fires
+    on "unit" nor "ias" on "bias". Every category is scored in the same pass; ties go to
+    the category listed first, as the old if/elif chain did.
+    """
+
+    _compiled: Dict[Tuple[str, ...], tuple] = {}
+
+    def __init__(self, curricula: Optional[CurriculumRegistry] = None):
+        self.curricula = curricula or get_curriculum_registry()
+
+    @property
+    def _matcher(self):
+        # Looked up per call so a curricula reload that adds or removes categories takes effect
+        return self._compile(self.curricula.categories())
+
+    @classmethod
+    def _compile(cls, curriculum_keys: Tuple[str, ...]):
+        """Build (pattern, keyword -> [(category, weight)], category -> priority) once per key set"""
+        if curriculum_keys not in cls._compiled:
+            weights: Dict[str, Dict[str, float]] = {}
+            for key in curriculum_keys:
+                weights.setdefault(key.replace('_', ' '), {})[key] = KEY_WEIGHT
+            for category, keywords in CATEGORY_KEYWORDS.items():
+                for keyword in keywords:
+                    entry = weights.setdefault(keyword, {})
+                    entry[category] = max(entry.get(category, 0.0), KEYWORD_WEIGHT * len(keyword.split()))
+
+            pattern = re.compile(rf'(?<!\w)({_trie_alternation(weights)})(?:e?s)?(?!\w)')
+            priority: Dict[str, int] = {}
+            for category in list(curriculum_keys) + list(CATEGORY_KEYWORDS):
+                priority.setdefault(category, len(priority))
+            cls._compiled[curriculum_keys] = (
+                pattern, {keyword: list(categories.items()) for keyword, categories in weights.items()}, priority
+            )
+        return cls._compiled[curriculum_keys]
+
+    def _rank_scores(self, scores: Dict[str, float]) -> List[Tuple[str, float]]:
+        total = sum(scores.values())
+        priority = self._matcher[2]
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], priority.get(item[0], len(priority))))
+        return [(category, round(score / total, 3)) for category, score in ranked]
+
+    def rank_subject_categories(self, goal: str) -> List[Tuple[str, float]]:
+        """All matching categories, best first, with confidence (share of the total match score)"""
+        pattern, weights, _ = self._matcher
+        scores: Dict[str, float] = {}
+        for match in pattern.finditer(goal.lower()):
+            for category, weight in weights[match.group(1)]:
+                scores[category] = scores.get(category, 0.0) + weight
+        return self._rank_scores(scores)
+
     def detect_subject_category(self, goal: str) -> str:
-        goal_lower = goal.lower()
-        
-        # Direct keyword matching for all subjects
-        for key in self.curricula.keys():
-            if key in goal_lower:
-                return key
-        
-        # Context-based detection for programming
-        if any(keyword in goal_lower for keyword in ['algorithm', 'data structure', 'coding', 'leetcode', 'competitive programming']):
-            return "dsa"
-        elif any(keyword in goal_lower for keyword in ['python', 'django', 'flask', 'fastapi', 'pandas']):
-            return "python"
-        elif any(keyword in goal_lower for keyword in ['react', 'jsx', 'frontend', 'component', 'nextjs']):
-            return "react"
-        
-        # Context-based detection for languages
-        elif any(keyword in goal_lower for keyword in ['हिंदी', 'hindi', 'devanagari']):
-            return "hindi"
-        elif any(keyword in goal_lower for keyword in ['english', 'grammar', 'vocabulary', 'speaking', 'writing']):
-            return "english"
-        
-        # Context-based detection for creative arts
-        elif any(keyword in goal_lower for keyword in ['photo', 'camera', 'photography', 'portrait', 'landscape']):
-            return "photography"
-        elif any(keyword in goal_lower for keyword in ['music', 'instrument', 'guitar', 'piano', 'singing', 'composition']):
-            return "music"
-        
-        # Context-based detection for exams
-        elif any(keyword in goal_lower for keyword in ['gate', 'graduate aptitude test', 'engineering entrance']):
-            return "gate"
-        elif any(keyword in goal_lower for keyword in ['jee', 'joint entrance', 'iit', 'nit']):
-            return "jee"
-        elif any(keyword in goal_lower for keyword in ['upsc', 'civil services', 'ias', 'ips', 'public service']):
-            return "upsc"
-        
-        # Context-based detection for lifestyle
-        elif any(keyword in goal_lower for keyword in ['fitness', 'workout', 'exercise', 'gym', 'health']):
-            return "fitness"
-        elif any(keyword in goal_lower for keyword in ['weight loss', 'lose weight', 'losing weight', 'weight reduction', 'fat loss', 'slim down', 'get lean']):
-            return "weight_loss"
-        elif any(keyword in goal_lower for keyword in ['cooking', 'recipe', 'chef', 'culinary', 'baking']):
-            return "cooking"
-        
-        else:
-            return "general"
\ No newline at end of file
+        ranked = self.rank_subject_categories(goal)
+        return ranked[0][0] if ranked else "general"
+
+    def rank_subject_categories_batch(self, goals: List[str]) -> List[List[Tuple[str, float]]]:
+        """rank_subject_categories for many goals in a single regex pass over the joined text"""
+        lowered = [goal.lower() for goal in goals]
+        starts, offset = [], 0
+        for goal in lowered:
+            starts.append(offset)
+            offset += len(goal) + 1
+        pattern, weights, _ = self._matcher
+        scores: List[Dict[str, float]] = [{} for _ in goals]
+        for match in pattern.finditer('\n'.join(lowered)):
+            goal_scores = scores[bisect_right(starts, match.start()) - 1]
+            for category, weight in weights[match.group(1)]:
+                goal_scores[category] = goal_scores.get(category, 0.0) + weight
+        return [self._rank_scores(goal_scores) for goal_scores in scores]
+
+    def detect_subject_categories(self, goals: List[str]) -> List[str]:
+        return [ranked[0][0] if ranked else "general" for ranked in self.rank_subject_categories_batch(goals)]
@@ -1,12 +1,12 @@
 # task_generator.py
 import random
-from typing import List, Dict, Any
-from LearningPlanComponents.curricula import DetailedCurricula
+from typing import List, Dict, Any, Optional
+from LearningPlanComponents.curricula import CurriculumRegistry, get_curriculum_registry
 
 
 class TaskGenerator:
-    def __init__(self):
-        self.curricula = DetailedCurricula.get_curricula()
+    def __init__(self, curricula: Optional[CurriculumRegistry] = None):
+        self.curricula = curricula or get_curriculum_registry()
     
     def create_ultra_specific_daily_tasks(self, goal: str, category: str, num_days: int, user_context: Dict[str, Any]) -> List[str]:
         """Create ultra-specific, actionable daily tasks that avoid generic language"""
@@ -30,19 +30,16 @@ class TaskGenerator:
             'react': self._generate_react_tasks,
             'python': self._generate_python_tasks,
             'hindi': self._generate_hindi_tasks,
-            'english': self._generate_english_tasks,
             'photography': self._generate_photography_tasks,
-            'music': self._generate_music_tasks,
             'fitness': self._generate_fitness_tasks,
-            'weight_loss': self._generate_weight_loss_tasks,
-            'cooking': self._generate_cooking_tasks,
-            'gate': self._generate_gate_tasks,
-            'jee': self._generate_jee_tasks,
-            'upsc': self._generate_upsc_tasks
+            'cooking': self._generate_cooking_tasks
         }
         
         if category in task_generators:
             return task_generators[category](num_days, skill_level)
+        elif category in self.curricula:
+            # Categories without a hand-written pool draw on their curriculum tasks
+            return self._generate_curriculum_pool_tasks(category, num_days)
         else:
             return self._create_intelligent_generic_tasks(goal, num_days, user_context)
     
@@ -248,6 +245,11 @@ class TaskGenerator:
         ]
         return self._distribute_tasks(tasks, num_days)
     
+    def _generate_curriculum_pool_tasks(self, category: str, num_days: int) -> List[str]:
+        curriculum = self.curricula[category]
+        tasks = list(curriculum["practical_tasks"]) + list(curriculum["projects"])
+        return self._distribute_tasks(tasks, num_days)
+    
     def _distribute_tasks(self, task_pool: List[str], num_days: int) -> List[str]:
         """Distribute tasks across days with intelligent repetition and progression"""
         if num_days <= len(task_pool):
@@ -1,17 +1,24 @@
 # utils.py
 import re
 from typing import Dict, List, Any
+from LearningPlanComponents.duplicate_detector import NearDuplicateDetector, item_text
+
+# Plan sections, the calculate_totals key holding each one's expected size, and its label prefix
+SECTION_TOTALS = {"monthlyTasks": "total_months", "weeklyTasks": "total_weeks", "dailyTasks": "total_days"}
+SECTION_LABELS = {"monthlyTasks": "Month", "weeklyTasks": "Week", "dailyTasks": "Day"}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough Gemini token count (about four characters per token), good enough for budgeting"""
+    return len(text) // 4 + 1
+
+
+_duplicate_detector = NearDuplicateDetector()
 
 
 def is_repetitive(task_list: List[Dict[str, Any]]) -> bool:
-    seen = set()
-    for task in task_list:
-        task_str = ' '.join(task["tasks"]).lower()
-        cleaned = re.sub(r'\b(day|week|month|study|learn|practice|continue)\s+\d+:?\s*', '', task_str)
-        if cleaned in seen and len(cleaned) > 10:
-            return True
-        seen.add(cleaned)
-    return False
+    """True if any item is a near duplicate of an earlier one (see NearDuplicateDetector)"""
+    return bool(_duplicate_detector.find_duplicates([item_text(task) for task in task_list]))
 
 
 class DurationParser:
@@ -76,6 +83,8 @@ class ResponseCleaner:
         return response.strip()
 
 class PlanValidator:
+    VALID_RESOURCE_TYPES = ["video", "article", "book", "tool", "course", "website", "tutorial", "documentation", "general"]
+    
     @staticmethod
     def validate_plan_structure(plan: Dict[str, Any]) -> Dict[str, Any]:
         if "goalTitle" not in plan:
@@ -93,55 +102,61 @@ class PlanValidator:
                 plan[task_type] = []
             
             for i, task in enumerate(plan[task_type]):
-                if not isinstance(task, dict):
-                    plan[task_type][i] = {
-                        "label": f"Task {i+1}", 
-                        "tasks": [], 
-                        "resources": [],
-                        "status": False
-                    }
-                else:
-                    if "label" not in task:
-                        task["label"] = f"Task {i+1}"
-                    if "tasks" not in task:
-                        task["tasks"] = []
-                    if "resources" not in task:
-                        task["resources"] = []
-                    if "status" not in task:
-                        task["status"] = False
-                    
-                    # Validate tasks
-                    if not isinstance(task["tasks"], list):
-                        task["tasks"] = [str(task["tasks"])] if task["tasks"] else []
-                    
-                    # Validate resources
-                    if not isinstance(task["resources"], list):
-                        task["resources"] = []
-                    
-                    # Validate each resource structure
-                    for j, resource in enumerate(task["resources"]):
-                        if not isinstance(resource, dict):
-                            # Convert string resources to proper structure
-                            task["resources"][j] = {
-                                "title": str(resource) if resource else f"Resource {j+1}",
-                                "type": "general",
-                                "url": "",
-                                "description": str(resource) if resource else ""
-                            }
-                        else:
-                            # Ensure all required fields exist
-                            if "title" not in resource:
-                                resource["title"] = f"Resource {j+1}"
-                            if "type" not in resource:
-                                resource["type"] = "general"
-                            if "url" not in resource:
-                                resource["url"] = ""
-                            if "description" not in resource:
-                                resource["description"] = resource.get("title", "")
-                            
-                            # Validate resource type
-                            valid_types = ["video", "article", "book", "tool", "course", "website", "tutorial", "documentation", "general"]
-                            if resource["type"] not in valid_types:
-                                resource["type"] = "general"
-        
-        return plan
\ No newline at end of file
+                plan[task_type][i] = PlanValidator.validate_task_item(task, i)
+        
+        return plan
+    
+    @staticmethod
+    def validate_task_item(task: Any, index: int) -> Dict[str, Any]:
+        """Normalize a single month/week/day entry in place and return it"""
+        if not isinstance(task, dict):
+            return {
+                "label": f"Task {index+1}", 
+                "tasks": [], 
+                "resources": [],
+                "status": False
+            }
+        
+        if "label" not in task:
+            task["label"] = f"Task {index+1}"
+        if "tasks" not in task:
+            task["tasks"] = []
+        if "resources" not in task:
+            task["resources"] = []
+        if "status" not in task:
+            task["status"] = False
+        
+        # Validate tasks
+        if not isinstance(task["tasks"], list):
+            task["tasks"] = [str(task["tasks"])] if task["tasks"] else []
+        
+        # Validate resources
+        if not isinstance(task["resources"], list):
+            task["resources"] = []
+        
+        # Validate each resource structure
+        for j, resource in enumerate(task["resources"]):
+            if not isinstance(resource, dict):
+                # Convert string resources to proper structure
+                task["resources"][j] = {
+                    "title": str(resource) if resource else f"Resource {j+1}",
+                    "type": "general",
+                    "url": "",
+                    "description": str(resource) if resource else ""
+                }
+            else:
+                # Ensure all required fields exist
+                if "title" not in resource:
+                    resource["title"] = f"Resource {j+1}"
+                if "type" not in resource:
+                    resource["type"] = "general"
+                if "url" not in resource:
+                    resource["url"] = ""
+                if "description" not in resource:
+                    resource["description"] = resource.get("title", "")
+                
+                # Validate resource type
+                if resource["type"] not in PlanValidator.VALID_RESOURCE_TYPES:
+                    resource["type"] = "general"
+        
+        return task
@@ -0,0 +1,176 @@
+# admission.py
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+from gemini_errors import AdmissionRejectedError
+
+
+class TokenBucket:
+    """Refills `rate_per_minute` units per minute up to `capacity`; a rate of 0 means unlimited.
+
+    The level may go negative when a reservation is settled with a larger actual cost,
+    which simply delays the next caller.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.rate <= 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def time_until(self, amount: float) -> float:
+        """Seconds until `amount` units are available (amounts above capacity wait for a full bucket)"""
+        if self.unlimited:
+            return 0.0
+        self._refill()
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+    def consume(self, amount: float) -> None:
+        if not self.unlimited:
+            self._refill()
+            self.level -= amount
+
+    def refund(self, amount: float) -> None:
+        if not self.unlimited:
+            self._refill()
+            self.level = min(self.capacity, self.level + amount)
+
+
+class AdmissionController:
+    """Process-wide FIFO scheduler keeping Gemini calls within requests- and tokens-per-minute.
+
+    Callers queue in arrival order; the head of the queue waits until both buckets can
+    cover it. Work is rejected up front when the queue is full, and a queued call gives
+    up once it has waited `max_wait_seconds`.
+    """
+
+    def __init__(self, requests_per_minute: float = 1000, tokens_per_minute: float = 1_000_000,
+                 max_queue_depth: int = 100, max_wait_seconds: float = 20.0):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_queue_depth = max_queue_depth
+        self.max_wait_seconds = max_wait_seconds
+        self._waiters = deque()
+        
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_over_budget = 0
+        self.rejected_timeout = 0
+        self.max_depth_seen = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        # GEMINI_RPM/TPM are the host's quota; run_server.py's prefork workers split it evenly
+        workers = int(os.getenv("PREFORK_WORKERS", 1))
+        return cls(
+            requests_per_minute=float(os.getenv("GEMINI_RPM", 1000)) / workers,
+            tokens_per_minute=float(os.getenv("GEMINI_TPM", 1_000_000)) / workers,
+            max_queue_depth=int(os.getenv("ADMISSION_MAX_QUEUE_DEPTH", 100)),
+            max_wait_seconds=float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", 20)),
+        )
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> float:
+        """Rough time for the current queue to drain at the request rate"""
+        if self.requests.unlimited:
+            return 1.0
+        return max(1.0, (self.queue_depth + 1) / self.requests.rate)
+
+    def check(self) -> None:
+        """Reject immediately when new work would find the queue full or could not start in time"""
+        if self.queue_depth >= self.max_queue_depth:
+            self.rejected_queue_full += 1
+            raise AdmissionRejectedError("Gemini request queue is full", retry_after=self.retry_after())
+        if self.requests.unlimited:
+            return
+        self.requests.time_until(0)  # refill
+        expected_wait = (self.queue_depth + 1 - self.requests.level) / self.requests.rate
+        if expected_wait > self.max_wait_seconds:
+            self.rejected_over_budget += 1
+            raise AdmissionRejectedError("Gemini request budget is exhausted", retry_after=expected_wait)
+
+    async def acquire(self, tokens: int) -> None:
+        """Wait for a turn and reserve one request plus `tokens` estimated tokens"""
+        self.check()
+        start = time.monotonic()
+        if not self._waiters and self.requests.time_until(1) <= 0 and self.tokens.time_until(tokens) <= 0:
+            self.requests.consume(1)
+            self.tokens.consume(tokens)
+            self.admitted += 1
+            return
+        
+        deadline = start + self.max_wait_seconds
+        turn = asyncio.get_running_loop().create_future()
+        self._waiters.append(turn)
+        self.max_depth_seen = max(self.max_depth_seen, self.queue_depth)
+        if self._waiters[0] is turn:
+            turn.set_result(None)
+        try:
+            try:
+                await asyncio.wait_for(turn, timeout=deadline - start)
+            except asyncio.TimeoutError:
+                self._reject_timeout()
+            while True:
+                delay = max(self.requests.time_until(1), self.tokens.time_until(tokens))
+                if delay <= 0:
+                    break
+                if time.monotonic() + delay > deadline:
+                    self._reject_timeout()
+                await asyncio.sleep(delay)
+            self.requests.consume(1)
+            self.tokens.consume(tokens)
+        finally:
+            was_head = self._waiters[0] is turn
+            self._waiters.remove(turn)
+            if was_head and self._waiters:
+                self._waiters[0].set_result(None)
+        
+        waited = time.monotonic() - start
+        self.admitted += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+
+    def _reject_timeout(self) -> None:
+        self.rejected_timeout += 1
+        raise AdmissionRejectedError(
+            f"Gemini request budget not available within {self.max_wait_seconds}s",
+            retry_after=self.retry_after()
+        )
+
+    def settle(self, reserved_tokens: int, actual_tokens: int) -> None:
+        """Correct the token bucket once the real size of a call is known"""
+        if actual_tokens > reserved_tokens:
+            self.tokens.consume(actual_tokens - reserved_tokens)
+        else:
+            self.tokens.refund(reserved_tokens - actual_tokens)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.queue_depth,
+            "max_queue_depth_seen": self.max_depth_seen,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_over_budget": self.rejected_over_budget,
+            "rejected_timeout": self.rejected_timeout,
+            "avg_wait_seconds": round(self.total_wait / self.admitted, 4) if self.admitted else 0.0,
+            "max_wait_seconds": round(self.max_wait, 4),
+            "request_tokens_available": None if self.requests.unlimited else round(self.requests.level, 2),
+            "tokens_available": None if self.tokens.unlimited else round(self.tokens.level),
+        }
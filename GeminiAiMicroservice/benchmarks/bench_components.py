@@ -0,0 +1,243 @@
+# bench_components.py
+"""Per-call time and peak allocations of the pure-Python pieces every plan request runs.
+
+Cases, all on realistic inputs:
+  duration_parse      DurationParser.parse_duration + calculate_totals over the durations clients send
+  subject_detect      SubjectDetector.detect_subject_category over benchmarks/data/goal_corpus.json
+  clean/<size>        ResponseCleaner.clean_json_response on fenced Gemini answers of 1 KB to 200 KB
+  validate/<days>     PlanValidator.validate_plan_structure on parsed 7- to 365-day plans
+                      (every fifth item missing status/resources; each call gets a fresh copy)
+  tasks/<goal>/<days> TaskGenerator.create_ultra_specific_daily_tasks, curriculum and generic goals
+  fallback/<days>     FallbackPlanGenerator.create_intelligent_fallback_plan, duplicate rewriting on
+
+Time is the best of --rounds rounds, per call. Allocations are the tracemalloc peak
+of one call. Each case round is paired with a round of a fixed pure-Python calibration
+workload, and the median ratio of the pairs is the case's relative time. The committed baseline (benchmarks/data/components_baseline.json)
+is compared on that relative time, so it still applies on a faster or slower machine.
+--check exits 1 when a case's relative time exceeds its baseline by more than --time-tolerance
+or its peak by more than --alloc-tolerance. Use --update-baseline after an intended change.
+
+    python benchmarks/bench_components.py --check
+    python benchmarks/bench_components.py --only validate --rounds 9
+    python benchmarks/bench_components.py --update-baseline
+"""
+import argparse
+import copy
+import gc
+import json
+import os
+import platform
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, NamedTuple, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from LearningPlanComponents.curricula import get_curriculum_registry
+from LearningPlanComponents.fallback_plan_generator import FallbackPlanGenerator
+from LearningPlanComponents.subject_detector import SubjectDetector
+from LearningPlanComponents.task_generator import TaskGenerator
+from LearningPlanComponents.utils import DurationParser, PlanValidator, ResponseCleaner
+from bench_plan_validation import gemini_answer
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+CORPUS_PATH = os.path.join(DATA, "goal_corpus.json")
+BASELINE_PATH = os.path.join(DATA, "components_baseline.json")
+
+DURATIONS = ("7 days", "10 days", "2 weeks", "3 weeks", "1 month", "6 weeks", "2 months", "3 months",
+             "6 months", "1 month 2 weeks", "1 year", "365 days")
+PLAN_DAYS = (7, 30, 90, 365)
+ANSWER_KIB = (1, 10, 50, 200)
+TASK_GOALS = (("Learn Python", "python"), ("Learn pottery", "general"))
+USER_CONTEXT = {"skill_level": "beginner", "learning_style": "practical", "daily_time": "1-2 hours",
+                "specific_interests": [], "practical_goals": []}
+ROUND_SECONDS = 0.05
+
+
+class Case(NamedTuple):
+    name: str
+    call: Callable[..., Any]
+    inputs: Callable[[int], List[Tuple]]  # argument tuples for n calls, built outside the timed loop
+    cycle: int = 1  # distinct inputs; a round always covers each of them equally often
+
+
+def _repeat(*args) -> Callable[[int], List[Tuple]]:
+    return lambda n: [args] * n
+
+
+def _cycle(argument_sets: List[Tuple]) -> Callable[[int], List[Tuple]]:
+    """n argument tuples taken round-robin from argument_sets"""
+    return lambda n: [argument_sets[i % len(argument_sets)] for i in range(n)]
+
+
+def answer_of_size(kib: int) -> str:
+    """Smallest fenced Gemini answer of at least kib KiB"""
+    days = 1
+    while len(gemini_answer(days)) < kib * 1024:
+        days += max(1, days // 4)
+    return gemini_answer(days)
+
+
+def build_cases() -> List[Case]:
+    curricula = get_curriculum_registry()
+    with open(CORPUS_PATH) as f:
+        goals = [entry["goal"] for entry in json.load(f)]
+    detector = SubjectDetector(curricula)
+    tasks = TaskGenerator(curricula)
+    fallback = FallbackPlanGenerator(curricula)
+
+    cases = [
+        Case("duration_parse",
+             lambda duration: DurationParser.calculate_totals(DurationParser.parse_duration(duration)),
+             _cycle([(duration,) for duration in DURATIONS]), len(DURATIONS)),
+        Case("subject_detect", detector.detect_subject_category, _cycle([(goal,) for goal in goals]), len(goals)),
+    ]
+    for kib in ANSWER_KIB:
+        cases.append(Case(f"clean/{kib}kb", ResponseCleaner.clean_json_response, _repeat(answer_of_size(kib))))
+    for days in PLAN_DAYS:
+        plan = json.loads(ResponseCleaner.clean_json_response(gemini_answer(days)))
+        cases.append(Case(f"validate/{days}d", PlanValidator.validate_plan_structure,
+                          lambda n, plan=plan: [(copy.deepcopy(plan),) for _ in range(n)]))
+    for goal, category in TASK_GOALS:
+        for days in PLAN_DAYS:
+            cases.append(Case(f"tasks/{category}/{days}d", tasks.create_ultra_specific_daily_tasks,
+                              _repeat(goal, category, days, USER_CONTEXT)))
+    for days in PLAN_DAYS:
+        cases.append(Case(f"fallback/{days}d", fallback.create_intelligent_fallback_plan,
+                          _repeat("Learn Python", f"{days} days", USER_CONTEXT)))
+    return cases
+
+
+def calibration() -> None:
+    """Fixed mix of the work the components do: dict/list building, json, regex, string ops"""
+    data = {f"item{i}": {"label": f"Day {i}", "tasks": [f"Task {i} part {j}" for j in range(3)]} for i in range(60)}
+    text = json.dumps(data)
+    json.loads(text)
+    re.findall(r"Day (\d+)", text)
+    sorted(data, key=lambda key: key[::-1])
+    " ".join(word.capitalize() for word in text.split()[:200])
+
+
+CALIBRATION = Case("calibration", calibration, _repeat())
+
+
+def run_round(case: Case, n: int) -> float:
+    """Seconds per call over n calls, with the cyclic GC paused as timeit does"""
+    batch = case.inputs(n)
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for args in batch:
+            case.call(*args)
+        return (time.perf_counter() - start) / n
+    finally:
+        gc.enable()
+
+
+def calls_per_round(case: Case) -> int:
+    """Calls that fill about ROUND_SECONDS, a whole number of passes over the case's inputs"""
+    single = run_round(case, case.cycle)
+    passes = int(ROUND_SECONDS / max(single * case.cycle, 1e-7))
+    return max(1, passes) * case.cycle
+
+
+def peak_kib(case: Case) -> float:
+    args = case.inputs(1)[0]
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        case.call(*args)
+        return (tracemalloc.get_traced_memory()[1] - before) / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def measure(cases: List[Case], rounds: int) -> Dict[str, Any]:
+    """Rounds of each case alternate with calibration rounds and the relative time is the
+    median of the paired ratios: this box's speed drifts by up to 2x within a minute,
+    which shifts both sides of a pair alike but makes separate minimums disagree"""
+    calibration_calls = calls_per_round(CALIBRATION)
+    calibration_best, results = float("inf"), {}
+    for case in cases:
+        n = calls_per_round(case)
+        case_times, ratios = [], []
+        for _ in range(rounds):
+            calibration_time = run_round(CALIBRATION, calibration_calls)
+            case_times.append(run_round(case, n))
+            ratios.append(case_times[-1] / calibration_time)
+            calibration_best = min(calibration_best, calibration_time)
+        results[case.name] = {"us": round(min(case_times) * 1e6, 3),
+                              "relative": float(f"{statistics.median(ratios):.4g}"),
+                              "peak_kib": round(peak_kib(case), 1)}
+    return {"python": platform.python_version(), "machine": platform.machine(),
+            "calibration_us": round(calibration_best * 1e6, 2), "cases": results}
+
+
+def compare(run: Dict[str, Any], baseline: Dict[str, Any], time_tolerance: float, alloc_tolerance: float) -> List[str]:
+    """Print the run next to the baseline; return the names of the cases that regressed"""
+    print(f"calibration {run['calibration_us']:.1f} us/call (baseline {baseline['calibration_us']:.1f} us)\n")
+    print(f"{'case':<22} {'us/call':>10} {'rel':>9} {'base rel':>9} {'time':>7} {'peak KiB':>9} {'base KiB':>9} {'alloc':>7}")
+    failed = []
+    for name, result in run["cases"].items():
+        base = baseline["cases"].get(name)
+        if base is None:
+            print(f"{name:<22} {result['us']:>10.2f} {result['relative']:>9.3g} {'new':>9} {'':>7} {result['peak_kib']:>9.1f}")
+            continue
+        time_change = result["relative"] / base["relative"] - 1
+        alloc_change = result["peak_kib"] / base["peak_kib"] - 1 if base["peak_kib"] else 0.0
+        slow, heavy = time_change > time_tolerance, alloc_change > alloc_tolerance
+        if slow or heavy:
+            failed.append(name)
+        print(f"{name:<22} {result['us']:>10.2f} {result['relative']:>9.3g} {base['relative']:>9.3g} "
+              f"{time_change:>+6.0%}{'!' if slow else ' '} {result['peak_kib']:>9.1f} {base['peak_kib']:>9.1f} "
+              f"{alloc_change:>+6.0%}{'!' if heavy else ' '}")
+    return failed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=9, help="timed rounds per case")
+    parser.add_argument("--only", default="", help="run only cases whose name contains this")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--check", action="store_true", help="exit 1 when a case regressed past the tolerances")
+    parser.add_argument("--time-tolerance", type=float, default=0.25, help="allowed relative time increase")
+    parser.add_argument("--alloc-tolerance", type=float, default=0.10, help="allowed peak allocation increase")
+    parser.add_argument("--update-baseline", action="store_true", help="write this run as the new baseline")
+    args = parser.parse_args()
+
+    cases = [case for case in build_cases() if args.only in case.name]
+    run = measure(cases, args.rounds)
+
+    if args.update_baseline:
+        if args.only and os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                merged = json.load(f)
+            merged["cases"].update(run["cases"])
+            run = merged
+        with open(args.baseline, "w") as f:
+            json.dump(run, f, indent=2)
+            f.write("\n")
+        print(f"Wrote {args.baseline}")
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    if baseline is None:
+        print(f"No baseline at {args.baseline}\n")
+        baseline = {"calibration_us": run["calibration_us"], "cases": {}}
+    failed = compare(run, baseline, args.time_tolerance, args.alloc_tolerance)
+    if failed:
+        print(f"\n{len(failed)} case(s) over the baseline: {', '.join(failed)}")
+        if args.check:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
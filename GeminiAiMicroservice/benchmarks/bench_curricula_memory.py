@@ -0,0 +1,85 @@
+# bench_curricula_memory.py
+"""Startup time and resident memory of the curriculum-backed components.
+
+Each measurement runs in a fresh interpreter: import LearningPlanComponents, build the
+components the plan generator creates (subject detector, task generator, fallback
+generator) and one fallback plan. The baseline is LearningPlanComponents as of
+--baseline-ref (any revision before the shared curricula registry), where every
+component built its own copy of the curricula dict literal, extracted from git into a
+temporary directory. Reported per variant: import + construction time, time to the first
+plan and max RSS (medians of --runs), and the Python heap held afterwards (tracemalloc,
+from one separate run). Stdlib modules the service imports
+anyway (hashlib, json, threading) are loaded before timing in both variants.
+
+    python benchmarks/bench_curricula_memory.py --baseline-ref <rev> --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import io
+import tarfile
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = r"""
+import hashlib, json, resource, sys, threading, time, tracemalloc
+sys.path.insert(0, sys.argv[1])
+if sys.argv[2] == "heap":
+    tracemalloc.start()
+start = time.perf_counter()
+from LearningPlanComponents.subject_detector import SubjectDetector
+from LearningPlanComponents.task_generator import TaskGenerator
+from LearningPlanComponents.fallback_plan_generator import FallbackPlanGenerator
+detector, tasks, fallback = SubjectDetector(), TaskGenerator(), FallbackPlanGenerator()
+startup = time.perf_counter() - start
+fallback.create_intelligent_fallback_plan("Master data structures and algorithms", "1 month")
+first_plan = time.perf_counter() - start - startup
+heap = tracemalloc.get_traced_memory()[0]
+print(json.dumps({"startup_ms": startup * 1e3, "first_plan_ms": first_plan * 1e3, "heap_kib": heap / 1024,
+                  "rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))
+"""
+
+
+def extract_baseline(ref: str) -> str:
+    archive = subprocess.run(["git", "archive", ref, "LearningPlanComponents"], cwd=ROOT, check=True,
+                             capture_output=True).stdout
+    path = tempfile.mkdtemp()
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(path)
+    # Byte-compile up front, as the working tree already is, so runs do not time the compiler
+    subprocess.run([sys.executable, "-m", "compileall", "-q", path], check=True)
+    return path
+
+
+def probe(tree: str, mode: str):
+    return json.loads(subprocess.run([sys.executable, "-c", PROBE, tree, mode], check=True, capture_output=True,
+                                     text=True).stdout)
+
+
+def measure(tree: str, runs: int):
+    # Timings and RSS come from untraced runs; tracemalloc slows allocation-heavy code like regex compilation
+    samples = [probe(tree, "time") for _ in range(runs)]
+    result = {key: statistics.median(sample[key] for sample in samples) for key in ("startup_ms", "first_plan_ms", "rss_kib")}
+    result["heap_kib"] = probe(tree, "heap")["heap_kib"]
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--baseline-ref", required=True, help="git revision without the curricula registry")
+    args = parser.parse_args()
+
+    results = {"baseline": measure(extract_baseline(args.baseline_ref), args.runs), "registry": measure(ROOT, args.runs)}
+    print(f"{'variant':<9} {'startup ms':>10} {'1st plan ms':>11} {'heap KiB':>9} {'max RSS KiB':>11}")
+    for name, result in results.items():
+        print(f"{name:<9} {result['startup_ms']:>10.1f} {result['first_plan_ms']:>11.1f} "
+              f"{result['heap_kib']:>9.0f} {result['rss_kib']:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# bench_duplicate_detection.py
+"""Near-duplicate detection on 365-day plans: speed, accuracy and fallback rewrites.
+
+Gemini-like plans: distinct daily tasks drawn from the curricula vocabulary, with every
+tenth day replaced by an edited copy of an earlier day (numbers changed, a "(Part 2)"
+aside, a "Day N:" prefix or one word swapped). NearDuplicateDetector is compared with
+exact pairwise Jaccard over the same shingles (quadratic, the accuracy reference) and
+with the old exact-match is_repetitive normalization, which only answers yes/no.
+
+Fallback plans: near duplicates per section (exact Jaccard) before and after
+rewrite_repeated_items, and the CPU time rewriting adds to create_intelligent_fallback_plan.
+
+    python benchmarks/bench_duplicate_detection.py --days 365 --repeat 5
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from LearningPlanComponents.curricula import get_curriculum_registry
+from LearningPlanComponents.duplicate_detector import NearDuplicateDetector, item_text
+from LearningPlanComponents.fallback_plan_generator import FallbackPlanGenerator
+
+GOALS = ("Learn Python", "Learn React", "Master DSA", "Prepare for GATE", "Get fit", "Learn Hindi", "Learn pottery")
+
+
+def old_exact_duplicates(texts):
+    """Indices the pre-detector is_repetitive normalization treats as repeats"""
+    seen, duplicates = set(), set()
+    for i, text in enumerate(texts):
+        cleaned = re.sub(r'\b(day|week|month|study|learn|practice|continue)\s+\d+:?\s*', '', text.lower())
+        if cleaned in seen and len(cleaned) > 10:
+            duplicates.add(i)
+        seen.add(cleaned)
+    return duplicates
+
+
+def pairwise_duplicates(detector, texts):
+    shingles = [set(detector.shingles(text)) for text in texts]
+    return {j for j in range(len(texts))
+            if shingles[j] and any(len(shingles[i] & shingles[j]) / len(shingles[i] | shingles[j]) >= detector.threshold
+                                   for i in range(j) if shingles[i])}
+
+
+def gemini_like_days(days: int, seed: int = 7):
+    """(task texts, indices of injected near duplicates)"""
+    registry = get_curriculum_registry()
+    vocabulary = sorted({word for category in registry.categories() for field in ("topics", "practical_tasks", "projects")
+                         for entry in registry[category][field] for word in re.findall(r'[A-Za-z]{3,}', entry)})
+    rng = random.Random(seed)
+    texts, injected = [], set()
+    for day in range(days):
+        if day >= 10 and day % 10 == 0:
+            source = texts[rng.randrange(day)]
+            edit = day // 10 % 4
+            if edit == 0:
+                text = re.sub(r'\d+', lambda m: str(int(m.group()) + 5), source)
+            elif edit == 1:
+                text = source + " (Part 2)"
+            elif edit == 2:
+                text = f"Day {day + 1}: {source}"
+            else:
+                words = source.split()
+                words[rng.randrange(len(words))] = rng.choice(vocabulary)
+                text = " ".join(words)
+            texts.append(text)
+            injected.add(day)
+        else:
+            texts.append(f"{rng.choice(('Build', 'Practice', 'Review', 'Write'))} {rng.randint(2, 30)} "
+                         + " ".join(rng.sample(vocabulary, rng.randint(10, 16))))
+    return texts, injected
+
+
+def best_of(repeat, fn):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.process_time()
+        result = fn()
+        best = min(best, time.process_time() - start)
+    return best * 1e3, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    detector = NearDuplicateDetector()
+
+    texts, injected = gemini_like_days(args.days)
+    print(f"Gemini-like plan: {args.days} days, {len(injected)} injected near duplicates")
+    print(f"{'method':<24} {'ms':>8} {'flagged':>8} {'recall':>7} {'precision':>9}")
+    cold_ms, _ = best_of(1, lambda: NearDuplicateDetector().find_duplicates(texts))
+    rows = [
+        ("old exact normalization", *best_of(args.repeat, lambda: old_exact_duplicates(texts))),
+        ("pairwise Jaccard", *best_of(args.repeat, lambda: pairwise_duplicates(detector, texts))),
+        ("MinHash LSH (cold)", cold_ms, set(detector.find_duplicates(texts))),
+        ("MinHash LSH (warm)", *best_of(args.repeat, lambda: set(detector.find_duplicates(texts)))),
+    ]
+    for name, ms, flagged in rows:
+        hits = len(flagged & injected)
+        precision = hits / len(flagged) if flagged else 1.0
+        print(f"{name:<24} {ms:>8.2f} {len(flagged):>8} {hits / len(injected):>7.2f} {precision:>9.2f}")
+
+    print(f"\nFallback plans, {args.days} days: near duplicates per section (exact) and ms per plan")
+    print(f"{'goal':<18} {'daily before':>12} {'after':>6} {'weekly before':>13} {'after':>6} {'plain ms':>9} {'rewrite ms':>10}")
+    plain = FallbackPlanGenerator(rewrite_duplicates=False)
+    rewriting = FallbackPlanGenerator(duplicate_detector=detector)
+    duration = f"{args.days} days"
+    for goal in GOALS:
+        plain_ms, before = best_of(args.repeat, lambda: plain.create_intelligent_fallback_plan(goal, duration))
+        rewrite_ms, after = best_of(args.repeat, lambda: rewriting.create_intelligent_fallback_plan(goal, duration))
+        counts = [len(pairwise_duplicates(detector, [item_text(item) for item in plan[section]]))
+                  for section in ("dailyTasks", "weeklyTasks") for plan in (before, after)]
+        print(f"{goal:<18} {counts[0]:>12} {counts[1]:>6} {counts[2]:>13} {counts[3]:>6} {plain_ms:>9.2f} {rewrite_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
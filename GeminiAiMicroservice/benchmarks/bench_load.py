@@ -0,0 +1,304 @@
+# bench_load.py
+"""End-to-end load test of /generate-plan: throughput, latency percentiles, attempts, fallbacks.
+
+Starts benchmarks/fake_gemini.py and the service (uvicorn main:app with GEMINI_BASE_URL
+pointing at the fake) as subprocesses, unless --service-url targets a running service,
+then sweeps concurrency x plan duration with closed-loop async clients: each of the
+--concurrency clients sends its next request as soon as the previous one returns.
+Goals cycle through benchmarks/data/goal_corpus.json. The spawned service gets an
+unlimited Gemini budget and a plan cache that expires entries at once, so every
+request generates a plan; --env KEY=VALUE overrides any service setting.
+
+Per cell: requests/s, latency p50/p90/p99/max, HTTP errors, Gemini calls per plan
+(fake's /stats), full-plan attempts per single-call plan (service /stats), and the share
+of plans that needed some fallback items (llm+fallback) or were entirely fallback.
+The fake, the service and this driver share the machine's CPUs; compare runs made on
+the same machine only.
+
+Each run is saved to benchmarks/results/load-<timestamp>.json. --baseline compares the
+new run with a saved one; --diff compares two saved runs without running anything. A
+cell regresses when throughput drops or p99 rises by more than --tolerance, and the
+exit status is 1 if any cell regressed.
+
+    python benchmarks/bench_load.py --concurrency 1,8,32 --durations "14 days,60 days" --requests 40
+    python benchmarks/bench_load.py --baseline benchmarks/results/load-20261018-120000.json
+    python benchmarks/bench_load.py --diff OLD.json NEW.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCHMARKS)
+RESULTS_DIR = os.path.join(BENCHMARKS, "results")
+
+# Applied to a spawned service before --env overrides
+SERVICE_ENV = {
+    "GEMINI_API_KEY": "load-test",
+    "GEMINI_RPM": "0",
+    "GEMINI_TPM": "0",
+    "PLAN_CACHE_TTL_SECONDS": "0",
+    "PLAN_CACHE_DB_PATH": "",
+    "PLAN_STORE_DB_PATH": "",
+    "LOG_LEVEL": "WARNING",
+}
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return float("nan")
+    return sorted_values[min(len(sorted_values) - 1, max(0, math.ceil(p / 100 * len(sorted_values)) - 1))]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_up(url: str, process: subprocess.Popen, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{' '.join(process.args)} exited with status {process.returncode}")
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.TransportError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def _parse_env(pairs: List[str]) -> Dict[str, str]:
+    env = {}
+    for pair in pairs:
+        key, sep, value = pair.partition("=")
+        if not sep:
+            raise ValueError(f"--env expects KEY=VALUE, got {pair!r}")
+        env[key] = value
+    return env
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def _get_json(client: httpx.AsyncClient, url: str) -> Dict[str, Any]:
+    response = await client.get(url)
+    response.raise_for_status()
+    return response.json()
+
+
+async def run_cell(client: httpx.AsyncClient, service_url: str, fake_url: Optional[str], goals: List[str],
+                   duration: str, concurrency: int, requests: int) -> Dict[str, Any]:
+    """Send `requests` plans for `duration` from `concurrency` closed-loop clients"""
+    stats_before = await _get_json(client, f"{service_url}/stats")
+    fake_before = await _get_json(client, f"{fake_url}/stats") if fake_url else None
+    latencies, sources, errors = [], {}, {}
+    next_request = 0
+
+    async def worker():
+        nonlocal next_request
+        while next_request < requests:
+            goal = goals[next_request % len(goals)]
+            next_request += 1
+            start = time.perf_counter()
+            try:
+                response = await client.post(f"{service_url}/generate-plan", json={"goal": goal, "duration": duration})
+            except httpx.HTTPError as e:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+                continue
+            elapsed = time.perf_counter() - start
+            if response.status_code != 200:
+                errors[str(response.status_code)] = errors.get(str(response.status_code), 0) + 1
+                continue
+            latencies.append(elapsed)
+            source = response.json().get("source") or "unknown"
+            sources[source] = sources.get(source, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    wall = time.perf_counter() - start
+
+    stats_after = await _get_json(client, f"{service_url}/stats")
+    mode = stats_after["output"]["mode"]
+    plans = stats_after["output"][mode]["plans"] - stats_before["output"][mode]["plans"]
+    attempts = stats_after["output"][mode]["attempts"] - stats_before["output"][mode]["attempts"]
+    gemini_calls = None
+    if fake_url:
+        gemini_calls = (await _get_json(client, f"{fake_url}/stats"))["total"] - fake_before["total"]
+
+    ok = len(latencies)
+    latencies.sort()
+    return {
+        "duration": duration,
+        "concurrency": concurrency,
+        "requests": requests,
+        "ok": ok,
+        "errors": errors,
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(ok / wall, 3) if wall else 0.0,
+        "latency_ms": {name: round(percentile(latencies, p) * 1e3, 1)
+                       for name, p in (("p50", 50), ("p90", 90), ("p99", 99), ("max", 100))},
+        "mean_latency_ms": round(sum(latencies) / ok * 1e3, 1) if ok else None,
+        "gemini_calls_per_plan": round(gemini_calls / ok, 3) if gemini_calls is not None and ok else None,
+        "attempts_per_plan": round(attempts / plans, 3) if plans else None,
+        "sources": sources,
+        "partial_fallback_rate": round(sources.get("llm+fallback", 0) / ok, 4) if ok else None,
+        "fallback_rate": round(sources.get("fallback", 0) / ok, 4) if ok else None,
+    }
+
+
+def print_report(run: Dict[str, Any]) -> None:
+    print(f"{'duration':<10} {'conc':>4} {'ok':>5} {'err':>4} {'req/s':>7} {'p50 ms':>8} {'p90 ms':>8} "
+          f"{'p99 ms':>8} {'max ms':>8} {'calls':>6} {'attempts':>8} {'partial':>7} {'fallback':>8}")
+    for cell in run["cells"]:
+        latency = cell["latency_ms"]
+        calls = f"{cell['gemini_calls_per_plan']:.2f}" if cell["gemini_calls_per_plan"] is not None else "-"
+        attempts = f"{cell['attempts_per_plan']:.2f}" if cell["attempts_per_plan"] is not None else "-"
+        print(f"{cell['duration']:<10} {cell['concurrency']:>4} {cell['ok']:>5} {sum(cell['errors'].values()):>4} "
+              f"{cell['throughput_rps']:>7.2f} {latency['p50']:>8.0f} {latency['p90']:>8.0f} {latency['p99']:>8.0f} "
+              f"{latency['max']:>8.0f} {calls:>6} {attempts:>8} {cell['partial_fallback_rate']:>7.1%} "
+              f"{cell['fallback_rate']:>8.1%}")
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any], tolerance: float) -> int:
+    """Print per-cell changes; returns the number of regressed cells"""
+    old_cells = {(cell["duration"], cell["concurrency"]): cell for cell in old["cells"]}
+    print(f"\nvs {old.get('commit') or '?'} ({old['timestamp']}), tolerance {tolerance:.0%}")
+    changed = [key for key in ("fake", "service_env", "cpus") if old["config"].get(key) != new["config"].get(key)]
+    if changed:
+        print(f"note: run settings changed ({', '.join(changed)}), so differences are not only the code's")
+    print(f"{'duration':<10} {'conc':>4} {'req/s':>16} {'change':>7} {'p99 ms':>15} {'change':>7}")
+    regressions = 0
+    for cell in new["cells"]:
+        before = old_cells.get((cell["duration"], cell["concurrency"]))
+        if before is None:
+            continue
+        rps_change = cell["throughput_rps"] / before["throughput_rps"] - 1 if before["throughput_rps"] else 0.0
+        p99_change = cell["latency_ms"]["p99"] / before["latency_ms"]["p99"] - 1 if before["latency_ms"]["p99"] else 0.0
+        regressed = rps_change < -tolerance or p99_change > tolerance
+        regressions += regressed
+        print(f"{cell['duration']:<10} {cell['concurrency']:>4} "
+              f"{before['throughput_rps']:>7.2f} -> {cell['throughput_rps']:<6.2f} {rps_change:>+7.1%} "
+              f"{before['latency_ms']['p99']:>6.0f} -> {cell['latency_ms']['p99']:<6.0f} {p99_change:>+7.1%}"
+              f"{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+async def sweep(args, service_url: str, fake_url: Optional[str]) -> List[Dict[str, Any]]:
+    with open(os.path.join(BENCHMARKS, "data", "goal_corpus.json")) as f:
+        goals = [entry["goal"] for entry in json.load(f)]
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    cells = []
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        for duration in args.durations:
+            # Warm imports, connections and per-duration code paths outside the measurement
+            await run_cell(client, service_url, fake_url, goals[::-1], duration, 1, args.warmup)
+            for concurrency in args.concurrency:
+                cell = await run_cell(client, service_url, fake_url, goals, duration, concurrency, args.requests)
+                print(f"  {duration}, concurrency {concurrency}: {cell['throughput_rps']:.2f} req/s", flush=True)
+                cells.append(cell)
+    return cells
+
+
+def run(args) -> Dict[str, Any]:
+    processes = []
+    service_env = dict(SERVICE_ENV, **_parse_env(args.env))
+    fake_url = args.fake_url
+    try:
+        if args.service_url:
+            service_url = args.service_url.rstrip("/")
+        else:
+            if fake_url is None:
+                fake_port = _free_port()
+                processes.append(subprocess.Popen(
+                    [sys.executable, os.path.join(BENCHMARKS, "fake_gemini.py"), "--port", str(fake_port),
+                     "--latency", args.latency, "--per-item-ms", str(args.per_item_ms), "--mix", args.mix],
+                    stdout=subprocess.DEVNULL))
+                fake_url = f"http://127.0.0.1:{fake_port}"
+                _wait_until_up(f"{fake_url}/stats", processes[-1])
+            service_port = _free_port()
+            env = dict(os.environ, GEMINI_BASE_URL=f"{fake_url}/v1beta", **service_env)
+            service_log = open(args.service_log, "w") if args.service_log else subprocess.DEVNULL
+            processes.append(subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "main:app", "--port", str(service_port), "--log-level", "warning",
+                 "--no-access-log"],
+                cwd=ROOT, env=env, stdout=service_log, stderr=subprocess.STDOUT))
+            service_url = f"http://127.0.0.1:{service_port}"
+            _wait_until_up(f"{service_url}/", processes[-1])
+        cells = asyncio.run(sweep(args, service_url, fake_url))
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait(timeout=10)
+    return {
+        "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "commit": _git_commit(),
+        "config": {
+            "service_url": args.service_url,
+            "fake": None if args.service_url else {"latency": args.latency, "per_item_ms": args.per_item_ms,
+                                                   "mix": args.mix, "url": args.fake_url},
+            "service_env": None if args.service_url else service_env,
+            "requests_per_cell": args.requests,
+            "cpus": os.cpu_count(),
+        },
+        "cells": cells,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,8,32", type=lambda s: [int(c) for c in s.split(",")])
+    parser.add_argument("--durations", default="14 days,60 days", type=lambda s: [d.strip() for d in s.split(",")])
+    parser.add_argument("--requests", type=int, default=40, help="requests per cell")
+    parser.add_argument("--warmup", type=int, default=2, help="unmeasured requests per duration")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--latency", default="lognormal:0.8,0.4", help="fake Gemini latency spec")
+    parser.add_argument("--per-item-ms", type=float, default=2.0)
+    parser.add_argument("--mix", default="valid=0.9,short=0.04,truncated=0.03,malformed=0.02,error=0.01")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="spawned service setting")
+    parser.add_argument("--service-url", help="test a running service instead of spawning one")
+    parser.add_argument("--fake-url", help="use a running fake_gemini.py instead of spawning one")
+    parser.add_argument("--service-log", help="file for the spawned service's log output (default: discarded)")
+    parser.add_argument("--output", help="result file (default benchmarks/results/load-<timestamp>.json)")
+    parser.add_argument("--baseline", help="saved run to compare this run with")
+    parser.add_argument("--diff", nargs=2, metavar=("OLD", "NEW"), help="compare two saved runs and exit")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    if args.diff:
+        old, new = (json.load(open(path)) for path in args.diff)
+        print_report(new)
+        sys.exit(1 if compare(old, new, args.tolerance) else 0)
+
+    result = run(args)
+    print()
+    print_report(result)
+    output = args.output or os.path.join(RESULTS_DIR, f"load-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nSaved {output}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            sys.exit(1 if compare(json.load(f), result, args.tolerance) else 0)
+
+
+if __name__ == "__main__":
+    main()
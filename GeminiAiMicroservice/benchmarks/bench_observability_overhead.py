@@ -0,0 +1,116 @@
+# bench_observability_overhead.py
+"""What stage spans, plan metrics and structured logging cost on the request path.
+
+Spans: ns per timed stage with METRICS_MODE on vs off (no-op spans).
+Pipeline: agenerate_learning_plan per plan with Gemini stubbed to answer instantly
+(prebuilt fenced JSON, plan cache bypassed, DEDUP_MODE=report), so every CPU stage
+runs but no network time hides the instrumentation. Plans alternate on/off and the
+median CPU time per plan of each mode is reported, as single runs vary by ~10% here.
+Logging: caller-side cost of one log line, the old synchronous print() to stdout vs
+a record queued for the writer thread by configure_logging (stdout goes to /dev/null).
+
+    python benchmarks/bench_observability_overhead.py --plans 200 --rounds 5
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["PLAN_CACHE_DB_PATH"] = ""
+os.environ["DEDUP_MODE"] = "report"
+
+import observability
+from learning_plan_generator import LearningPlanGenerator
+from bench_plan_validation import gemini_answer
+
+DAYS = (7, 14, 30)
+
+
+def span_ns(iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        with observability.span("clean", "python", 1):
+            pass
+    return (time.perf_counter() - start) / iterations * 1e9
+
+
+async def pipeline_ms(generator: LearningPlanGenerator, duration: str, plans: int):
+    """Median ms per plan with metrics (off, on), alternating plan by plan"""
+    timings = {False: [], True: []}
+    for i in range(2 * plans):
+        enabled = bool(i % 2)
+        observability.set_enabled(enabled)
+        start = time.process_time()
+        await generator.agenerate_learning_plan("Learn Python", duration)
+        timings[enabled].append(time.process_time() - start)
+    return statistics.median(timings[False]) * 1e3, statistics.median(timings[True]) * 1e3
+
+
+def log_line_us(emit, iterations: int) -> float:
+    start = time.perf_counter()
+    for i in range(iterations):
+        emit(i)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+async def run(plans: int, rounds: int, iterations: int) -> None:
+    print(f"{'span':<10} {'ns/span':>8}")
+    for enabled in (False, True):
+        observability.set_enabled(enabled)
+        best = min(span_ns(iterations) for _ in range(rounds))
+        print(f"{'on' if enabled else 'off':<10} {best:>8.0f}")
+
+    generator = LearningPlanGenerator("benchmark")
+
+    async def cache_miss(key):
+        return None
+
+    generator.plan_cache.aget = cache_miss
+    print(f"\n{'days':>4} {'off ms/plan':>11} {'on ms/plan':>10} {'us/plan':>8} {'overhead':>8}")
+    for days in DAYS:
+        answer = gemini_answer(days)
+
+        async def ainvoke(prompt, **kwargs):
+            return answer
+
+        generator.llm.ainvoke = ainvoke
+        duration = f"{days} days"
+        await pipeline_ms(generator, duration, 5)
+        off_ms, on_ms = await pipeline_ms(generator, duration, plans * rounds)
+        print(f"{days:>4} {off_ms:>11.3f} {on_ms:>10.3f} {(on_ms - off_ms) * 1e3:>8.0f} {(on_ms / off_ms - 1) * 100:>7.1f}%")
+    generator.close()
+
+    sys.stdout.flush()
+    real_stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+    try:
+        printed = min(log_line_us(lambda i: print(f"Attempt {i}: Calling Gemini API with full prompt..."), iterations)
+                      for _ in range(rounds))
+        observability.configure_logging(level="INFO", log_format="json")
+        log = logging.getLogger("bench")
+        queued = min(log_line_us(lambda i: log.info("Attempt %d: Calling Gemini API with %s prompt", i, "full"), iterations)
+                     for _ in range(rounds))
+        skipped = min(log_line_us(lambda i: log.debug("Raw response received, length: %d", i), iterations)
+                      for _ in range(rounds))
+    finally:
+        sys.stdout = real_stdout
+    print(f"\n{'log line':<24} {'us/line':>8}")
+    print(f"{'print() to stdout':<24} {printed:>8.2f}")
+    print(f"{'queued logger.info':<24} {queued:>8.2f}")
+    print(f"{'logger.debug (off)':<24} {skipped:>8.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--plans", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--iterations", type=int, default=100_000, help="spans and log lines per round")
+    args = parser.parse_args()
+    asyncio.run(run(args.plans, args.rounds, args.iterations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# bench_plan_validation.py
+"""CPU time and peak allocations of turning Gemini's answer into response objects.
+
+Old chain: ResponseCleaner → json.loads → PlanValidator.validate_plan_structure →
+TaskItem(**item) for every item + LearningPlanResponse (main._plan_response).
+New chain: ResponseCleaner → GeneratedPlan.model_validate_json, one compiled pass that
+fills the same defaults. Answers are fenced like Gemini's, 2 resources per weekly/daily
+item; every fifth item omits status/resources and uses an unknown resource type so the
+defaults are exercised. Both chains must produce the same response before timing.
+
+    python benchmarks/bench_plan_validation.py --iterations 200
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import _plan_response
+from models import GeneratedPlan
+from LearningPlanComponents.utils import DurationParser, PlanValidator, ResponseCleaner, SECTION_LABELS, SECTION_TOTALS
+
+DAYS = (14, 44, 180, 365)
+
+
+def gemini_answer(days: int) -> str:
+    totals = DurationParser.calculate_totals(DurationParser.parse_duration(f"{days} days"))
+    plan = {"goalTitle": "Learn Python", "totalDays": days}
+    for section, total_key in SECTION_TOTALS.items():
+        items = []
+        for i in range(totals[total_key]):
+            item = {"label": f"{SECTION_LABELS[section]} {i + 1}",
+                    "tasks": [f"Work through exercise set {i + 1} and write up what you learned",
+                              "Review yesterday's notes and fix one mistake"],
+                    "resources": [{"title": f"Chapter {i + 1}", "type": "documentation" if i % 5 else "blog post",
+                                   "url": f"https://docs.python.org/3/tutorial/{i}", "description": "Reading"},
+                                  {"title": "Practice", "type": "tool", "url": "https://exercism.org/tracks/python",
+                                   "description": "Exercises"}],
+                    "status": False}
+            if i % 5 == 0:
+                del item["status"]
+                if section == "monthlyTasks":
+                    del item["resources"]
+            items.append(item)
+        plan[section] = items
+    return "Here is your plan:\n```json\n" + json.dumps(plan, indent=2) + "\n```"
+
+
+def old_chain(raw: str):
+    plan = json.loads(ResponseCleaner.clean_json_response(raw))
+    return _plan_response(PlanValidator.validate_plan_structure(plan))
+
+
+def new_chain(raw: str):
+    return GeneratedPlan.model_validate_json(ResponseCleaner.clean_json_response(raw))
+
+
+def measure(chain, raw: str, iterations: int):
+    start = time.process_time()
+    for _ in range(iterations):
+        chain(raw)
+    cpu_ms = (time.process_time() - start) / iterations * 1e3
+    tracemalloc.start()
+    chain(raw)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return cpu_ms, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'days':>4} {'answer KiB':>10} {'old ms':>7} {'new ms':>7} {'speedup':>7} {'old peak KiB':>12} {'new peak KiB':>12}")
+    for days in DAYS:
+        raw = gemini_answer(days)
+        assert old_chain(raw).model_dump() == new_chain(raw).model_dump(), f"{days}-day results differ"
+        old_ms, old_peak = measure(old_chain, raw, args.iterations)
+        new_ms, new_peak = measure(new_chain, raw, args.iterations)
+        print(f"{days:>4} {len(raw) / 1024:>10.0f} {old_ms:>7.2f} {new_ms:>7.2f} {old_ms / new_ms:>6.1f}x "
+              f"{old_peak / 1024:>12.0f} {new_peak / 1024:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
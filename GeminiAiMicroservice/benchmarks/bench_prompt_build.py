@@ -0,0 +1,96 @@
+# bench_prompt_build.py
+"""CPU time and allocations of building plan prompts, compiled templates vs. a baseline.
+
+The baseline is templates.py as of --baseline-ref, loaded from git: pass a revision that
+still rebuilt the examples dict and re-rendered the full f-string on every call, such as
+the parent of the commit that compiled the templates. Both versions must produce
+identical prompts; the benchmark checks that before timing one request's worth of
+prompts (up to three attempts) per iteration.
+
+    python benchmarks/bench_prompt_build.py --baseline-ref <rev> --iterations 20000
+"""
+import argparse
+import importlib.util
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import templates
+
+GOALS = [("Master data structures", "dsa"), ("Build React apps", "react"), ("Learn pottery", "general"),
+         ("Get fit", "fitness"), ("Learn Hindi", "hindi")]
+CONTEXTS = [
+    {"skill_level": "beginner", "learning_style": "practical", "daily_time": "1-2 hours",
+     "specific_interests": [], "practical_goals": []},
+    {"skill_level": "intermediate", "learning_style": "project-based", "daily_time": "2-3 hours",
+     "specific_interests": ["web development"], "practical_goals": ["job interviews"]},
+]
+
+
+def load_baseline(ref: str):
+    source = subprocess.run(["git", "show", f"{ref}:./templates.py"], cwd=ROOT, check=True,
+                            capture_output=True, text=True).stdout
+    path = os.path.join(tempfile.mkdtemp(), "templates_baseline.py")
+    with open(path, "w") as f:
+        f.write(source)
+    spec = importlib.util.spec_from_file_location("templates_baseline", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def request_prompts(module, i: int, builder: str, attempts: int):
+    goal, subject_category = GOALS[i % len(GOALS)]
+    context = CONTEXTS[i % len(CONTEXTS)]
+    build = getattr(module, builder)
+    return [build(goal, "1 month", 30, 4, 1, subject_category, context, attempt) for attempt in range(1, attempts + 1)]
+
+
+def measure(module, builder: str, iterations: int, attempts: int):
+    start = time.process_time()
+    for i in range(iterations):
+        request_prompts(module, i, builder, attempts)
+    cpu_us = (time.process_time() - start) / iterations * 1e6
+
+    # Bytes allocated at peak while building one request's prompts (freed afterwards)
+    tracemalloc.start()
+    peak_total = 0
+    sample = min(iterations, 2000)
+    for i in range(sample):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        request_prompts(module, i, builder, attempts)
+        peak_total += tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    return cpu_us, peak_total / sample
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--attempts", type=int, default=3, help="prompts built per request (retries)")
+    parser.add_argument("--baseline-ref", required=True, help="git revision with the uncompiled templates.py")
+    args = parser.parse_args()
+
+    baseline = load_baseline(args.baseline_ref)
+    for builder in ("get_enhanced_personalized_prompt", "get_compact_personalized_prompt"):
+        for i in range(len(GOALS) * len(CONTEXTS)):
+            assert request_prompts(baseline, i, builder, args.attempts) == request_prompts(templates, i, builder, args.attempts), \
+                f"{builder} output differs from baseline"
+
+        old_cpu, old_bytes = measure(baseline, builder, args.iterations, args.attempts)
+        new_cpu, new_bytes = measure(templates, builder, args.iterations, args.attempts)
+        print(f"{builder} ({args.attempts} attempts/request)")
+        print(f"  baseline  {old_cpu:8.1f} us/request  {old_bytes / 1024:7.1f} KiB peak alloc")
+        print(f"  compiled  {new_cpu:8.1f} us/request  {new_bytes / 1024:7.1f} KiB peak alloc"
+              f"  ({old_cpu / new_cpu:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
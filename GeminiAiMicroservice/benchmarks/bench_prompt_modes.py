@@ -0,0 +1,108 @@
+# bench_prompt_modes.py
+"""Compare the "full" and "compact" plan prompts (PROMPT_MODE).
+
+Always reports prompt size and estimated input tokens for a spread of subjects and
+durations. With --live (needs GEMINI_API_KEY) each prompt is also sent to Gemini
+--trials times per mode, reporting latency and first-attempt success: the answer
+parses and has exactly the requested number of usable items.
+
+    python benchmarks/bench_prompt_modes.py
+    python benchmarks/bench_prompt_modes.py --live --trials 3
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from learning_plan_generator import PLAN_PROMPT_BUILDERS
+from plan_repair import PlanRepairer
+from LearningPlanComponents.utils import DurationParser, ResponseCleaner, SECTION_TOTALS, estimate_tokens
+
+CASES = [
+    ("Master data structures and algorithms", "dsa", "2 weeks"),
+    ("Build React apps", "react", "1 month"),
+    ("Learn Python automation", "python", "3 weeks"),
+    ("Get fit", "fitness", "1 month"),
+    ("Learn pottery", "general", "10 days"),
+]
+USER_CONTEXT = {
+    "skill_level": "beginner",
+    "learning_style": "practical",
+    "daily_time": "1-2 hours",
+    "specific_interests": [],
+    "practical_goals": [],
+}
+
+
+def build_prompt(mode: str, goal: str, subject_category: str, duration: str):
+    totals = DurationParser.calculate_totals(DurationParser.parse_duration(duration))
+    prompt = PLAN_PROMPT_BUILDERS[mode](
+        goal=goal, duration=duration, total_days=totals["total_days"], total_weeks=totals["total_weeks"],
+        total_months=totals["total_months"], subject_category=subject_category, user_context=USER_CONTEXT
+    )
+    return prompt, totals
+
+
+def first_attempt_ok(raw_response: str, totals) -> bool:
+    try:
+        plan = json.loads(ResponseCleaner.clean_json_response(raw_response))
+    except json.JSONDecodeError:
+        return False
+    return isinstance(plan, dict) and all(
+        isinstance(plan.get(section), list) and len(plan[section]) == totals[total_key] and
+        all(PlanRepairer.is_usable(item) for item in plan[section])
+        for section, total_key in SECTION_TOTALS.items()
+    )
+
+
+def report_sizes() -> None:
+    print(f"{'case':<45} {'full chars':>10} {'~tokens':>8} {'compact chars':>14} {'~tokens':>8} {'saved':>6}")
+    for goal, subject_category, duration in CASES:
+        full, _ = build_prompt("full", goal, subject_category, duration)
+        compact, _ = build_prompt("compact", goal, subject_category, duration)
+        saved = 1 - estimate_tokens(compact) / estimate_tokens(full)
+        print(f"{goal + ' / ' + duration:<45} {len(full):>10} {estimate_tokens(full):>8} "
+              f"{len(compact):>14} {estimate_tokens(compact):>8} {saved:>6.0%}")
+
+
+async def run_live(trials: int) -> None:
+    from gemini_llm import GeminiLLM
+    llm = GeminiLLM(api_key=os.environ["GEMINI_API_KEY"])
+    for mode in PLAN_PROMPT_BUILDERS:
+        latencies, successes = [], 0
+        for goal, subject_category, duration in CASES:
+            prompt, totals = build_prompt(mode, goal, subject_category, duration)
+            for _ in range(trials):
+                start = time.perf_counter()
+                try:
+                    raw_response = await llm.ainvoke(prompt)
+                except Exception as e:
+                    print(f"  {mode}: {goal}: {e}")
+                    raw_response = ""
+                latencies.append(time.perf_counter() - start)
+                successes += first_attempt_ok(raw_response, totals)
+        print(f"{mode:<8} calls={len(latencies)} p50={statistics.median(latencies):.2f}s "
+              f"mean={statistics.mean(latencies):.2f}s first-attempt success={successes / len(latencies):.0%}")
+    await llm.transport.aclose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--live", action="store_true", help="also call Gemini (needs GEMINI_API_KEY)")
+    parser.add_argument("--trials", type=int, default=2)
+    args = parser.parse_args()
+
+    report_sizes()
+    if args.live:
+        if not os.getenv("GEMINI_API_KEY"):
+            sys.exit("--live needs GEMINI_API_KEY")
+        asyncio.run(run_live(args.trials))
+
+
+if __name__ == "__main__":
+    main()
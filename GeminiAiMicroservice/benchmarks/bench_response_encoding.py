@@ -0,0 +1,114 @@
+# bench_response_encoding.py
+"""Server-side cost and size of /generate-plan responses, RESPONSE_MODE standard vs fast.
+
+Drives the FastAPI app in-process over raw ASGI (no sockets, no client-side decoding)
+with plan generation stubbed to return a prebuilt fallback plan, so only request
+parsing, response validation, serialization and compression are timed. Each daily and
+weekly item gets --resources resource entries, as Gemini answers usually carry them.
+Standard and fast bodies are checked to decode to the same JSON.
+
+    python benchmarks/bench_response_encoding.py --requests 200
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ["PLAN_STORE_DB_PATH"] = ""
+os.environ["PLAN_CACHE_DB_PATH"] = ""
+
+import main as service
+import response_encoding
+
+DURATIONS = {30: "30 days", 180: "180 days", 365: "365 days"}
+
+
+def build_plan(days: int, resources: int) -> dict:
+    plan = service.generator.fallback_generator.create_intelligent_fallback_plan("Learn Python", DURATIONS[days])
+    for section in ("weeklyTasks", "dailyTasks"):
+        for item in plan[section]:
+            item["resources"] = [
+                {"title": f"Resource {i}", "type": "documentation", "url": f"https://docs.python.org/3/{i}",
+                 "description": "Reference material for this step"}
+                for i in range(resources)
+            ]
+    return dict(plan, source="llm")
+
+
+async def post(body: bytes, accept_encoding: str):
+    headers = [(b"content-type", b"application/json")]
+    if accept_encoding:
+        headers.append((b"accept-encoding", accept_encoding.encode()))
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+             "scheme": "http", "path": "/generate-plan", "raw_path": b"/generate-plan", "query_string": b"",
+             "root_path": "", "headers": headers, "client": ("bench", 1), "server": ("bench", 80)}
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    chunks, response_headers = [], {}
+
+    async def receive():
+        return messages.pop() if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response_headers.update((k.decode(), v.decode()) for k, v in message["headers"])
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await service.app(scope, receive, send)
+    return b"".join(chunks), response_headers
+
+
+def decode(body: bytes, headers) -> dict:
+    encoding = headers.get("content-encoding")
+    if encoding == "gzip":
+        body = gzip.decompress(body)
+    elif encoding == "br":
+        body = response_encoding.brotli.decompress(body)
+    return json.loads(body)
+
+
+async def run(requests: int, resources: int) -> None:
+    await service.startup_event()
+    variants = [("standard", "standard", ""), ("fast", "fast", ""), ("fast+gzip", "fast", "gzip")]
+    if "br" in response_encoding.supported_encodings():
+        variants.append(("fast+br", "fast", "br"))
+    print(f"{'days':>4} {'variant':<10} {'ms/request':>10} {'bytes':>9}")
+    for days in DURATIONS:
+        plan = build_plan(days, resources)
+
+        async def generate(*args, **kwargs):
+            return plan
+
+        service.generator.agenerate_learning_plan = generate
+        body = json.dumps({"goal": "Learn Python", "duration": DURATIONS[days]}).encode()
+        reference = None
+        for name, mode, accept_encoding in variants:
+            service.response_mode = mode
+            response, headers = await post(body, accept_encoding)
+            decoded = decode(response, headers)
+            reference = reference or decoded
+            assert decoded == reference, f"{name} response differs from standard"
+            start = time.perf_counter()
+            for _ in range(requests):
+                await post(body, accept_encoding)
+            elapsed = (time.perf_counter() - start) / requests
+            print(f"{days:>4} {name:<10} {elapsed * 1e3:>10.2f} {len(response):>9}")
+    await service.shutdown_event()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--resources", type=int, default=2, help="resources per weekly/daily item")
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.resources))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# bench_startup.py
+"""Cold-start cost of the service: import time, resident memory and time to first response.
+
+Measures the working tree and the tree at --ref (exported with git archive). Each one gets
+a warm-up run that writes its bytecode caches; after that, every measurement uses a fresh
+interpreter, as an autoscaled replica would:
+
+  import     wall time of `import main` and VmRSS right after it, plus whether langchain
+             was loaded and how many modules were
+  startup    `python -m uvicorn main:app` from exec until GET / answers, and the server's
+             VmRSS at that point
+
+Medians over --runs are reported, along with the packages that take the most import
+time (python -X importtime, self times summed per top-level package) for each tree.
+
+    python benchmarks/bench_startup.py --ref HEAD~1 --runs 7
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVICE_ENV = {"GEMINI_API_KEY": "startup-bench", "PLAN_CACHE_DB_PATH": "", "PLAN_STORE_DB_PATH": "",
+               "LOG_LEVEL": "WARNING"}
+
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main
+seconds = time.perf_counter() - start
+rss = next(int(line.split()[1]) for line in open("/proc/self/status") if line.startswith("VmRSS:"))
+print(json.dumps({"seconds": seconds, "rss_kib": rss, "modules": len(sys.modules),
+                  "langchain": any(name.split(".")[0].startswith("langchain") for name in sys.modules)}))
+"""
+
+
+def export_tree(ref: str, destination: str) -> str:
+    """Service directory of `ref`, extracted under destination"""
+    archive = os.path.join(destination, "tree.tar")
+    # Run from the service directory, git archive exports only that subtree
+    subprocess.run(["git", "archive", "--format=tar", "-o", archive, ref], cwd=ROOT, check=True)
+    with tarfile.open(archive) as tar:
+        tar.extractall(os.path.join(destination, "tree"))
+    return os.path.join(destination, "tree")
+
+
+def _env() -> Dict[str, str]:
+    return dict(os.environ, **SERVICE_ENV)
+
+
+def measure_import(tree: str) -> Dict[str, Any]:
+    output = subprocess.run([sys.executable, "-c", IMPORT_PROBE], cwd=tree, env=_env(), check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def _rss_kib(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+
+
+def measure_startup(tree: str, timeout: float = 60) -> Dict[str, Any]:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+                                "--log-level", "warning"], cwd=tree, env=_env(),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"service in {tree} exited with status {process.returncode}")
+            try:
+                httpx.get(f"http://127.0.0.1:{port}/", timeout=1)
+                break
+            except httpx.TransportError:
+                if time.perf_counter() - start > timeout:
+                    raise RuntimeError(f"service in {tree} did not answer within {timeout}s")
+                time.sleep(0.01)
+        return {"seconds": time.perf_counter() - start, "rss_kib": _rss_kib(process.pid)}
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def top_imports(tree: str, count: int = 5) -> List[tuple]:
+    """(top-level package, ms) with the most import time under `import main`, self times summed"""
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=tree, env=_env(),
+                            check=True, capture_output=True, text=True).stderr
+    totals: Dict[str, float] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        own, _, name = line[len("import time:"):].split("|")
+        package = name.strip().split(".")[0]
+        totals[package] = totals.get(package, 0.0) + int(own) / 1000
+    return sorted(totals.items(), key=lambda item: -item[1])[:count]
+
+
+def run_tree(name: str, tree: str, runs: int) -> Dict[str, Any]:
+    measure_import(tree)
+    imports = [measure_import(tree) for _ in range(runs)]
+    startups = [measure_startup(tree) for _ in range(runs)]
+    return {
+        "name": name,
+        "import_ms": statistics.median(run["seconds"] for run in imports) * 1e3,
+        "import_rss_mib": statistics.median(run["rss_kib"] for run in imports) / 1024,
+        "modules": imports[-1]["modules"],
+        "langchain": imports[-1]["langchain"],
+        "startup_ms": statistics.median(run["seconds"] for run in startups) * 1e3,
+        "startup_rss_mib": statistics.median(run["rss_kib"] for run in startups) / 1024,
+        "top_imports": top_imports(tree),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ref", default="HEAD", help="git ref to compare the working tree with")
+    parser.add_argument("--runs", type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = [run_tree(args.ref, export_tree(args.ref, tmp), args.runs),
+                   run_tree("working tree", ROOT, args.runs)]
+
+    print(f"{'tree':<14} {'import ms':>9} {'import RSS MiB':>14} {'modules':>7} {'langchain':>9} "
+          f"{'first response ms':>17} {'server RSS MiB':>14}")
+    for result in results:
+        print(f"{result['name']:<14} {result['import_ms']:>9.0f} {result['import_rss_mib']:>14.1f} "
+              f"{result['modules']:>7} {'yes' if result['langchain'] else 'no':>9} {result['startup_ms']:>17.0f} "
+              f"{result['startup_rss_mib']:>14.1f}")
+    for result in results:
+        print(f"\nslowest packages to import ({result['name']}): "
+              + ", ".join(f"{package} {ms:.0f} ms" for package, ms in result["top_imports"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# bench_subject_detector.py
+"""Accuracy and throughput of SubjectDetector over a labelled corpus of goals.
+
+Compares the compiled word-boundary matcher with the substring-scanning detector as of
+--baseline-ref (loaded from git; any revision before the compiled matcher), prints every
+misclassified goal, and times single-goal detection and the batch API. --min-accuracy
+makes the script exit non-zero when the current detector falls below the given accuracy,
+so it can gate changes.
+
+    python benchmarks/bench_subject_detector.py --baseline-ref <rev> --repeat 200 --min-accuracy 0.95
+"""
+import argparse
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from LearningPlanComponents.subject_detector import SubjectDetector
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "goal_corpus.json")
+
+
+def load_baseline(ref: str):
+    source = subprocess.run(["git", "show", f"{ref}:./LearningPlanComponents/subject_detector.py"], cwd=ROOT,
+                            check=True, capture_output=True, text=True).stdout
+    path = os.path.join(tempfile.mkdtemp(), "subject_detector_baseline.py")
+    with open(path, "w") as f:
+        f.write(source)
+    spec = importlib.util.spec_from_file_location("subject_detector_baseline", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.SubjectDetector()
+
+
+def accuracy(name: str, predictions, corpus) -> float:
+    wrong = [(case["goal"], case["expected"], predicted)
+             for case, predicted in zip(corpus, predictions) if predicted != case["expected"]]
+    score = 1 - len(wrong) / len(corpus)
+    print(f"{name:<9} accuracy {score:.1%} ({len(corpus) - len(wrong)}/{len(corpus)})")
+    for goal, expected, predicted in wrong:
+        print(f"    {goal!r}: expected {expected}, got {predicted}")
+    return score
+
+
+def per_goal_us(fn, goals, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(goals)
+    return (time.perf_counter() - start) / (repeat * len(goals)) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--baseline-ref", required=True, help="git revision with the substring detector")
+    parser.add_argument("--min-accuracy", type=float, default=None)
+    args = parser.parse_args()
+
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        corpus = json.load(f)
+    goals = [case["goal"] for case in corpus]
+
+    detector = SubjectDetector()
+    baseline = load_baseline(args.baseline_ref)
+
+    accuracy("baseline", [baseline.detect_subject_category(goal) for goal in goals], corpus)
+    current = accuracy("compiled", [detector.detect_subject_category(goal) for goal in goals], corpus)
+    assert detector.detect_subject_categories(goals) == [detector.detect_subject_category(goal) for goal in goals]
+
+    print(f"baseline  {per_goal_us(lambda gs: [baseline.detect_subject_category(g) for g in gs], goals, args.repeat):6.2f} us/goal")
+    print(f"compiled  {per_goal_us(lambda gs: [detector.detect_subject_category(g) for g in gs], goals, args.repeat):6.2f} us/goal")
+    print(f"batch     {per_goal_us(detector.detect_subject_categories, goals, args.repeat):6.2f} us/goal")
+
+    if args.min_accuracy is not None and current < args.min_accuracy:
+        sys.exit(f"accuracy {current:.1%} is below {args.min_accuracy:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# bench_transport.py
+"""Per-call latency of GeminiLLM with and without connection reuse.
+
+Starts a local HTTPS stand-in for the Gemini generateContent endpoint (self-signed
+certificate generated with the openssl CLI) and times sequential calls through a
+keep-alive pooled GeminiTransport versus one that opens a new connection per call.
+
+    python benchmarks/bench_transport.py --calls 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gemini_llm import GeminiLLM
+from gemini_transport import GeminiTransport
+
+CANNED_RESPONSE = json.dumps({
+    "candidates": [{"content": {"parts": [{"text": '{"goalTitle": "bench"}'}]}, "finishReason": "STOP"}]
+}).encode()
+
+
+class _GeminiStandIn(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(CANNED_RESPONSE)))
+        self.end_headers()
+        self.wfile.write(CANNED_RESPONSE)
+
+    def log_message(self, *args):
+        pass
+
+
+def _make_certificate(directory: str):
+    cert = os.path.join(directory, "cert.pem")
+    key = os.path.join(directory, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-keyout", key, "-out", cert, "-subj", "/CN=localhost",
+         "-addext", "subjectAltName=DNS:localhost,IP:127.0.0.1"],
+        check=True, capture_output=True,
+    )
+    return cert, key
+
+
+def start_server(cert: str, key: str) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _GeminiStandIn)
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def _time_calls(llm: GeminiLLM, calls: int):
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        await llm.ainvoke("benchmark prompt")
+        latencies.append((time.perf_counter() - start) * 1000)
+    await llm.transport.aclose()
+    return latencies
+
+
+def _report(name: str, latencies):
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(f"{name:<22} mean {statistics.mean(latencies):7.2f} ms   "
+          f"p50 {statistics.median(latencies):7.2f} ms   p99 {p99:7.2f} ms")
+    return statistics.mean(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cert, key = _make_certificate(tmp)
+        server = start_server(cert, key)
+        base_url = f"https://127.0.0.1:{server.server_address[1]}/v1beta"
+
+        results = {}
+        for name, keepalive in (("new connection/call", False), ("pooled keep-alive", True)):
+            transport = GeminiTransport(keepalive=keepalive, verify=cert)
+            llm = GeminiLLM(api_key="bench", base_url=base_url, transport=transport)
+            results[name] = _report(name, asyncio.run(_time_calls(llm, args.calls)))
+
+        server.shutdown()
+
+    saved = results["new connection/call"] - results["pooled keep-alive"]
+    print(f"saved per call: {saved:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# bench_workers.py
+"""Throughput scaling of run_server.py's prefork mode from 1 to N workers.
+
+For each --workers count, starts run_server.py with WEB_CONCURRENCY set to it, pointed
+at benchmarks/fake_gemini.py and using a plan cache in a fresh SQLite file. Then it runs
+two closed-loop workloads with bench_load's client:
+
+  distinct   every request a different goal, so each one generates a plan. The fake
+             answers after --latency with no per-item delay, so the service's own CPU
+             work is what limits throughput.
+  duplicate  one wave of --concurrency requests spread over --hot-goals goals. It counts
+             the Gemini calls made, once with the workers' shared generation leases and
+             once with them off (PLAN_LEASE_SECONDS=0), against the ideal of one call
+             per goal. A single worker takes no leases, so both runs match there.
+
+Memory is read from /proc (Linux only). It covers the supervisor and its workers after
+the distinct run. RSS counts pages shared copy-on-write once per process; PSS splits
+them between the processes sharing them.
+
+Throughput can only scale while there are idle cores. The fake Gemini and this driver
+share the machine with the workers, so compare runs made on the same machine only.
+
+    python benchmarks/bench_workers.py --workers 1,2,4 --concurrency 32 --requests 120
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from bench_load import BENCHMARKS, ROOT, SERVICE_ENV, _free_port, _wait_until_up, run_cell
+
+GOALS = ("Learn Python", "Learn React", "Master DSA", "Prepare for GATE", "Get fit", "Learn Hindi",
+         "Learn photography", "Learn cooking", "Learn pottery", "Learn Rust")
+
+
+def _service_pids(supervisor: int) -> List[int]:
+    try:
+        with open(f"/proc/{supervisor}/task/{supervisor}/children") as f:
+            return [supervisor] + [int(pid) for pid in f.read().split()]
+    except OSError:
+        return [supervisor]
+
+
+def memory_kib(supervisor: int) -> Optional[Dict[str, int]]:
+    """Summed Rss and Pss of the service processes, None where /proc is unavailable"""
+    totals = {"Rss": 0, "Pss": 0}
+    try:
+        for pid in _service_pids(supervisor):
+            with open(f"/proc/{pid}/smaps_rollup") as f:
+                for line in f:
+                    name, _, value = line.partition(":")
+                    if name in totals:
+                        totals[name] += int(value.split()[0])
+    except OSError:
+        return None
+    return totals
+
+
+def start_service(workers: int, fake_url: str, db_dir: str, lease_seconds: float, log) -> tuple:
+    port = _free_port()
+    env = dict(os.environ, **SERVICE_ENV)
+    env.update(GEMINI_BASE_URL=f"{fake_url}/v1beta", WEB_CONCURRENCY=str(workers), PORT=str(port),
+               PLAN_CACHE_TTL_SECONDS="86400", PLAN_LEASE_SECONDS=str(lease_seconds),
+               PLAN_CACHE_DB_PATH=os.path.join(db_dir, f"plan_cache-{workers}-{lease_seconds:g}.db"))
+    process = subprocess.Popen([sys.executable, "run_server.py"], cwd=ROOT, env=env, stdout=log,
+                               stderr=subprocess.STDOUT)
+    url = f"http://127.0.0.1:{port}"
+    _wait_until_up(f"{url}/", process)
+    return process, url
+
+
+def stop_service(process: subprocess.Popen) -> None:
+    process.terminate()
+    process.wait(timeout=30)
+
+
+async def measure(workers: int, fake_url: str, db_dir: str, args, log) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    result = {"workers": workers}
+    process, url = start_service(workers, fake_url, db_dir, 120, log)
+    try:
+        async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+            # Unique goals: a cache hit would measure the cache, not the workers
+            warmup = [f"{goal} warm-up {i}" for i, goal in enumerate(GOALS * 2)]
+            await run_cell(client, url, fake_url, warmup, args.duration, args.concurrency, len(warmup))
+            distinct = [f"{GOALS[i % len(GOALS)]} {i}" for i in range(args.requests)]
+            result["distinct"] = await run_cell(client, url, fake_url, distinct, args.duration, args.concurrency,
+                                                args.requests)
+            result["memory_kib"] = memory_kib(process.pid)
+            result["duplicate_leases"] = await run_cell(client, url, fake_url, list(GOALS[:args.hot_goals]),
+                                                        args.duration, args.concurrency, args.concurrency)
+    finally:
+        stop_service(process)
+
+    process, url = start_service(workers, fake_url, db_dir, 0, log)
+    try:
+        async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+            result["duplicate_no_leases"] = await run_cell(client, url, fake_url, list(GOALS[:args.hot_goals]),
+                                                           args.duration, args.concurrency, args.concurrency)
+    finally:
+        stop_service(process)
+    return result
+
+
+def print_report(results: List[Dict[str, Any]], hot_goals: int) -> None:
+    base = results[0]["distinct"]["throughput_rps"]
+    print(f"{'workers':>7} {'req/s':>7} {'scaling':>7} {'p50 ms':>7} {'p99 ms':>7} {'RSS MiB':>8} {'PSS MiB':>8} "
+          f"{'dup calls (leases)':>18} {'(no leases)':>11}")
+    for result in results:
+        cell = result["distinct"]
+        memory = result["memory_kib"] or {"Rss": float("nan"), "Pss": float("nan")}
+        leased, unleased = (round(result[name]["gemini_calls_per_plan"] * result[name]["ok"])
+                            for name in ("duplicate_leases", "duplicate_no_leases"))
+        print(f"{result['workers']:>7} {cell['throughput_rps']:>7.2f} {cell['throughput_rps'] / base:>6.2f}x "
+              f"{cell['latency_ms']['p50']:>7.0f} {cell['latency_ms']['p99']:>7.0f} {memory['Rss'] / 1024:>8.0f} "
+              f"{memory['Pss'] / 1024:>8.0f} {leased:>12} of {hot_goals:<3} {unleased:>11}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default=f"1,2,{max(2, os.cpu_count() or 1)}",
+                        type=lambda s: list(dict.fromkeys(int(w) for w in s.split(","))))
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=120, help="requests in the distinct-goal run")
+    parser.add_argument("--duration", default="14 days")
+    parser.add_argument("--hot-goals", type=int, default=4, help="goals shared by the duplicate wave")
+    parser.add_argument("--latency", default="fixed:0.2", help="fake Gemini latency spec")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--service-log", help="file for the services' log output (default: discarded)")
+    args = parser.parse_args()
+
+    fake_port = _free_port()
+    fake = subprocess.Popen([sys.executable, os.path.join(BENCHMARKS, "fake_gemini.py"), "--port", str(fake_port),
+                             "--latency", args.latency, "--per-item-ms", "0", "--mix", "valid=1"],
+                            stdout=subprocess.DEVNULL)
+    fake_url = f"http://127.0.0.1:{fake_port}"
+    log = open(args.service_log, "w") if args.service_log else subprocess.DEVNULL
+    results = []
+    try:
+        _wait_until_up(f"{fake_url}/stats", fake)
+        with tempfile.TemporaryDirectory() as db_dir:
+            for workers in args.workers:
+                results.append(asyncio.run(measure(workers, fake_url, db_dir, args, log)))
+                print(f"  {workers} workers: {results[-1]['distinct']['throughput_rps']:.2f} req/s", flush=True)
+    finally:
+        fake.terminate()
+        fake.wait(timeout=10)
+    print(f"\n{os.cpu_count()} CPUs, {args.concurrency} clients, {args.duration} plans, fake latency {args.latency}")
+    print_report(results, args.hot_goals)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+# fake_gemini.py
+"""Local stand-in for Gemini's generateContent API, for load tests.
+
+Recognizes the service's full-plan, outline, chunk and repair prompts and answers with
+plan items of the requested counts and labels (distinct tasks, one resource each).
+Each call waits for a latency drawn from --latency plus --per-item-ms for every item
+written, then answers with an outcome drawn from --mix:
+
+  valid      complete answer, fenced like Gemini's text output (bare JSON in structured mode)
+  short      valid JSON missing a fifth of the daily items
+  truncated  cut off part way through, as when maxOutputTokens is reached
+  malformed  not parseable as JSON
+  error      HTTP 503
+
+Latency specs: fixed:S, uniform:LOW,HIGH, lognormal:MEDIAN,SIGMA, exponential:MEAN (seconds).
+streamGenerateContent?alt=sse is answered with the same text split into events.
+GET /stats returns call counts per prompt kind and outcome; POST /stats/reset clears them.
+
+    python benchmarks/fake_gemini.py --port 8090 --latency lognormal:0.8,0.4 --mix valid=0.9,truncated=0.05,malformed=0.05
+    GEMINI_BASE_URL=http://127.0.0.1:8090/v1beta python run_server.py
+"""
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Tuple
+
+OUTCOMES = ("valid", "short", "truncated", "malformed", "error")
+
+_FULL = re.compile(r'Create EXACTLY (\d+) daily tasks, (\d+) weekly tasks, and (\d+) monthly tasks')
+_OUTLINE = re.compile(r'Create EXACTLY (\d+) monthly tasks and EXACTLY (\d+) phases')
+_CHUNK_DAYS = re.compile(r'daily tasks labelled "Day (\d+)" to "Day (\d+)"')
+_CHUNK_WEEKS = re.compile(r'weekly tasks labelled "Week (\d+)" to "Week (\d+)"')
+_REPAIR_LINE = re.compile(r'^- (monthlyTasks|weeklyTasks|dailyTasks): (.+)$', re.MULTILINE)
+
+_WORDS = ("array", "parser", "sketch", "module", "recursion", "schedule", "lesson", "drill", "journal", "budget",
+          "prototype", "review", "outline", "summary", "quiz", "interview", "dataset", "chart", "essay", "recipe",
+          "chord", "stretch", "sprint", "interval", "vocabulary", "dialogue", "proof", "theorem", "circuit", "sensor",
+          "component", "router", "query", "index", "cache", "pipeline", "layout", "palette", "portfolio", "pitch",
+          "mock", "timed", "annotated", "weekly", "focused", "guided", "graded", "paired", "solo", "recorded")
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    kind, _, params = spec.partition(":")
+    values = [float(value) for value in params.split(",")] if params else []
+    shapes = {
+        "fixed": (1, lambda rng: values[0]),
+        "uniform": (2, lambda rng: rng.uniform(values[0], values[1])),
+        "lognormal": (2, lambda rng: rng.lognormvariate(math.log(values[0]), values[1])),
+        "exponential": (1, lambda rng: rng.expovariate(1 / values[0])),
+    }
+    if kind not in shapes or len(values) != shapes[kind][0]:
+        raise ValueError(f"Bad latency spec {spec!r}, expected fixed:S, uniform:LOW,HIGH, "
+                         "lognormal:MEDIAN,SIGMA or exponential:MEAN")
+    return shapes[kind][1]
+
+
+def parse_mix(spec: str) -> Tuple[Tuple[str, ...], Tuple[float, ...]]:
+    weights = {}
+    for part in spec.split(","):
+        outcome, _, weight = part.partition("=")
+        if outcome.strip() not in OUTCOMES:
+            raise ValueError(f"Unknown outcome {outcome!r}, expected one of {OUTCOMES}")
+        weights[outcome.strip()] = float(weight or 1)
+    return tuple(weights), tuple(weights.values())
+
+
+def _item(label: str, rng: random.Random, tasks: int = 1) -> Dict[str, Any]:
+    slug = label.lower().replace(" ", "-")
+    return {
+        "label": label,
+        "tasks": [f"{label}: " + " ".join(rng.sample(_WORDS, 8)) for _ in range(tasks)],
+        "resources": [{"title": f"Guide for {label}", "type": "article", "url": f"https://example.com/{slug}",
+                       "description": "Reference for this step"}],
+        "status": False,
+    }
+
+
+def _items(prefix: str, first: int, last: int, rng: random.Random, tasks: int = 1) -> List[Dict[str, Any]]:
+    return [_item(f"{prefix} {number}", rng, tasks) for number in range(first, last + 1)]
+
+
+def answer_for(prompt: str, rng: random.Random) -> Tuple[str, Dict[str, Any]]:
+    """(prompt kind, the JSON document Gemini would be asked for)"""
+    match = _FULL.search(prompt)
+    if match:
+        days, weeks, months = map(int, match.groups())
+        return "plan", {"goalTitle": "Load test", "totalDays": days,
+                        "monthlyTasks": _items("Month", 1, months, rng, 3),
+                        "weeklyTasks": _items("Week", 1, weeks, rng, 2),
+                        "dailyTasks": _items("Day", 1, days, rng)}
+    match = _OUTLINE.search(prompt)
+    if match:
+        months, phases = map(int, match.groups())
+        return "outline", {"monthlyTasks": _items("Month", 1, months, rng, 3),
+                           "phases": [{"label": f"Phase {i + 1}", "focus": " ".join(rng.sample(_WORDS, 5))}
+                                      for i in range(phases)]}
+    match = _CHUNK_DAYS.search(prompt)
+    if match:
+        weeks = _CHUNK_WEEKS.search(prompt)
+        return "chunk", {"weeklyTasks": _items("Week", int(weeks.group(1)), int(weeks.group(2)), rng, 2) if weeks else [],
+                         "dailyTasks": _items("Day", int(match.group(1)), int(match.group(2)), rng)}
+    if "ENTRIES TO WRITE" in prompt:
+        wanted = prompt.split("ENTRIES TO WRITE", 1)[1].split("EXISTING NEIGHBOURING ENTRIES", 1)[0]
+        return "repair", {section: [_item(label.strip(), rng) for label in labels.split(",")]
+                          for section, labels in _REPAIR_LINE.findall(wanted)}
+    return "other", {}
+
+
+def render(document: Dict[str, Any], outcome: str, structured: bool, rng: random.Random) -> str:
+    if outcome == "short" and document.get("dailyTasks"):
+        daily = document["dailyTasks"]
+        for index in sorted(rng.sample(range(len(daily)), max(1, len(daily) // 5)), reverse=True):
+            del daily[index]
+    text = json.dumps(document, indent=2)
+    if outcome == "truncated":
+        text = text[:int(len(text) * rng.uniform(0.5, 0.95))]
+    elif outcome == "malformed":
+        text = text.replace('": ', '" ')
+    return text if structured else f"```json\n{text}\n```"
+
+
+class FakeGemini:
+    """Shared state of the stand-in: latency and outcome distributions plus call counters"""
+
+    def __init__(self, latency: str = "fixed:0.5", per_item_ms: float = 0.0, mix: str = "valid=1", seed: int = 1):
+        self.latency = parse_latency(latency)
+        self.per_item = per_item_ms / 1000
+        self.outcomes, self.weights = parse_mix(mix)
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls: Dict[str, Dict[str, int]] = {}
+
+    def respond(self, body: Dict[str, Any]) -> Tuple[int, str, float]:
+        """(HTTP status, answer text, seconds to wait before answering)"""
+        prompt = body["contents"][0]["parts"][0]["text"]
+        structured = body.get("generationConfig", {}).get("responseMimeType") == "application/json"
+        with self.lock:
+            kind, document = answer_for(prompt, self.rng)
+            outcome = self.rng.choices(self.outcomes, self.weights)[0]
+            items = sum(len(value) for value in document.values() if isinstance(value, list))
+            delay = self.latency(self.rng) + items * self.per_item
+            counts = self.calls.setdefault(kind, {})
+            counts[outcome] = counts.get(outcome, 0) + 1
+            if outcome == "error":
+                return 503, "", delay
+            return 200, render(document, outcome, structured, self.rng), delay
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            calls = {kind: dict(counts) for kind, counts in self.calls.items()}
+        return {"calls": calls, "total": sum(sum(counts.values()) for counts in calls.values())}
+
+    def reset(self) -> None:
+        with self.lock:
+            self.calls.clear()
+
+
+def _envelope(text: str, finish_reason: str = "STOP") -> Dict[str, Any]:
+    return {"candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "finishReason": finish_reason}]}
+
+
+def make_handler(fake: FakeGemini):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/stats":
+                self._send_json(200, fake.stats())
+            else:
+                self._send_json(404, {"error": {"code": 404, "message": "Not found"}})
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if self.path == "/stats/reset":
+                fake.reset()
+                self._send_json(200, fake.stats())
+                return
+            path = self.path.split("?", 1)[0]
+            if not path.endswith((":generateContent", ":streamGenerateContent")):
+                self._send_json(404, {"error": {"code": 404, "message": "Not found"}})
+                return
+            status, text, delay = fake.respond(json.loads(body))
+            time.sleep(delay)
+            if status != 200:
+                self._send_json(status, {"error": {"code": status, "message": "The model is overloaded",
+                                                   "status": "UNAVAILABLE"}})
+            elif path.endswith(":streamGenerateContent"):
+                self._send_stream(text)
+            else:
+                self._send_json(200, _envelope(text))
+
+        def _send_stream(self, text: str) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            step = max(1, len(text) // 16)
+            for start in range(0, len(text), step):
+                self.wfile.write(f"data: {json.dumps(_envelope(text[start:start + step]))}\r\n\r\n".encode())
+                self.wfile.flush()
+            self.close_connection = True
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", default="lognormal:0.8,0.4", help="base latency per call")
+    parser.add_argument("--per-item-ms", type=float, default=2.0, help="extra latency per plan item written")
+    parser.add_argument("--mix", default="valid=0.9,short=0.04,truncated=0.03,malformed=0.02,error=0.01")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    fake = FakeGemini(args.latency, args.per_item_ms, args.mix, args.seed)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(fake))
+    server.daemon_threads = True
+    print(f"Fake Gemini listening on http://{args.host}:{args.port}/v1beta", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
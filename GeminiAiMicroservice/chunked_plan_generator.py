@@ -0,0 +1,134 @@
+# chunked_plan_generator.py
+import asyncio
+import json
+import logging
+from typing import Dict, Any, List, Tuple
+from templates import get_plan_outline_prompt, get_plan_chunk_prompt
+from plan_repair import PlanRepairer
+from gemini_errors import GeminiError
+from resilience import RetryPolicy
+from LearningPlanComponents.utils import ResponseCleaner
+from LearningPlanComponents.fallback_plan_generator import FallbackPlanGenerator
+
+logger = logging.getLogger(__name__)
+
+
+class ChunkedPlanGenerator:
+    """Generates long plans as one outline call followed by concurrent day-range slices.
+
+    A single response cannot hold months of daily tasks within maxOutputTokens, so the
+    plan is split into phases of `chunk_days` days. Slices are stitched back together
+    and handed to the PlanRepairer, which trims them to the exact expected counts and
+    fills any gaps, so the result always has the right shape.
+    """
+
+    def __init__(self, llm, response_cleaner: ResponseCleaner, fallback_generator: FallbackPlanGenerator,
+                 repairer: PlanRepairer, retry_policy: RetryPolicy = None,
+                 chunk_days: int = 30, max_concurrency: int = 12):
+        self.llm = llm
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.response_cleaner = response_cleaner
+        self.fallback_generator = fallback_generator
+        self.repairer = repairer
+        self.chunk_days = chunk_days
+        self.max_concurrency = max_concurrency
+    
+    @staticmethod
+    def split_phases(total_days: int, chunk_days: int) -> List[Tuple[int, int]]:
+        """Split [0, total_days) into half-open day ranges of at most chunk_days"""
+        return [(start, min(start + chunk_days, total_days)) for start in range(0, total_days, chunk_days)]
+    
+    @staticmethod
+    def weeks_for_phase(start: int, end: int, total_days: int, total_weeks: int) -> Tuple[int, int]:
+        """Half-open week index range owned by a day range, spreading weeks proportionally over days"""
+        return (start * total_weeks // total_days, end * total_weeks // total_days)
+    
+    async def agenerate(self, goal: str, duration: str, totals: Dict[str, int], subject_category: str,
+                        user_context: Dict[str, Any]) -> Tuple[Dict[str, Any], int]:
+        """Return the stitched plan and how many items had to be filled from the fallback plan"""
+        total_days, total_weeks = totals["total_days"], totals["total_weeks"]
+        phases = self.split_phases(total_days, self.chunk_days)
+        
+        # The fallback plan costs milliseconds and supplies themes for phases the outline missed
+        skeleton = self.fallback_generator.create_intelligent_fallback_plan(goal, duration, user_context)
+        
+        outline = await self._agenerate_outline(goal, duration, totals, subject_category, user_context, phases)
+        focuses = self._phase_focuses(outline, skeleton, phases)
+        
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        async def run_phase(index: int, start: int, end: int) -> Dict[str, Any]:
+            week_start, week_end = self.weeks_for_phase(start, end, total_days, total_weeks)
+            async with semaphore:
+                return await self._agenerate_chunk(
+                    goal, subject_category, user_context,
+                    focuses[index],
+                    focuses[index - 1] if index > 0 else "",
+                    focuses[index + 1] if index + 1 < len(focuses) else "",
+                    start, end, week_start, week_end
+                )
+        
+        chunks = await asyncio.gather(*[run_phase(i, start, end) for i, (start, end) in enumerate(phases)])
+        
+        slots = {"monthlyTasks": self.repairer.place_items(outline.get("monthlyTasks", []), 0, totals["total_months"]),
+                 "weeklyTasks": [], "dailyTasks": []}
+        for (start, end), chunk in zip(phases, chunks):
+            week_start, week_end = self.weeks_for_phase(start, end, total_days, total_weeks)
+            slots["dailyTasks"].extend(self.repairer.place_items(chunk.get("dailyTasks", []), start, end - start))
+            slots["weeklyTasks"].extend(self.repairer.place_items(chunk.get("weeklyTasks", []), week_start, week_end - week_start))
+        
+        missing = self.repairer.count_missing(slots)
+        plan, filled = await self.repairer.afill_slots(slots, goal, duration, totals, subject_category, user_context)
+        logger.info("Chunked plan stitched from %d phases: %d items needed repair, %d filled from fallback",
+                    len(phases), missing, filled)
+        return plan, filled
+    
+    def _phase_focuses(self, outline: Dict[str, Any], skeleton: Dict[str, Any],
+                       phases: List[Tuple[int, int]]) -> List[str]:
+        focuses = []
+        outline_phases = outline.get("phases", [])
+        for i, (start, end) in enumerate(phases):
+            focus = ""
+            if i < len(outline_phases) and isinstance(outline_phases[i], dict):
+                focus = str(outline_phases[i].get("focus", "")).strip()
+            if not focus:
+                # Borrow the theme of the fallback day that opens this phase
+                focus = "; ".join(skeleton["dailyTasks"][start]["tasks"])
+            focuses.append(focus)
+        return focuses
+    
+    async def _agenerate_outline(self, goal: str, duration: str, totals: Dict[str, int], subject_category: str,
+                                 user_context: Dict[str, Any], phases: List[Tuple[int, int]]) -> Dict[str, Any]:
+        prompt = get_plan_outline_prompt(
+            goal, duration, totals["total_days"], totals["total_weeks"], totals["total_months"],
+            subject_category, user_context, phases
+        )
+        return await self._acall_json(prompt, "outline")
+    
+    async def _agenerate_chunk(self, goal: str, subject_category: str, user_context: Dict[str, Any],
+                               focus: str, previous_focus: str, next_focus: str,
+                               start: int, end: int, week_start: int, week_end: int) -> Dict[str, Any]:
+        prompt = get_plan_chunk_prompt(
+            goal, subject_category, user_context, focus, previous_focus, next_focus,
+            start + 1, end, week_start + 1, week_end
+        )
+        return await self._acall_json(prompt, f"days {start + 1}-{end}")
+    
+    async def _acall_json(self, prompt: str, description: str, max_attempts: int = 2) -> Dict[str, Any]:
+        for attempt in range(max_attempts):
+            try:
+                raw_response = await self.llm.ainvoke(prompt)
+                result = json.loads(self.response_cleaner.clean_json_response(raw_response))
+                if isinstance(result, dict):
+                    return result
+            except json.JSONDecodeError as e:
+                logger.warning("JSON parsing failed for %s on attempt %d: %s", description, attempt + 1, e)
+            except GeminiError as e:
+                logger.warning("LLM error for %s on attempt %d: %s", description, attempt + 1, e)
+                delay = self.retry_policy.delay_for(attempt, e) if attempt + 1 < max_attempts else None
+                if delay is None:
+                    break
+                await asyncio.sleep(delay)
+            except Exception as e:
+                logger.warning("Error for %s on attempt %d: %s", description, attempt + 1, e)
+        return {}
@@ -0,0 +1,64 @@
+# gemini_errors.py
+from typing import Optional
+
+
+class GeminiError(Exception):
+    """Base class for failed Gemini calls.
+
+    `retryable` says whether the same request may succeed if sent again;
+    `trips_breaker` says whether the failure indicates the service is degraded.
+    """
+    retryable = False
+    trips_breaker = True
+
+
+class GeminiTimeoutError(GeminiError):
+    retryable = True
+
+
+class GeminiServerError(GeminiError):
+    """5xx responses and connection failures"""
+    retryable = True
+
+
+class GeminiRateLimitError(GeminiError):
+    """429: request-rate or token quota exhausted"""
+    retryable = True
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class GeminiBadRequestError(GeminiError):
+    """4xx other than 429: the request itself is wrong and will fail again"""
+    trips_breaker = False
+
+
+class GeminiSafetyBlockError(GeminiError):
+    """The prompt or the answer was blocked by safety filters"""
+    trips_breaker = False
+
+
+class GeminiResponseError(GeminiError):
+    """A 200 response without usable text"""
+    retryable = True
+    trips_breaker = False
+
+
+class CircuitOpenError(GeminiError):
+    """Raised without calling Gemini while the circuit breaker is open"""
+    trips_breaker = False
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionRejectedError(GeminiError):
+    """The call would exceed the request/token budget and the wait queue is full or too slow"""
+    trips_breaker = False
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
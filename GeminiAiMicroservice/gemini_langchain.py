@@ -0,0 +1,34 @@
+# gemini_langchain.py
+"""LangChain adapter for GeminiLLM, for chains and tools built on langchain_core.
+
+Optional: install requirements-langchain.txt. The service never imports this module;
+GeminiLLM.as_langchain() does on first use.
+"""
+from typing import Any, AsyncIterator, List, Optional
+
+from langchain_core.language_models.llms import LLM
+from langchain_core.outputs import GenerationChunk
+
+
+class GeminiLangChainLLM(LLM):
+    """Delegates to a GeminiLLM, so calls share its transport and raise its typed errors"""
+
+    client: Any
+
+    @property
+    def _llm_type(self) -> str:
+        return "gemini"
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> str:
+        return self.client.invoke(prompt, **kwargs)
+
+    async def _acall(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> str:
+        return await self.client.ainvoke(prompt, **kwargs)
+
+    async def _astream(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None,
+                       **kwargs) -> AsyncIterator[GenerationChunk]:
+        async for text in self.client.astream(prompt, **kwargs):
+            chunk = GenerationChunk(text=text)
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
@@ -1,29 +1,98 @@
-from typing import Optional, List
-from langchain.llms.base import LLM
-import requests
+import json
+import os
+import re
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional, Dict, Any, AsyncIterator
+import httpx
+from gemini_transport import GeminiTransport
+from gemini_errors import (
+    GeminiError, GeminiTimeoutError, GeminiServerError, GeminiRateLimitError,
+    GeminiBadRequestError, GeminiSafetyBlockError, GeminiResponseError,
+)
 
-class GeminiLLM(LLM):
-    api_key: str
-    model: str = "gemini-2.0-flash-exp"
-    temperature: float = 0.8
-    max_tokens: int = 8000
+
+def _parse_retry_after(response: httpx.Response) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta or HTTP date) or a google.rpc.RetryInfo detail"""
+    header = response.headers.get("retry-after")
+    if header:
+        try:
+            return max(0.0, float(header))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(header).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    try:
+        details = response.json().get("error", {}).get("details", [])
+    except Exception:
+        return None
+    for detail in details:
+        match = re.fullmatch(r'([\d.]+)s', str(detail.get("retryDelay", "")))
+        if match:
+            return float(match.group(1))
+    return None
+
+
+def _error_for_response(response: httpx.Response) -> GeminiError:
+    status = response.status_code
+    message = f"Gemini API returned HTTP {status}: {response.text[:300]}"
+    if status == 429:
+        return GeminiRateLimitError(message, retry_after=_parse_retry_after(response))
+    if status == 408:
+        return GeminiTimeoutError(message)
+    if status >= 500:
+        return GeminiServerError(message)
+    return GeminiBadRequestError(message)
+
+
+def _error_for_exception(error: Exception) -> GeminiError:
+    if isinstance(error, GeminiError):
+        return error
+    if isinstance(error, httpx.TimeoutException):
+        return GeminiTimeoutError("Request to Gemini API timed out")
+    if isinstance(error, httpx.TransportError):
+        return GeminiServerError(f"Could not reach Gemini API: {error}")
+    return GeminiResponseError(f"Error processing response: {error}")
+
+
+DEFAULT_BASE_URL = "https://generativelanguage.googleapis.com/v1beta"
+
+
+class GeminiLLM:
+    """Gemini generateContent client: blocking call, awaitable ainvoke and streamed astream.
+
+    Calls go through the pooled clients of a shared GeminiTransport and failures are
+    raised as typed GeminiErrors. as_langchain() wraps it as a LangChain LLM for callers
+    that need one; langchain is only imported then.
+    """
+
+    def __init__(self, api_key: str, model: str = "gemini-2.0-flash-exp", temperature: float = 0.8,
+                 max_tokens: int = 8000, base_url: Optional[str] = None, transport: GeminiTransport = None):
+        self.api_key = api_key
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        # GEMINI_BASE_URL points the service at another endpoint, e.g. benchmarks/fake_gemini.py
+        self.base_url = base_url or os.getenv("GEMINI_BASE_URL", DEFAULT_BASE_URL)
+        self.transport = transport or GeminiTransport()
 
     @property
-    def _llm_type(self) -> str:
-        return "gemini"
-
-    def _call(
-        self,
-        prompt: str,
-        stop: Optional[List[str]] = None,
-        run_manager=None,
-        **kwargs,
-    ) -> str:
-        url = f'https://generativelanguage.googleapis.com/v1beta/models/{self.model}:generateContent'
-        headers = {'Content-Type': 'application/json'}
-        params = {'key': self.api_key}
+    def _url(self) -> str:
+        return f'{self.base_url}/models/{self.model}:generateContent'
+
+    @property
+    def _stream_url(self) -> str:
+        return f'{self.base_url}/models/{self.model}:streamGenerateContent'
+
+    def as_langchain(self):
+        """This client as a langchain_core LLM (needs requirements-langchain.txt)"""
+        from gemini_langchain import GeminiLangChainLLM
+        return GeminiLangChainLLM(client=self)
 
-        request_body = {
+    def _build_request_body(self, prompt: str, response_schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Request payload; a response_schema switches Gemini to constrained JSON output"""
+        body = {
             "contents": [{"parts": [{"text": prompt}]}],
             "generationConfig": {
                 "temperature": self.temperature,
@@ -40,28 +109,84 @@ class GeminiLLM(LLM):
                 {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
             ]
         }
+        if response_schema is not None:
+            body["generationConfig"]["responseMimeType"] = "application/json"
+            body["generationConfig"]["responseSchema"] = response_schema
+        return body
 
-        try:
-            response = requests.post(url, headers=headers, params=params, json=request_body, timeout=60)
-            response.raise_for_status()
-            result = response.json()
+    @staticmethod
+    def _extract_text(result: Dict[str, Any]) -> str:
+        block_reason = result.get('promptFeedback', {}).get('blockReason')
+        if block_reason:
+            raise GeminiSafetyBlockError(f"Prompt was blocked: {block_reason}")
+
+        if 'candidates' in result and result['candidates']:
+            candidate = result['candidates'][0]
+
+            if candidate.get('finishReason') == 'SAFETY':
+                raise GeminiSafetyBlockError("Content was blocked by safety filters")
 
-            if 'candidates' in result and result['candidates']:
-                candidate = result['candidates'][0]
+            content = candidate.get('content', {})
+            parts = content.get('parts', [])
+            if parts and 'text' in parts[0]:
+                return parts[0]['text'].strip()
 
-                if candidate.get('finishReason') == 'SAFETY':
-                    return "Error: Content was blocked by safety filters"
+        raise GeminiResponseError("Could not extract response from Gemini API")
 
-                content = candidate.get('content', {})
-                parts = content.get('parts', [])
-                if parts and 'text' in parts[0]:
-                    return parts[0]['text'].strip()
+    def __call__(self, prompt: str, **kwargs) -> str:
+        return self.invoke(prompt, **kwargs)
 
-            return "Error: Could not extract response from Gemini API"
+    def invoke(self, prompt: str, **kwargs) -> str:
+        headers = {'Content-Type': 'application/json'}
+        params = {'key': self.api_key}
 
-        except requests.exceptions.Timeout:
-            return "Error: Request to Gemini API timed out"
-        except requests.exceptions.RequestException as e:
-            return f"Error calling Gemini API: {str(e)}"
+        try:
+            response = self.transport.client.post(self._url, headers=headers, params=params,
+                                                  json=self._build_request_body(prompt, kwargs.get("response_schema")))
+            if response.is_error:
+                raise _error_for_response(response)
+            return self._extract_text(response.json())
+        except Exception as e:
+            raise _error_for_exception(e) from e
+
+    async def ainvoke(self, prompt: str, **kwargs) -> str:
+        """Non-blocking counterpart of invoke, used by the async generation path"""
+        headers = {'Content-Type': 'application/json'}
+        params = {'key': self.api_key}
+
+        try:
+            response = await self.transport.async_client.post(self._url, headers=headers, params=params,
+                                                              json=self._build_request_body(prompt, kwargs.get("response_schema")))
+            if response.is_error:
+                raise _error_for_response(response)
+            return self._extract_text(response.json())
+        except Exception as e:
+            raise _error_for_exception(e) from e
+
+    async def astream(self, prompt: str, **kwargs) -> AsyncIterator[str]:
+        """Yield text as Gemini produces it via streamGenerateContent (server-sent events)"""
+        headers = {'Content-Type': 'application/json'}
+        params = {'key': self.api_key, 'alt': 'sse'}
+
+        try:
+            async with self.transport.async_client.stream(
+                "POST", self._stream_url, headers=headers, params=params,
+                json=self._build_request_body(prompt, kwargs.get("response_schema"))
+            ) as response:
+                if response.is_error:
+                    await response.aread()
+                    raise _error_for_response(response)
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    event = json.loads(line[5:])
+                    if event.get('promptFeedback', {}).get('blockReason'):
+                        raise GeminiSafetyBlockError(f"Prompt was blocked: {event['promptFeedback']['blockReason']}")
+                    for candidate in event.get('candidates', [])[:1]:
+                        if candidate.get('finishReason') == 'SAFETY':
+                            raise GeminiSafetyBlockError("Content was blocked by safety filters")
+                        for part in candidate.get('content', {}).get('parts', []):
+                            if part.get('text'):
+                                yield part['text']
         except Exception as e:
-            return f"Error processing response: {str(e)}"
+            raise _error_for_exception(e) from e
@@ -0,0 +1,51 @@
+# gemini_schema.py
+from typing import Any, Dict, Iterable, Type
+from pydantic import BaseModel
+
+# JSON Schema keywords Gemini's responseSchema (an OpenAPI 3 subset) understands
+_SUPPORTED_KEYS = {"type", "format", "description", "nullable", "enum", "items", "properties", "required"}
+
+
+def to_gemini_schema(model: Type[BaseModel], exclude: Iterable[str] = ()) -> Dict[str, Any]:
+    """Convert a pydantic model into a Gemini responseSchema.
+
+    $refs are inlined, unsupported keywords (title, default, ...) dropped, Optional[...]
+    becomes nullable, and propertyOrdering follows field order so the answer streams in
+    the same order as the model. Top-level fields in `exclude` are left out.
+    """
+    schema = model.model_json_schema()
+    definitions = schema.get("$defs", {})
+    converted = _convert(schema, definitions)
+    for name in exclude:
+        converted["properties"].pop(name, None)
+        converted["propertyOrdering"].remove(name)
+        if name in converted.get("required", []):
+            converted["required"].remove(name)
+    return converted
+
+
+def _convert(node: Dict[str, Any], definitions: Dict[str, Any]) -> Dict[str, Any]:
+    if "$ref" in node:
+        return _convert(definitions[node["$ref"].rsplit("/", 1)[-1]], definitions)
+    
+    if "anyOf" in node:
+        options = [option for option in node["anyOf"] if option.get("type") != "null"]
+        converted = _convert(options[0], definitions)
+        if len(options) < len(node["anyOf"]):
+            converted["nullable"] = True
+        return converted
+    
+    converted = {}
+    for key, value in node.items():
+        if key not in _SUPPORTED_KEYS:
+            continue
+        if key == "type":
+            converted["type"] = value.upper()
+        elif key == "items":
+            converted["items"] = _convert(value, definitions)
+        elif key == "properties":
+            converted["properties"] = {name: _convert(prop, definitions) for name, prop in value.items()}
+            converted["propertyOrdering"] = list(value)
+        else:
+            converted[key] = value
+    return converted
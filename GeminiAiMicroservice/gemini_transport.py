@@ -0,0 +1,100 @@
+# gemini_transport.py
+import os
+import asyncio
+import logging
+from typing import Optional, Union
+import httpx
+
+logger = logging.getLogger(__name__)
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).strip().lower() in ("1", "true", "yes", "on")
+
+
+class GeminiTransport:
+    """Long-lived, pooled HTTP clients shared by every Gemini call.
+
+    Reusing connections avoids a TCP + TLS handshake to the Gemini endpoint on
+    every attempt and retry. Settings default to environment variables so the
+    service can be tuned without code changes.
+    """
+
+    def __init__(
+        self,
+        pool_size: Optional[int] = None,
+        keepalive: Optional[bool] = None,
+        keepalive_expiry: Optional[float] = None,
+        http2: Optional[bool] = None,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+        verify: Union[bool, str] = True,
+    ):
+        self.pool_size = pool_size if pool_size is not None else int(os.getenv("GEMINI_POOL_SIZE", 100))
+        self.keepalive = keepalive if keepalive is not None else _env_flag("GEMINI_KEEPALIVE", "true")
+        self.keepalive_expiry = keepalive_expiry if keepalive_expiry is not None else float(os.getenv("GEMINI_KEEPALIVE_EXPIRY", 60))
+        self.http2 = http2 if http2 is not None else _env_flag("GEMINI_HTTP2", "false")
+        self.connect_timeout = connect_timeout if connect_timeout is not None else float(os.getenv("GEMINI_CONNECT_TIMEOUT", 5))
+        self.read_timeout = read_timeout if read_timeout is not None else float(os.getenv("GEMINI_READ_TIMEOUT", 60))
+        self.verify = verify
+
+        if self.http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("GEMINI_HTTP2 requested but the 'h2' package is not installed, using HTTP/1.1")
+                self.http2 = False
+
+        self._client: Optional[httpx.Client] = None
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._async_loop = None
+
+    def _client_kwargs(self) -> dict:
+        return {
+            "limits": httpx.Limits(
+                max_connections=self.pool_size,
+                max_keepalive_connections=self.pool_size if self.keepalive else 0,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+            "timeout": httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+            "http2": self.http2,
+            "verify": self.verify,
+        }
+
+    @property
+    def client(self) -> httpx.Client:
+        if self._client is None:
+            self._client = httpx.Client(**self._client_kwargs())
+        return self._client
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        # Async connections are bound to the loop that opened them; scripts that go
+        # through asyncio.run() get a fresh loop per call, so rebuild when it changes.
+        # Such callers must aclose_async_client() before their loop ends, as the old
+        # client's sockets can no longer be closed from the next loop.
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            self._async_client = httpx.AsyncClient(**self._client_kwargs())
+            self._async_loop = loop
+        return self._async_client
+
+    def close(self) -> None:
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    async def aclose_async_client(self) -> None:
+        """Close the async client of the running loop; the next call opens a new one.
+
+        A client left by an earlier, now closed loop cannot be closed from this one and is
+        only dropped.
+        """
+        client, loop = self._async_client, self._async_loop
+        self._async_client = None
+        self._async_loop = None
+        if client is not None and loop is asyncio.get_running_loop():
+            await client.aclose()
+
+    async def aclose(self) -> None:
+        await self.aclose_async_client()
+        self.close()
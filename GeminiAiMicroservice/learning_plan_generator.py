@@ -1,92 +1,673 @@
 # learning_plan_generator.py
+import asyncio
 import json
-from typing import Dict, Any
+import logging
+import os
+import threading
+import time
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
 from gemini_llm import GeminiLLM
-from templates import get_enhanced_personalized_prompt
-from LearningPlanComponents.utils import DurationParser, ResponseCleaner, PlanValidator
-from LearningPlanComponents.subject_detector import SubjectDetector
+from gemini_transport import GeminiTransport
+from gemini_errors import GeminiError, AdmissionRejectedError
+from resilience import CircuitBreaker, ResilientLLM, RetryPolicy
+from admission import AdmissionController
+from gemini_schema import to_gemini_schema
+from pydantic import ValidationError
+from models import LearningPlanResponse, GeneratedPlan, TaskItem
+from plan_cache import PlanCache, compute_content_version, make_plan_key
+from single_flight import SharedFlight, SingleFlight
+from chunked_plan_generator import ChunkedPlanGenerator
+from observability import observe_plan, span
+from plan_repair import PlanRepairer
+from templates import get_enhanced_personalized_prompt, get_compact_personalized_prompt
+from LearningPlanComponents.utils import (DurationParser, ResponseCleaner, PlanValidator, SECTION_TOTALS, SECTION_LABELS,
+                                          estimate_tokens)
+from LearningPlanComponents.curricula import get_curriculum_registry
+from LearningPlanComponents.duplicate_detector import NearDuplicateDetector
+from LearningPlanComponents.subject_detector import CATEGORY_KEYWORDS, SubjectDetector
 from LearningPlanComponents.task_generator import TaskGenerator
 from LearningPlanComponents.fallback_plan_generator import FallbackPlanGenerator
+from LearningPlanComponents.stream_parser import IncrementalPlanParser, salvage_plan_items
+
+logger = logging.getLogger(__name__)
+
+# Response-only fields that never come from Gemini and are set after generation
+_UNGENERATED_FIELDS = {"source", "planId"}
+
+# Prompt builders for the single-call plan path, selected with PROMPT_MODE
+PLAN_PROMPT_BUILDERS = {
+    "full": get_enhanced_personalized_prompt,
+    "compact": get_compact_personalized_prompt,
+}
+
+
+def preload_shared_state() -> None:
+    """Build the read-only state every generator shares: the curricula registry, the compiled
+    subject matcher and prompt templates for the default learner profiles.
+
+    run_server calls this before forking workers, so they share these pages copy-on-write.
+    """
+    curricula = get_curriculum_registry()
+    # The registry loads categories on first access; touch each so none is loaded per worker
+    for category in curricula:
+        curricula[category]
+    SubjectDetector(curricula).detect_subject_category("")
+    categories = dict.fromkeys(curricula.categories() + tuple(CATEGORY_KEYWORDS) + ("general",))
+    for subject_category in categories:
+        for skill_level in ("beginner", "intermediate", "advanced"):
+            for learning_style in ("practical", "project-based", "theoretical"):
+                user_context = {"skill_level": skill_level, "learning_style": learning_style,
+                                "daily_time": "1-2 hours", "specific_interests": [], "practical_goals": []}
+                for build_prompt in PLAN_PROMPT_BUILDERS.values():
+                    build_prompt(goal="", duration="", total_days=1, total_weeks=1, total_months=1,
+                                 subject_category=subject_category, user_context=user_context)
+
 
 class LearningPlanGenerator:
     
-    def __init__(self, gemini_api_key: str):
-        self.llm = GeminiLLM(api_key=gemini_api_key)
+    def __init__(self, gemini_api_key: str, transport: GeminiTransport = None, plan_cache: PlanCache = None):
+        # One pooled HTTP transport for the lifetime of the generator
+        self.transport = transport or GeminiTransport()
+        # Every Gemini call goes through one shared rate budget and circuit breaker
+        self.circuit_breaker = CircuitBreaker.from_env()
+        self.retry_policy = RetryPolicy.from_env()
+        self.admission = AdmissionController.from_env()
+        self.llm = ResilientLLM(
+            GeminiLLM(api_key=gemini_api_key, transport=self.transport), self.circuit_breaker, self.admission,
+            output_token_estimate=int(os.getenv("ADMISSION_OUTPUT_TOKEN_ESTIMATE", 2000))
+        )
+        self.plan_cache = plan_cache or PlanCache.from_env()
+        self.single_flight = SingleFlight()
+        # Prefork workers (run_server.py) sharing the SQLite plan cache also share generations
+        # in flight; a single process has nobody to share with. PLAN_LEASE_SECONDS=0 disables
+        lease_seconds = float(os.getenv("PLAN_LEASE_SECONDS", 120))
+        self.shared_flight = None
+        if int(os.getenv("PREFORK_WORKERS", 1)) > 1 and self.plan_cache.disk is not None and lease_seconds > 0:
+            self.shared_flight = SharedFlight(self.plan_cache.disk, lease_seconds,
+                                              float(os.getenv("PLAN_LEASE_POLL_SECONDS", 0.1)))
+        
+        # Latency budget after which the precomputed fallback plan is returned instead
+        self.deadline_seconds = float(os.getenv("PLAN_DEADLINE_SECONDS", 30))
+        self._background_tasks = set()
+        # Event loop thread behind the blocking generate_learning_plan(), started on first use
+        self._sync_loop = None
+        self._sync_loop_thread = None
+        self._sync_loop_lock = threading.Lock()
+        self.deadline_fallbacks = 0
+        self.breaker_fallbacks = 0
+        
+        # Unique batch items generated at once; duplicates within a batch share one result
+        self.batch_max_concurrency = int(os.getenv("BATCH_MAX_CONCURRENCY", 8))
+        self.batch_stats_counters = {"batches": 0, "items": 0, "deduplicated": 0}
+        
+        self.prompt_mode = os.getenv("PROMPT_MODE", "full")
+        if self.prompt_mode not in PLAN_PROMPT_BUILDERS:
+            raise ValueError(f"Unknown PROMPT_MODE {self.prompt_mode!r}, expected one of {sorted(PLAN_PROMPT_BUILDERS)}")
+        self.prompt_counters = {"prompts": 0, "estimated_tokens": 0}
+        
+        # "structured" asks Gemini for schema-constrained JSON; "text" parses free text after cleaning
+        self.output_mode = os.getenv("OUTPUT_MODE", "text")
+        if self.output_mode not in ("text", "structured"):
+            raise ValueError(f"Unknown OUTPUT_MODE {self.output_mode!r}, expected 'text' or 'structured'")
+        self.plan_response_schema = to_gemini_schema(LearningPlanResponse, exclude=sorted(_UNGENERATED_FIELDS))
+        self.output_counters = {mode: {"plans": 0, "attempts": 0, "first_attempt_success": 0}
+                                for mode in ("text", "structured")}
         
         # Initialize components
         self.duration_parser = DurationParser()
         self.response_cleaner = ResponseCleaner()
         self.plan_validator = PlanValidator()
-        self.subject_detector = SubjectDetector()
-        self.task_generator = TaskGenerator()
-        self.fallback_generator = FallbackPlanGenerator()
+        # One read-only curricula registry shared by every component; see reload_curricula()
+        self.curricula = get_curriculum_registry()
+        self.subject_detector = SubjectDetector(self.curricula)
+        self.task_generator = TaskGenerator(self.curricula)
+        
+        # "regenerate" sends near-duplicate items of complete Gemini plans back through the
+        # repairer and rewrites repeats in fallback plans; "report" only counts them
+        self.dedup_mode = os.getenv("DEDUP_MODE", "regenerate")
+        if self.dedup_mode not in ("off", "report", "regenerate"):
+            raise ValueError(f"Unknown DEDUP_MODE {self.dedup_mode!r}, expected 'off', 'report' or 'regenerate'")
+        self.duplicate_detector = NearDuplicateDetector(threshold=float(os.getenv("DEDUP_THRESHOLD", 0.6)))
+        self.dedup_counters = {"plans_checked": 0, "plans_with_duplicates": 0, "duplicates_found": 0,
+                               "duplicates_replaced": 0}
+        self.fallback_generator = FallbackPlanGenerator(
+            self.curricula, self.subject_detector, self.task_generator, self.duplicate_detector,
+            rewrite_duplicates=self.dedup_mode == "regenerate"
+        )
+        self._content_version = (None, None)
+        
+        # Partial answers are repaired in place when at most this share of items is missing
+        self.repair_max_missing_ratio = float(os.getenv("REPAIR_MAX_MISSING_RATIO", 0.5))
+        self.plan_repairer = PlanRepairer(
+            self.llm, self.response_cleaner, self.plan_validator, self.fallback_generator,
+            max_llm_items=int(os.getenv("REPAIR_MAX_LLM_ITEMS", 40))
+        )
+        
+        # Plans at least this long are generated as an outline plus concurrent slices
+        self.chunked_min_days = int(os.getenv("CHUNKED_PLAN_MIN_DAYS", 45))
+        self.chunked_generator = ChunkedPlanGenerator(
+            self.llm, self.response_cleaner, self.fallback_generator, self.plan_repairer, self.retry_policy,
+            chunk_days=int(os.getenv("PLAN_CHUNK_DAYS", 30)),
+            max_concurrency=int(os.getenv("PLAN_CHUNK_CONCURRENCY", 12))
+        )
+    
+    def close(self) -> None:
+        loop = self._sync_loop
+        if loop is None:
+            self.transport.close()
+            self.plan_cache.close()
+            return
+        asyncio.run_coroutine_threadsafe(self.aclose(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        self._sync_loop_thread.join()
+        loop.close()
+        self._sync_loop = None
+    
+    async def aclose(self) -> None:
+        for task in list(self._background_tasks):
+            task.cancel()
+        await self.transport.aclose()
+        self.plan_cache.close()
+    
+    def generate_learning_plan(self, goal: str, duration: str, user_context: Dict[str, Any] = None,
+                               deadline_seconds: float = None) -> Dict[str, Any]:
+        """Blocking entry point for scripts; runs the async pipeline on the generator's own
+        event loop thread.
+
+        The loop outlives the call, so a plan that misses the deadline returns the fallback
+        on time while its Gemini generation finishes in the background and reaches the
+        cache. close() stops the thread and cancels generations still running.
+        """
+        future = asyncio.run_coroutine_threadsafe(
+            self.agenerate_learning_plan(goal, duration, user_context, deadline_seconds), self._sync_event_loop()
+        )
+        return future.result()
     
-    def generate_learning_plan(self, goal: str, duration: str, user_context: Dict[str, Any] = None) -> Dict[str, Any]:
+    def _sync_event_loop(self) -> asyncio.AbstractEventLoop:
+        with self._sync_loop_lock:
+            if self._sync_loop is None:
+                loop = asyncio.new_event_loop()
+                self._sync_loop_thread = threading.Thread(target=loop.run_forever, name="plan-generator-loop",
+                                                          daemon=True)
+                self._sync_loop_thread.start()
+                self._sync_loop = loop
+        return self._sync_loop
+    
+    async def agenerate_learning_plan(self, goal: str, duration: str, user_context: Dict[str, Any] = None,
+                                      deadline_seconds: float = None) -> Dict[str, Any]:
+        """Generate a plan within a latency budget.
+        
+        The returned plan carries a "source" key: "cache", "llm", "llm+fallback" (repaired
+        with some fallback items) or "fallback". When the LLM path misses the deadline the
+        precomputed fallback plan is returned and generation continues in the background,
+        so a late success still lands in the cache for the next request.
+        
+        Raises AdmissionRejectedError when the Gemini request queue is already full.
+        """
+        start = time.perf_counter()
+        totals, subject_category, user_context, cache_key = self._prepare_request(goal, duration, user_context)
+        source = "error"
+        try:
+            plan = await self._agenerate_within_deadline(goal, duration, totals, subject_category, user_context,
+                                                         cache_key, deadline_seconds)
+            source = plan["source"]
+            return plan
+        except AdmissionRejectedError:
+            source = "rejected"
+            raise
+        finally:
+            observe_plan(time.perf_counter() - start, subject_category, source)
+    
+    async def _agenerate_within_deadline(self, goal: str, duration: str, totals: Dict[str, int], subject_category: str,
+                                         user_context: Dict[str, Any], cache_key: str,
+                                         deadline_seconds: Optional[float]) -> Dict[str, Any]:
+        with span("cache_lookup", subject_category) as stage:
+            cached_plan = await self.plan_cache.aget(cache_key)
+            stage.outcome = "hit" if cached_plan is not None else "miss"
+        if cached_plan is not None:
+            logger.info("Plan cache hit, skipping Gemini call")
+            cached_plan["goalTitle"] = goal
+            cached_plan["source"] = "cache"
+            return cached_plan
+        
+        if deadline_seconds is None:
+            deadline_seconds = self.deadline_seconds
+        fallback_plan = self._fallback_plan(goal, duration, user_context, subject_category)
+        
+        if self.circuit_breaker.is_open():
+            logger.warning("Gemini circuit breaker is open, returning fallback plan")
+            self.breaker_fallbacks += 1
+            return dict(fallback_plan, source="fallback")
+        
+        # Shed load before starting work the Gemini budget cannot absorb
+        self.admission.check()
+        
+        # Identical concurrent requests share one generation; the plan dict is shared
+        # between waiters, so hand each caller its own top-level copy
+        llm_task = asyncio.ensure_future(self.single_flight.do(
+            cache_key,
+            lambda: self._agenerate_shared(goal, duration, totals, subject_category, user_context, cache_key)
+        ))
+        try:
+            plan = await asyncio.wait_for(asyncio.shield(llm_task), timeout=deadline_seconds)
+        except asyncio.TimeoutError:
+            logger.warning("LLM path missed the %ss deadline, returning fallback plan", deadline_seconds)
+            self.deadline_fallbacks += 1
+            self._background_tasks.add(llm_task)
+            llm_task.add_done_callback(self._discard_background_task)
+            return dict(fallback_plan, source="fallback")
+        except asyncio.CancelledError:
+            llm_task.cancel()
+            raise
+        return dict(plan, goalTitle=goal)
+    
+    async def aiter_batch(self, items: List[Tuple[str, str, Optional[Dict[str, Any]], Optional[float]]],
+                          max_concurrency: int = None) -> AsyncIterator[Tuple[int, Optional[Dict[str, Any]], Optional[Exception]]]:
+        """Generate plans for (goal, duration, user_context, deadline_seconds) items.
         
-        print(f"Generating plan for goal: {goal}, duration: {duration}")
-        duration_dict = self.duration_parser.parse_duration(duration)
-        totals = self.duration_parser.calculate_totals(duration_dict)
+        Identical items are generated once. Yields (index, plan, error) per input item in
+        completion order, so the whole batch takes about as long as its slowest item.
+        """
+        groups: Dict[str, List[int]] = {}
+        for index, item in enumerate(items):
+            groups.setdefault(json.dumps(item, sort_keys=True, default=str), []).append(index)
+        self.batch_stats_counters["batches"] += 1
+        self.batch_stats_counters["items"] += len(items)
+        self.batch_stats_counters["deduplicated"] += len(items) - len(groups)
+        
+        semaphore = asyncio.Semaphore(max_concurrency or self.batch_max_concurrency)
+        
+        async def run(indices: List[int]):
+            goal, duration, user_context, deadline_seconds = items[indices[0]]
+            async with semaphore:
+                try:
+                    return indices, await self.agenerate_learning_plan(goal, duration, user_context, deadline_seconds), None
+                except Exception as e:
+                    logger.warning("Batch item %d failed: %s", indices[0], e)
+                    return indices, None, e
+        
+        tasks = [asyncio.ensure_future(run(indices)) for indices in groups.values()]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                indices, plan, error = await next_done
+                for index in indices:
+                    yield index, (dict(plan) if plan is not None else None), error
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    def batch_stats(self) -> Dict[str, Any]:
+        return dict(self.batch_stats_counters, max_concurrency=self.batch_max_concurrency)
+    
+    def dedup_stats(self) -> Dict[str, Any]:
+        return dict(self.dedup_counters, mode=self.dedup_mode, threshold=self.duplicate_detector.threshold)
+    
+    def deadline_stats(self) -> Dict[str, Any]:
+        return {
+            "deadline_seconds": self.deadline_seconds,
+            "fallbacks": self.deadline_fallbacks,
+            "background_generations": len(self._background_tasks),
+        }
+    
+    def resilience_stats(self) -> Dict[str, Any]:
+        return {
+            "circuit_breaker": self.circuit_breaker.stats(),
+            "admission": self.admission.stats(),
+            "breaker_fallbacks": self.breaker_fallbacks,
+            **self.retry_policy.stats(),
+        }
+    
+    @property
+    def content_version(self) -> str:
+        """Cache-key version; follows the curricula registry so a reload invalidates cached plans"""
+        curricula_hash = self.curricula.content_hash
+        if self._content_version[0] != curricula_hash:
+            self._content_version = (curricula_hash, compute_content_version(curricula_hash))
+        return self._content_version[1]
+    
+    def reload_curricula(self, only_if_changed: bool = False) -> bool:
+        """Re-read the curricula data files; returns whether a reload happened"""
+        if only_if_changed:
+            reloaded = self.curricula.reload_if_changed()
+        else:
+            self.curricula.reload()
+            reloaded = True
+        if reloaded:
+            logger.info("Curricula reloaded, content version %s", self.content_version)
+        return reloaded
+    
+    def curricula_stats(self) -> Dict[str, Any]:
+        return dict(self.curricula.stats(), content_version=self.content_version)
+    
+    def _discard_background_task(self, task: "asyncio.Task") -> None:
+        self._background_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Background plan generation failed: %s", task.exception())
+    
+    def _prepare_request(self, goal: str, duration: str, user_context: Dict[str, Any] = None):
+        """Parse duration, detect subject, settle user context and derive the plan cache key"""
+        # Detect subject category for intelligent processing; it labels every later stage
+        with span("subject_detection") as stage:
+            candidates = self.subject_detector.rank_subject_categories(goal)
+            subject_category = stage.category = candidates[0][0] if candidates else "general"
         
-        # Detect subject category for intelligent processing
-        subject_category = self.subject_detector.detect_subject_category(goal)
-        print(f"Detected subject category: {subject_category}")
+        with span("duration_parse", subject_category):
+            duration_dict = self.duration_parser.parse_duration(duration)
+            totals = self.duration_parser.calculate_totals(duration_dict)
         
         # Set default user context if not provided
         if user_context is None:
             user_context = self._infer_user_context(goal, subject_category)
         
-        print(f"Parsed duration: {duration_dict}")
-        print(f"Calculated totals: {totals}")
-        print(f"User context: {user_context}")
+        logger.info("Generating plan for goal: %s, duration: %s", goal, duration,
+                    extra={"category": subject_category, "total_days": totals["total_days"]})
+        logger.debug("Subject candidates: %s; parsed duration: %s; totals: %s; user context: %s",
+                     candidates, duration_dict, totals, user_context)
+        
+        cache_key = make_plan_key(goal, totals, subject_category, user_context, self.content_version)
+        return totals, subject_category, user_context, cache_key
+    
+    async def astream_learning_plan(self, goal: str, duration: str,
+                                     user_context: Dict[str, Any] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Yield plan events: one "meta", a "task" per month/week/day item, then "complete".
+        
+        Items are forwarded as soon as Gemini's streamed JSON closes them. Cached plans and
+        plans long enough for chunked generation are emitted once they are complete. The
+        final event carries the validated counts and where the plan came from.
+        """
+        start = time.perf_counter()
+        totals, subject_category, user_context, cache_key = self._prepare_request(goal, duration, user_context)
+        expected = {section: totals[total_key] for section, total_key in SECTION_TOTALS.items()}
+        yield {"event": "meta", "goalTitle": goal, "subjectCategory": subject_category, "expected": expected}
+        
+        plan = await self.plan_cache.aget(cache_key)
+        if plan is not None:
+            source = "cache"
+        elif totals["total_days"] >= self.chunked_min_days:
+            plan = await self.single_flight.do(
+                cache_key,
+                lambda: self._agenerate_shared(goal, duration, totals, subject_category, user_context, cache_key)
+            )
+            source = plan["source"]
+        else:
+            plan = None
+        
+        if plan is not None:
+            for section in SECTION_TOTALS:
+                for index, item in enumerate(plan[section]):
+                    yield {"event": "task", "section": section, "index": index, "item": item}
+        else:
+            plan = {"goalTitle": goal, "totalDays": totals["total_days"]}
+            parser = IncrementalPlanParser()
+            prompt = self._build_plan_prompt(goal, duration, totals, subject_category, user_context)
+            
+            try:
+                with span("gemini_call", subject_category, 1):
+                    async for text in self.llm.astream(prompt, **self._plan_llm_kwargs()):
+                        for section, index, item in parser.feed(text):
+                            if index < expected[section]:
+                                yield {"event": "task", "section": section, "index": index,
+                                       "item": self._label_item(item, section, index)}
+            except Exception as e:
+                logger.warning("Streaming generation failed: %s", e)
+            
+            # Anything Gemini did not deliver comes from the fallback plan
+            filled = 0
+            fallback_plan = None
+            for section in SECTION_TOTALS:
+                items = [self._label_item(item, section, i)
+                         for i, item in enumerate(parser.items[section][:expected[section]])]
+                for index in range(len(items), expected[section]):
+                    if fallback_plan is None:
+                        fallback_plan = self._fallback_plan(goal, duration, user_context, subject_category)
+                    item = self._label_item(dict(fallback_plan[section][index]), section, index)
+                    items.append(item)
+                    filled += 1
+                    yield {"event": "task", "section": section, "index": index, "item": item}
+                plan[section] = items
+            
+            delivered = sum(expected.values()) - filled
+            source = "llm" if filled == 0 else ("llm+fallback" if delivered else "fallback")
+            if filled == 0:
+                await self.plan_cache.aset(cache_key, plan)
+        
+        observe_plan(time.perf_counter() - start, subject_category, source)
+        yield {
+            "event": "complete",
+            "source": source,
+            "totals": {"totalDays": totals["total_days"],
+                       **{section: len(plan[section]) for section in SECTION_TOTALS}}
+        }
+    
+    def _build_plan_prompt(self, goal: str, duration: str, totals: Dict[str, int], subject_category: str,
+                           user_context: Dict[str, Any], attempt_number: int = 1) -> str:
+        with span("prompt_build", subject_category, attempt_number):
+            prompt = PLAN_PROMPT_BUILDERS[self.prompt_mode](
+                goal=goal,
+                duration=duration,
+                total_days=totals["total_days"],
+                total_weeks=totals["total_weeks"],
+                total_months=totals["total_months"],
+                subject_category=subject_category,
+                user_context=user_context,
+                attempt_number=attempt_number
+            )
+            tokens = estimate_tokens(prompt)
+        self.prompt_counters["prompts"] += 1
+        self.prompt_counters["estimated_tokens"] += tokens
+        logger.debug("Prompt size (%s): %d chars, ~%d tokens", self.prompt_mode, len(prompt), tokens)
+        return prompt
+    
+    def prompt_stats(self) -> Dict[str, Any]:
+        prompts = self.prompt_counters["prompts"]
+        return {
+            "mode": self.prompt_mode,
+            "prompts": prompts,
+            "avg_estimated_tokens": round(self.prompt_counters["estimated_tokens"] / prompts) if prompts else 0,
+        }
+    
+    def _plan_llm_kwargs(self) -> Dict[str, Any]:
+        return {"response_schema": self.plan_response_schema} if self.output_mode == "structured" else {}
+    
+    def _record_attempts(self, attempts: int, first_attempt_success: bool) -> None:
+        counters = self.output_counters[self.output_mode]
+        counters["plans"] += 1
+        counters["attempts"] += attempts
+        counters["first_attempt_success"] += first_attempt_success
+    
+    def output_stats(self) -> Dict[str, Any]:
+        """First-attempt success and full-plan attempts per plan, per output mode"""
+        stats = {"mode": self.output_mode}
+        for mode, counters in self.output_counters.items():
+            plans = counters["plans"]
+            stats[mode] = dict(
+                counters,
+                first_attempt_success_rate=round(counters["first_attempt_success"] / plans, 3) if plans else None,
+                avg_attempts=round(counters["attempts"] / plans, 3) if plans else None,
+            )
+        return stats
+    
+    @staticmethod
+    def _is_usable_item(item: TaskItem) -> bool:
+        """PlanRepairer.is_usable for validated items: at least one non-blank task"""
+        return any(task.strip() for task in item.tasks)
+    
+    def _label_item(self, item: Any, section: str, index: int) -> Dict[str, Any]:
+        item = self.plan_validator.validate_task_item(item, index)
+        item["label"] = f"{SECTION_LABELS[section]} {index + 1}"
+        return item
+    
+    async def _agenerate_shared(self, goal: str, duration: str, totals: Dict[str, int], subject_category: str,
+                                user_context: Dict[str, Any], cache_key: str) -> Dict[str, Any]:
+        """Generate under the cross-process lease on cache_key, or take the plan the worker holding it cached"""
+        generate = lambda: self._agenerate_uncached(goal, duration, totals, subject_category, user_context, cache_key)
+        if self.shared_flight is None:
+            return await generate()
+        return await self.shared_flight.do(cache_key, generate, lambda: self._shared_plan(cache_key))
+
+    async def _shared_plan(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        plan = await self.plan_cache.aget_shared(cache_key)
+        if plan is not None:
+            plan["source"] = "cache"
+        return plan
+
+    async def _agenerate_uncached(self, goal: str, duration: str, totals: Dict[str, int], subject_category: str,
+                                  user_context: Dict[str, Any], cache_key: str) -> Dict[str, Any]:
+        if self.circuit_breaker.is_open():
+            logger.warning("Gemini circuit breaker is open, using intelligent fallback")
+            self.breaker_fallbacks += 1
+            plan = self._fallback_plan(goal, duration, user_context, subject_category)
+            plan["source"] = "fallback"
+            return plan
+        
+        if totals["total_days"] >= self.chunked_min_days:
+            logger.info("Using chunked generation for %d days", totals["total_days"])
+            with span("chunked_generation", subject_category):
+                plan, filled = await self.chunked_generator.agenerate(goal, duration, totals, subject_category, user_context)
+            duplicates = self._find_duplicates(plan, subject_category)
+            if duplicates:
+                plan, refilled = await self.plan_repairer.arepair(plan, goal, duration, totals, subject_category,
+                                                                  user_context, replace=duplicates)
+                filled += refilled
+            return await self._finish_plan(plan, filled, cache_key)
         
         max_retries = 3
+        expected_items = sum(totals[total_key] for total_key in SECTION_TOTALS.values())
+        best_items, best_missing = None, expected_items + 1
         
+        attempts = 0
         for attempt in range(max_retries):
+            attempt_number = attempt + 1
             try:
-                # Use the enhanced personalized prompt
-                formatted_prompt = get_enhanced_personalized_prompt(
-                    goal=goal,
-                    duration=duration,
-                    total_days=totals["total_days"],
-                    total_weeks=totals["total_weeks"],
-                    total_months=totals["total_months"],
-                    subject_category=subject_category,
-                    user_context=user_context,
-                    attempt_number=attempt + 1
-                )
+                attempts += 1
+                formatted_prompt = self._build_plan_prompt(goal, duration, totals, subject_category, user_context, attempt_number)
                 
-                print(f"Attempt {attempt + 1}: Calling Gemini API with enhanced prompt...")
-                raw_response = self.llm(formatted_prompt)
+                logger.debug("Attempt %d: Calling Gemini API with %s prompt", attempt_number, self.prompt_mode)
+                with span("gemini_call", subject_category, attempt_number):
+                    raw_response = await self.llm.ainvoke(formatted_prompt, **self._plan_llm_kwargs())
                 
-                if raw_response.startswith("Error:"):
-                    print(f"LLM error on attempt {attempt + 1}: {raw_response}")
-                    continue
+                logger.debug("Raw response received, length: %d", len(raw_response))
+                if self.output_mode == "structured":
+                    # Schema-constrained output is bare JSON, nothing to strip
+                    json_response = raw_response
+                else:
+                    with span("clean", subject_category, attempt_number):
+                        json_response = self.response_cleaner.clean_json_response(raw_response)
+                    logger.debug("Cleaned JSON length: %d", len(json_response))
                 
-                print(f"Raw response received, length: {len(raw_response)}")
-                json_response = self.response_cleaner.clean_json_response(raw_response)
-                print(f"Cleaned JSON length: {len(json_response)}")
+                # One compiled pass parses the JSON, validates it and fills PlanValidator's defaults
+                with span("validate", subject_category, attempt_number) as stage:
+                    try:
+                        generated = GeneratedPlan.model_validate_json(json_response)
+                    except ValidationError as e:
+                        generated = None
+                        stage.outcome = "invalid"
+                        logger.warning("Plan validation failed on attempt %d: %s", attempt_number, e.errors()[0]['msg'])
                 
-                try:
-                    plan = json.loads(json_response)
-                    print("JSON parsing successful!")
-                    if (isinstance(plan, dict) and 
-                        len(plan.get('dailyTasks', [])) == totals["total_days"] and
-                        len(plan.get('weeklyTasks', [])) == totals["total_weeks"] and
-                        len(plan.get('monthlyTasks', [])) == totals["total_months"]):
-                        
-                        print(f"Plan validated: {len(plan['dailyTasks'])} daily, {len(plan['weeklyTasks'])} weekly, {len(plan['monthlyTasks'])} monthly tasks")
-                        return self.plan_validator.validate_plan_structure(plan)
-                    else:
-                        print(f"Plan structure invalid - Expected: {totals['total_days']} daily, {totals['total_weeks']} weekly, {totals['total_months']} monthly")
-                        
-                except json.JSONDecodeError as e:
-                    print(f"JSON parsing failed on attempt {attempt + 1}: {e}")
+                if generated is not None:
+                    if all(len(getattr(generated, section)) == totals[total_key] and
+                           all(self._is_usable_item(item) for item in getattr(generated, section))
+                           for section, total_key in SECTION_TOTALS.items()):
+                        logger.info("Plan validated: %d daily, %d weekly, %d monthly tasks", len(generated.dailyTasks),
+                                    len(generated.weeklyTasks), len(generated.monthlyTasks))
+                        self._record_attempts(attempts, first_attempt_success=attempts == 1)
+                        plan = generated.model_dump(exclude=_UNGENERATED_FIELDS)
+                        # Indices must be slot positions, as the repairer places items by label number
+                        duplicates = self._find_duplicates(self.plan_repairer.place_plan(plan, totals), subject_category)
+                        if duplicates:
+                            return await self._arepair_plan(plan, goal, duration, totals, subject_category,
+                                                            user_context, cache_key, replace=duplicates)
+                        return await self._finish_plan(plan, 0, cache_key)
+                    plan = generated.model_dump(exclude=_UNGENERATED_FIELDS)
+                else:
+                    with span("json_parse", subject_category, attempt_number) as stage:
+                        try:
+                            plan = json.loads(json_response)
+                        except json.JSONDecodeError:
+                            # Truncated or malformed output still carries every item finished before the error
+                            logger.info("Salvaging complete items from attempt %d", attempt_number)
+                            stage.outcome = "salvaged"
+                            plan = salvage_plan_items(json_response)
                     
+                    if not isinstance(plan, dict):
+                        logger.warning("Unexpected JSON document on attempt %d", attempt_number)
+                        continue
+                
+                missing = self.plan_repairer.count_missing(self.plan_repairer.place_plan(plan, totals))
+                logger.info("Plan structure invalid - Expected: %d daily, %d weekly, %d monthly; %d items missing or malformed",
+                            totals['total_days'], totals['total_weeks'], totals['total_months'], missing)
+                if missing < best_missing:
+                    best_items, best_missing = plan, missing
+                
+                if missing <= expected_items * self.repair_max_missing_ratio:
+                    if attempt + 1 < max_retries:
+                        self.plan_repairer.full_retries_avoided += 1
+                    self._record_attempts(attempts, first_attempt_success=False)
+                    return await self._arepair_plan(plan, goal, duration, totals, subject_category, user_context, cache_key)
+                    
+            except AdmissionRejectedError:
+                # Nothing generated yet: shed the request (503) rather than serve a fallback
+                if best_items is None:
+                    raise
+                break
+            except GeminiError as e:
+                logger.warning("LLM error on attempt %d: %s", attempt_number, e)
+                delay = self.retry_policy.delay_for(attempt, e) if attempt + 1 < max_retries else None
+                if delay is None:
+                    break
+                logger.info("Retrying in %.2fs", delay)
+                await asyncio.sleep(delay)
             except Exception as e:
-                print(f"Error on attempt {attempt + 1}: {e}")
+                logger.warning("Error on attempt %d: %s", attempt_number, e)
+        
+        self._record_attempts(attempts, first_attempt_success=False)
+        if best_items is not None and best_missing < expected_items:
+            logger.info("All full attempts fell short, repairing best attempt (%d items missing)", best_missing)
+            return await self._arepair_plan(best_items, goal, duration, totals, subject_category, user_context, cache_key)
         
-        print("All LLM attempts failed, using intelligent fallback with user context")
-        return self.fallback_generator.create_intelligent_fallback_plan(goal, duration, user_context)
+        logger.warning("All LLM attempts failed, using intelligent fallback with user context")
+        plan = self._fallback_plan(goal, duration, user_context, subject_category)
+        plan["source"] = "fallback"
+        return plan
+    
+    async def _arepair_plan(self, items_by_section: Dict[str, Any], goal: str, duration: str, totals: Dict[str, int],
+                            subject_category: str, user_context: Dict[str, Any], cache_key: str,
+                            replace: Dict[str, List[int]] = None) -> Dict[str, Any]:
+        plan, filled = await self.plan_repairer.arepair(items_by_section, goal, duration, totals, subject_category,
+                                                        user_context, replace=replace)
+        return await self._finish_plan(plan, filled, cache_key)
+    
+    def _fallback_plan(self, goal: str, duration: str, user_context: Dict[str, Any], subject_category: str) -> Dict[str, Any]:
+        with span("fallback", subject_category):
+            return self.fallback_generator.create_intelligent_fallback_plan(goal, duration, user_context)
+    
+    def _find_duplicates(self, plan: Dict[str, Any], subject_category: str) -> Dict[str, List[int]]:
+        """Near-duplicate items of a complete plan to regenerate, per section (empty unless DEDUP_MODE=regenerate)"""
+        if self.dedup_mode == "off":
+            return {}
+        with span("dedup", subject_category):
+            duplicates = self.duplicate_detector.find_plan_duplicates(plan)
+        found = sum(len(indices) for indices in duplicates.values())
+        self.dedup_counters["plans_checked"] += 1
+        if not found:
+            return {}
+        self.dedup_counters["plans_with_duplicates"] += 1
+        self.dedup_counters["duplicates_found"] += found
+        logger.info("Found %d near-duplicate items: %s", found,
+                    ", ".join(f"{len(indices)} {section}" for section, indices in duplicates.items()))
+        if self.dedup_mode != "regenerate":
+            return {}
+        self.dedup_counters["duplicates_replaced"] += found
+        return duplicates
+    
+    async def _finish_plan(self, plan: Dict[str, Any], filled: int, cache_key: str) -> Dict[str, Any]:
+        """Cache plans produced entirely by Gemini and record where the plan came from"""
+        if filled == 0:
+            await self.plan_cache.aset(cache_key, plan)
+            plan["source"] = "llm"
+        else:
+            plan["source"] = "llm+fallback"
+        return plan
     
     def _infer_user_context(self, goal: str, subject_category: str) -> Dict[str, Any]:
         """Infer user context from goal and subject"""
@@ -1,11 +1,23 @@
 # main.py (Enhanced)
 import os
-from fastapi import FastAPI, HTTPException
+import json
+import asyncio
+import logging
+from datetime import date, timedelta
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse, JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Optional, List
-from models import LearningPlanRequest, TaskItem, LearningPlanResponse
+from models import (LearningPlanRequest, TaskItem, LearningPlanResponse, BatchPlanRequest,
+                    BatchPlanItemResult, BatchPlanResponse, PlanSummary, PlanSlice)
 from learning_plan_generator import LearningPlanGenerator
+from plan_store import PlanStore
+from response_encoding import model_response
+from gemini_errors import AdmissionRejectedError
+from observability import CONTENT_TYPE_LATEST, RequestContextMiddleware, configure_logging, render_metrics
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title="Enhanced Learning Plan Generator API",
@@ -19,7 +31,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID"],
 )
+# Outermost, so request latency and the X-Request-ID header cover every other layer
+app.add_middleware(RequestContextMiddleware)
 
 # Enhanced request model with user context
 class EnhancedLearningPlanRequest(BaseModel):
@@ -32,16 +47,112 @@ class EnhancedLearningPlanRequest(BaseModel):
     practical_goals: Optional[List[str]] = []  # e.g., ["job interviews", "freelancing", "personal projects"]
 
 generator = None
+plan_store = None
+response_mode = "standard"
+_curricula_watcher = None
+
+async def _watch_curricula(interval: float):
+    """Hot-reload curricula data files edited on disk"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            generator.reload_curricula(only_if_changed=True)
+        except Exception as e:
+            logger.warning("Curricula reload failed: %s", e)
+
+def _legacy_user_context() -> dict:
+    """User context applied to requests from the legacy endpoints"""
+    return {
+        "skill_level": "beginner",
+        "learning_style": "practical",
+        "daily_time": "1-2 hours",
+        "specific_interests": [],
+        "practical_goals": []
+    }
+
+def _plan_response(plan: dict, plan_id: Optional[str] = None) -> LearningPlanResponse:
+    return LearningPlanResponse(
+        goalTitle=plan["goalTitle"],
+        totalDays=plan["totalDays"],
+        monthlyTasks=[TaskItem(**task) for task in plan["monthlyTasks"]],
+        weeklyTasks=[TaskItem(**task) for task in plan["weeklyTasks"]],
+        dailyTasks=[TaskItem(**task) for task in plan["dailyTasks"]],
+        source=plan.get("source"),
+        planId=plan_id,
+    )
+
+async def _save_plan(plan: dict, start_date: Optional[date]) -> Optional[str]:
+    """Persist a generated plan for paged retrieval; a failed save only costs the planId"""
+    if plan_store is None:
+        return None
+    try:
+        return await asyncio.to_thread(plan_store.save, plan, start_date)
+    except Exception as e:
+        logger.warning("Failed to save plan: %s", e)
+        return None
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+async def _stored_plan_etag(plan_id: str, http_request: Request):
+    """(quoted ETag, 304 response or None) for a saved plan; 404 when it is unknown or expired"""
+    if plan_store is None:
+        raise HTTPException(status_code=404, detail="Plan storage is disabled")
+    etag = await asyncio.to_thread(plan_store.etag, plan_id)
+    if etag is None:
+        raise HTTPException(status_code=404, detail="Plan not found")
+    etag = f'"{etag}"'
+    if _etag_matches(http_request.headers.get("if-none-match"), etag):
+        return etag, Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+    return etag, None
+
+@app.exception_handler(AdmissionRejectedError)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejectedError):
+    """Overloaded: tell the client when to come back instead of queueing work we cannot finish"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(max(1, round(exc.retry_after or 1)))}
+    )
 
 @app.on_event("startup")
 async def startup_event():
+    configure_logging()
     global generator
     api_key = os.getenv("GEMINI_API_KEY")
     if not api_key:
         raise Exception("GEMINI_API_KEY environment variable not set")
     
     generator = LearningPlanGenerator(api_key)
-    print("Enhanced Learning Plan Generator with personalization initialized successfully")
+    
+    global plan_store
+    plan_store = PlanStore.from_env()
+    
+    # "fast" validates plan responses once and serializes them with pydantic-core, compressed
+    # per Accept-Encoding; "standard" returns models through FastAPI's response_model
+    global response_mode
+    response_mode = os.getenv("RESPONSE_MODE", "standard")
+    if response_mode not in ("standard", "fast"):
+        raise ValueError(f"Unknown RESPONSE_MODE {response_mode!r}, expected 'standard' or 'fast'")
+    
+    # Seconds between checks for edited curricula files; 0 disables (POST /curricula/reload still works)
+    global _curricula_watcher
+    reload_interval = float(os.getenv("CURRICULA_RELOAD_SECONDS", 0))
+    if reload_interval > 0:
+        _curricula_watcher = asyncio.create_task(_watch_curricula(reload_interval))
+    logger.info("Enhanced Learning Plan Generator with personalization initialized successfully")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if _curricula_watcher:
+        _curricula_watcher.cancel()
+    if generator:
+        await generator.aclose()
+    if plan_store:
+        plan_store.close()
 
 @app.get("/")
 async def root():
@@ -55,9 +166,47 @@ async def root():
         ]
     }
 
+@app.get("/stats")
+async def stats():
+    if not generator:
+        raise HTTPException(status_code=500, detail="Generator not initialized")
+    # Counters are per process; under run_server.py's prefork mode (PREFORK_WORKERS > 1) each call
+    # reports the one worker that answered it
+    return {
+        "worker": {"pid": os.getpid(), "index": os.getenv("PREFORK_WORKER_INDEX")},
+        "plan_cache": generator.plan_cache.stats(),
+        "single_flight": generator.single_flight.stats(),
+        "shared_flight": generator.shared_flight.stats() if generator.shared_flight else None,
+        "repair": generator.plan_repairer.stats(),
+        "duplicates": generator.dedup_stats(),
+        "deadline": generator.deadline_stats(),
+        "resilience": generator.resilience_stats(),
+        "batch": generator.batch_stats(),
+        "prompt": generator.prompt_stats(),
+        "output": generator.output_stats(),
+        "curricula": generator.curricula_stats(),
+        "plan_store": plan_store.stats() if plan_store else None,
+    }
+
+@app.get("/metrics")
+async def metrics():
+    """Stage, plan and HTTP latency histograms and counters in the Prometheus text format"""
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
+@app.post("/curricula/reload")
+async def reload_curricula():
+    """Re-read the curricula data files now; cached plans built from the old data stop matching"""
+    if not generator:
+        raise HTTPException(status_code=500, detail="Generator not initialized")
+    try:
+        generator.reload_curricula()
+    except (OSError, ValueError, KeyError) as e:
+        raise HTTPException(status_code=500, detail=f"Curricula reload failed: {e}")
+    return generator.curricula_stats()
+
 # Legacy endpoint for backward compatibility
 @app.post("/generate-plan", response_model=LearningPlanResponse)
-async def generate_plan(request: LearningPlanRequest):
+async def generate_plan(request: LearningPlanRequest, http_request: Request):
     """Legacy endpoint - converts to enhanced format internally"""
     if not generator:
         raise HTTPException(status_code=500, detail="Generator not initialized")
@@ -70,29 +219,173 @@ async def generate_plan(request: LearningPlanRequest):
     
     try:
         # Convert legacy request to enhanced format
-        user_context = {
-            "skill_level": "beginner",
-            "learning_style": "practical",
-            "daily_time": "1-2 hours",
-            "specific_interests": [],
-            "practical_goals": []
-        }
-        
-        plan = generator.generate_learning_plan(request.goal, request.duration, user_context)
-        
-        response = LearningPlanResponse(
-            goalTitle=plan["goalTitle"],
-            totalDays=plan["totalDays"],
-            monthlyTasks=[TaskItem(**task) for task in plan["monthlyTasks"]],
-            weeklyTasks=[TaskItem(**task) for task in plan["weeklyTasks"]],
-            dailyTasks=[TaskItem(**task) for task in plan["dailyTasks"]],
+        plan = await generator.agenerate_learning_plan(
+            request.goal, request.duration, _legacy_user_context(), request.deadline_seconds
         )
-        return response
         
+        plan_id = await _save_plan(plan, request.start_date)
+        if response_mode == "fast":
+            return model_response(LearningPlanResponse.model_validate(dict(plan, planId=plan_id)),
+                                  http_request.headers.get("accept-encoding"))
+        return _plan_response(plan, plan_id)
+        
+    except AdmissionRejectedError:
+        raise
     except Exception as e:
-        print(f"Error in generate_plan endpoint: {e}")
+        logger.exception("Error in generate_plan endpoint: %s", e)
         raise HTTPException(status_code=500, detail=f"Error generating plan: {str(e)}")
 
+@app.post("/generate-plan/stream")
+async def generate_plan_stream(request: LearningPlanRequest, http_request: Request):
+    """Stream plan items as they are generated.
+
+    Responds with server-sent events when the client accepts text/event-stream,
+    otherwise with newline-delimited JSON. Each event has an "event" field:
+    "meta", then one "task" per item, then "complete" with the validated totals.
+    """
+    if not generator:
+        raise HTTPException(status_code=500, detail="Generator not initialized")
+    
+    if not request.goal.strip():
+        raise HTTPException(status_code=400, detail="Goal cannot be empty")
+    
+    if not request.duration.strip():
+        raise HTTPException(status_code=400, detail="Duration cannot be empty")
+    
+    generator.admission.check()
+    use_sse = "text/event-stream" in http_request.headers.get("accept", "")
+    
+    async def event_stream():
+        async for event in generator.astream_learning_plan(request.goal, request.duration, _legacy_user_context()):
+            data = json.dumps(event)
+            yield f"event: {event['event']}\ndata: {data}\n\n" if use_sse else data + "\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream" if use_sse else "application/x-ndjson"
+    )
+
+@app.post("/generate-plan/batch", response_model=BatchPlanResponse)
+async def generate_plan_batch(request: BatchPlanRequest, http_request: Request):
+    """Generate several plans in one round trip.
+
+    Identical items are generated once and run concurrently up to BATCH_MAX_CONCURRENCY.
+    Every item gets its own result or error. With "stream": true the response is
+    newline-delimited JSON, one result per line in completion order.
+    """
+    if not generator:
+        raise HTTPException(status_code=500, detail="Generator not initialized")
+    
+    max_items = int(os.getenv("BATCH_MAX_ITEMS", 50))
+    if not request.items:
+        raise HTTPException(status_code=400, detail="Batch cannot be empty")
+    if len(request.items) > max_items:
+        raise HTTPException(status_code=400, detail=f"Batch cannot contain more than {max_items} items")
+    
+    invalid = {}
+    valid_indices, work = [], []
+    for index, item in enumerate(request.items):
+        if not item.goal.strip():
+            invalid[index] = "Goal cannot be empty"
+        elif not item.duration.strip():
+            invalid[index] = "Duration cannot be empty"
+        else:
+            user_context = _legacy_user_context()
+            if item.user_context:
+                # A field sent as null keeps its default; the prompt builders need every one set
+                user_context.update(item.user_context.model_dump(exclude_none=True))
+            valid_indices.append(index)
+            work.append((item.goal, item.duration, user_context, item.deadline_seconds))
+    start_dates = [item.start_date for item in request.items]
+    unique_items = len({json.dumps(w, sort_keys=True) for w in work})
+    
+    async def results():
+        for index, error in invalid.items():
+            yield BatchPlanItemResult(index=index, error=error)
+        async for position, plan, error in generator.aiter_batch(work):
+            index = valid_indices[position]
+            if error is not None:
+                yield BatchPlanItemResult(index=index, error=f"Error generating plan: {error}")
+                continue
+            try:
+                plan_id = await _save_plan(plan, start_dates[index])
+                if response_mode == "fast":
+                    yield BatchPlanItemResult.model_validate({"index": index, "plan": dict(plan, planId=plan_id)})
+                else:
+                    yield BatchPlanItemResult(index=index, plan=_plan_response(plan, plan_id))
+            except Exception as e:
+                yield BatchPlanItemResult(index=index, error=f"Invalid plan: {e}")
+    
+    if request.stream:
+        async def ndjson():
+            async for result in results():
+                yield result.model_dump_json() + "\n"
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+    
+    collected = [result async for result in results()]
+    collected.sort(key=lambda result: result.index)
+    response = BatchPlanResponse(results=collected, unique_items=unique_items)
+    if response_mode == "fast":
+        return model_response(response, http_request.headers.get("accept-encoding"))
+    return response
+
+@app.get("/plans/{plan_id}", response_model=PlanSummary)
+async def get_plan_summary(plan_id: str, http_request: Request, response: Response):
+    """A saved plan without its daily and weekly tasks, which are fetched page by page"""
+    etag, not_modified = await _stored_plan_etag(plan_id, http_request)
+    if not_modified:
+        return not_modified
+    summary = await asyncio.to_thread(plan_store.get_summary, plan_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Plan not found")
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+    return PlanSummary(**summary)
+
+async def _plan_slice(plan_id: str, section: str, offset: int, limit: int, on: Optional[date],
+                      http_request: Request, response: Response):
+    """Page of dailyTasks/weeklyTasks by offset, or starting at the item covering `on`"""
+    etag, not_modified = await _stored_plan_etag(plan_id, http_request)
+    if not_modified:
+        return not_modified
+    days_per_item = 7 if section == "weeklyTasks" else 1
+    if on is not None:
+        summary = await asyncio.to_thread(plan_store.get_summary, plan_id)
+        if summary is None:
+            raise HTTPException(status_code=404, detail="Plan not found")
+        offset = (on - date.fromisoformat(summary["startDate"])).days // days_per_item
+        total = summary["weeklyCount"] if section == "weeklyTasks" else summary["dailyCount"]
+        if not 0 <= offset < total:
+            raise HTTPException(status_code=404, detail=f"{on.isoformat()} is outside the plan")
+    result = await asyncio.to_thread(plan_store.get_slice, plan_id, section, offset, limit)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Plan not found")
+    items, total, _, start_date = result
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+    return PlanSlice(
+        planId=plan_id,
+        section=section.removesuffix("Tasks"),
+        offset=offset,
+        limit=limit,
+        total=total,
+        startDate=date.fromisoformat(start_date) + timedelta(days=offset * days_per_item),
+        items=[TaskItem(**item) for item in items],
+        nextOffset=offset + limit if offset + limit < total else None,
+    )
+
+@app.get("/plans/{plan_id}/daily", response_model=PlanSlice)
+async def get_plan_daily(plan_id: str, http_request: Request, response: Response,
+                         offset: int = Query(0, ge=0), limit: int = Query(7, ge=1, le=100),
+                         on: Optional[date] = Query(None, alias="date", description="start at the day for this date")):
+    return await _plan_slice(plan_id, "dailyTasks", offset, limit, on, http_request, response)
+
+@app.get("/plans/{plan_id}/weekly", response_model=PlanSlice)
+async def get_plan_weekly(plan_id: str, http_request: Request, response: Response,
+                          offset: int = Query(0, ge=0), limit: int = Query(4, ge=1, le=100),
+                          on: Optional[date] = Query(None, alias="date", description="start at the week containing this date")):
+    return await _plan_slice(plan_id, "weeklyTasks", offset, limit, on, http_request, response)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
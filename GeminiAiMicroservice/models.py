@@ -1,8 +1,13 @@
-from pydantic import BaseModel
+from datetime import date
+from typing import Any, Optional, List, Union
+from pydantic import BaseModel, Field, ValidationError, model_validator
+from LearningPlanComponents.utils import PlanValidator
 
 class LearningPlanRequest(BaseModel):
     goal: str
     duration: str
+    deadline_seconds: Optional[float] = None  # overrides PLAN_DEADLINE_SECONDS for this request
+    start_date: Optional[date] = None  # day 1 of the plan for date lookups; defaults to today
 
 class ResourceItem(BaseModel):
     title: str
@@ -21,4 +26,130 @@ class LearningPlanResponse(BaseModel):
     totalDays: int
     monthlyTasks: list[TaskItem]
     weeklyTasks: list[TaskItem]
-    dailyTasks: list[TaskItem]
\ No newline at end of file
+    dailyTasks: list[TaskItem]
+    source: Optional[str] = None  # cache, llm, llm+fallback or fallback
+    planId: Optional[str] = None  # set when the plan was saved; see GET /plans/{planId}
+
+# Tolerant variants of the models above for parsing Gemini's answer in one compiled pass
+# (GeneratedPlan.model_validate_json on the cleaned text), filling the same defaults as
+# PlanValidator. A list with an entry that does not fit falls through to Any as raw data
+# instead of failing the plan; one after-validator then applies the position-dependent
+# defaults and re-validates or replaces raw entries the way PlanValidator does. Unions
+# sit at list level only, and there are no per-field Python validators, so well-formed
+# answers never leave pydantic-core until that final pass.
+class GeneratedResourceItem(ResourceItem):
+    title: Optional[str] = None  # "Resource N" by position
+    type: Any = "general"  # anything outside VALID_RESOURCE_TYPES becomes "general"
+    url: str = ""
+    description: Optional[str] = None  # defaults to the title
+
+class GeneratedTaskItem(TaskItem):
+    label: Optional[str] = None  # "Task N" by position
+    tasks: Union[List[str], Any] = Field(default=[], union_mode="left_to_right")
+    resources: Union[List[GeneratedResourceItem], Any] = Field(default=[], union_mode="left_to_right")
+
+GeneratedSection = Union[List[GeneratedTaskItem], Any]
+
+def _generated_item(item: Any, index: int) -> GeneratedTaskItem:
+    if isinstance(item, dict):
+        try:
+            return GeneratedTaskItem.model_validate(item)
+        except ValidationError:
+            pass
+    return GeneratedTaskItem(label=f"Task {index+1}")
+
+def _generated_resource(resource: Any, index: int) -> GeneratedResourceItem:
+    if isinstance(resource, dict):
+        try:
+            return GeneratedResourceItem.model_validate(resource)
+        except ValidationError:
+            resource = None
+    return GeneratedResourceItem(
+        title=str(resource) if resource else f"Resource {index+1}",
+        description=str(resource) if resource else "",
+    )
+
+class GeneratedPlan(LearningPlanResponse):
+    goalTitle: str = "Learning Goal"
+    totalDays: int = 30
+    monthlyTasks: GeneratedSection = Field(default=[], union_mode="left_to_right")
+    weeklyTasks: GeneratedSection = Field(default=[], union_mode="left_to_right")
+    dailyTasks: GeneratedSection = Field(default=[], union_mode="left_to_right")
+
+    @model_validator(mode="after")
+    def _fill_defaults(self) -> "GeneratedPlan":
+        valid_types = PlanValidator.VALID_RESOURCE_TYPES
+        for section in ("monthlyTasks", "weeklyTasks", "dailyTasks"):
+            items = getattr(self, section)
+            if not isinstance(items, list):
+                setattr(self, section, [])
+                continue
+            for i, item in enumerate(items):
+                if not isinstance(item, GeneratedTaskItem):
+                    item = items[i] = _generated_item(item, i)
+                if item.label is None:
+                    item.label = f"Task {i+1}"
+                tasks = item.tasks
+                if not isinstance(tasks, list):
+                    item.tasks = [str(tasks)] if tasks else []
+                elif not all(isinstance(task, str) for task in tasks):
+                    item.tasks = [str(task) for task in tasks]
+                resources = item.resources
+                if not isinstance(resources, list):
+                    item.resources = []
+                    continue
+                for j, resource in enumerate(resources):
+                    if not isinstance(resource, GeneratedResourceItem):
+                        resource = resources[j] = _generated_resource(resource, j)
+                    if resource.title is None:
+                        resource.title = f"Resource {j+1}"
+                    if resource.description is None:
+                        resource.description = resource.title
+                    if resource.type not in valid_types:
+                        resource.type = "general"
+        return self
+
+class UserContext(BaseModel):
+    skill_level: Optional[str] = "beginner"
+    learning_style: Optional[str] = "practical"
+    daily_time: Optional[str] = "1-2 hours"
+    specific_interests: Optional[List[str]] = []
+    practical_goals: Optional[List[str]] = []
+
+class BatchPlanItem(LearningPlanRequest):
+    user_context: Optional[UserContext] = None  # legacy defaults when omitted
+
+class BatchPlanRequest(BaseModel):
+    items: list[BatchPlanItem]
+    stream: bool = False  # emit each result as NDJSON as soon as it completes
+
+class BatchPlanItemResult(BaseModel):
+    index: int
+    plan: Optional[LearningPlanResponse] = None
+    error: Optional[str] = None
+
+class BatchPlanResponse(BaseModel):
+    results: list[BatchPlanItemResult]
+    unique_items: int
+
+
+class PlanSummary(BaseModel):
+    planId: str
+    goalTitle: str
+    totalDays: int
+    startDate: date
+    createdAt: float
+    monthlyTasks: list[TaskItem]
+    weeklyCount: int
+    dailyCount: int
+    source: Optional[str] = None
+
+class PlanSlice(BaseModel):
+    planId: str
+    section: str  # "daily" or "weekly"
+    offset: int
+    limit: int
+    total: int
+    startDate: date  # date of the first returned item (its week start for weekly slices)
+    items: list[TaskItem]
+    nextOffset: Optional[int] = None  # None on the last page
@@ -0,0 +1,390 @@
+# observability.py
+import asyncio
+import atexit
+import bisect
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; the fast end covers in-process stages, the slow end Gemini calls and whole plans
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Spans kept per request for its "request finished" log line; batches can run dozens of plans
+TRACE_MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", 500))
+
+# Carried through every log record and returned to the client as X-Request-ID
+correlation_id: ContextVar[str] = ContextVar("correlation_id", default="-")
+# (stage, attempt, outcome, seconds) per span recorded while serving the current request
+_trace: ContextVar[Optional[List[Tuple[str, int, str, float]]]] = ContextVar("trace", default=None)
+
+logger = logging.getLogger(__name__)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Counter:
+    """Monotonic counter per label set; label values are passed positionally in `labelnames` order"""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self, constant: Sequence[Tuple[str, str]] = ()) -> Iterator[str]:
+        """Sample lines; `constant` (name, value) label pairs come first on every one"""
+        names = tuple(name for name, _ in constant) + self.labelnames
+        prefix = tuple(value for _, value in constant)
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}_total{_format_labels(names, prefix + labels)} {value}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, rendered in the Prometheus text format"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last one is +Inf), sum]
+        self._values: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][position] += 1
+            state[1] += value
+
+    def count(self, *labels: str) -> int:
+        state = self._values.get(labels)
+        return sum(state[0]) if state else 0
+
+    def samples(self, constant: Sequence[Tuple[str, str]] = ()) -> Iterator[str]:
+        """Sample lines; `constant` (name, value) label pairs come first on every one"""
+        names = tuple(name for name, _ in constant) + self.labelnames
+        prefix = tuple(value for _, value in constant)
+        with self._lock:
+            values = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._values.items())
+        bucket_names = names + ("le",)
+        for labels, (counts, total) in values:
+            labels = prefix + labels
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                yield f"{self.name}_bucket{_format_labels(bucket_names, labels + (le,))} {cumulative}"
+            rendered = _format_labels(names, labels)
+            yield f"{self.name}_sum{rendered} {total}"
+            yield f"{self.name}_count{rendered} {cumulative}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name!r} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self, constant: Sequence[Tuple[str, str]] = ()) -> str:
+        """Every metric in the Prometheus text exposition format (version 0.0.4), with the
+        `constant` (name, value) labels added to each sample"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples(constant))
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "plan_stage_duration_seconds", "Time spent in one stage of plan generation",
+    ("stage", "category", "attempt", "outcome")
+)
+PLAN_SECONDS = REGISTRY.histogram(
+    "plan_generation_duration_seconds", "Time to produce a plan, by where it came from",
+    ("category", "source")
+)
+PLANS = REGISTRY.counter("plan_requests", "Plans requested, by where they came from", ("category", "source"))
+HTTP_SECONDS = REGISTRY.histogram("http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+HTTP_REQUESTS = REGISTRY.counter("http_requests", "HTTP requests served", ("method", "route", "status"))
+
+# "off" turns spans and plan metrics into no-ops, for measuring their overhead
+METRICS_MODE = os.getenv("METRICS_MODE", "on")
+if METRICS_MODE not in ("on", "off"):
+    raise ValueError(f"Unknown METRICS_MODE {METRICS_MODE!r}, expected 'on' or 'off'")
+_enabled = METRICS_MODE == "on"
+
+
+def set_enabled(enabled: bool) -> None:
+    global _enabled
+    _enabled = enabled
+
+
+class Span:
+    """Times one stage into STAGE_SECONDS and the current request's trace.
+
+    The outcome is "ok" unless the block sets `outcome` or raises ("error", "cancelled").
+    """
+    __slots__ = ("stage", "category", "attempt", "outcome", "_start")
+
+    def __init__(self, stage: str, category: str = "", attempt: int = 0):
+        self.stage = stage
+        self.category = category
+        self.attempt = attempt
+        self.outcome = "ok"
+
+    def __enter__(self) -> "Span":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        elapsed = time.perf_counter() - self._start
+        if exc_type is not None and self.outcome == "ok":
+            self.outcome = "cancelled" if issubclass(exc_type, asyncio.CancelledError) else "error"
+        STAGE_SECONDS.observe(elapsed, self.stage, self.category, str(self.attempt) if self.attempt else "", self.outcome)
+        trace = _trace.get()
+        if trace is not None and len(trace) < TRACE_MAX_SPANS:
+            trace.append((self.stage, self.attempt, self.outcome, elapsed))
+        return False
+
+
+class _NullSpan:
+    __slots__ = ("category", "outcome")
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+def span(stage: str, category: str = "", attempt: int = 0):
+    """Context manager timing a plan-generation stage; `attempt` is the Gemini attempt number, 0 for none"""
+    return Span(stage, category, attempt) if _enabled else _NullSpan()
+
+
+def observe_plan(seconds: float, category: str, source: str) -> None:
+    if _enabled:
+        PLAN_SECONDS.observe(seconds, category, source)
+        PLANS.inc(category, source)
+
+
+def render_metrics() -> str:
+    """This process's metrics. Prefork workers (run_server.py) each keep their own and label
+    them with their worker slot, so a scrape covers whichever worker accepted it."""
+    worker = os.getenv("PREFORK_WORKER_INDEX")
+    return REGISTRY.render((("worker", worker),) if worker is not None else ())
+
+
+def _trace_fields(trace) -> List[Dict[str, Any]]:
+    fields = []
+    for stage, attempt, outcome, seconds in trace:
+        entry = {"stage": stage, "ms": round(seconds * 1e3, 3), "outcome": outcome}
+        if attempt:
+            entry["attempt"] = attempt
+        fields.append(entry)
+    return fields
+
+
+# Attributes every LogRecord has; anything else on a record came from `extra=` and is logged as a field
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "correlation_id"}
+
+
+def _extra_fields(record: logging.LogRecord) -> Dict[str, Any]:
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES}
+
+
+class _RecordQueueHandler(logging.handlers.QueueHandler):
+    """Queues records for the writer thread, doing as little as possible in the caller.
+
+    Stamps the correlation ID (a context variable, so it must be read here) and merges
+    the message arguments, but skips QueueHandler's copy and formatting pass and the
+    handler lock; SimpleQueue is already thread-safe.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.correlation_id = correlation_id.get()
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _EXCEPTION_FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        self.queue.put_nowait(self.prepare(record))
+        return True
+
+
+_EXCEPTION_FORMATTER = logging.Formatter()
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "correlation_id": getattr(record, "correlation_id", "-"),
+        }
+        entry.update(_extra_fields(record))
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s [%(correlation_id)s] %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        if not hasattr(record, "correlation_id"):
+            record.correlation_id = "-"
+        fields = _extra_fields(record)
+        line = super().format(record)
+        if fields:
+            line += " " + " ".join(f"{key}={json.dumps(value, default=str)}" for key, value in fields.items())
+        return line
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def configure_logging(level: str = None, log_format: str = None) -> None:
+    """Route all logging through a queue to one stdout writer thread (idempotent).
+
+    Callers only build the record and enqueue it; formatting and the write to stdout
+    happen on the writer thread, so a slow log consumer cannot stall the event loop. LOG_LEVEL and LOG_FORMAT ("text" or "json")
+    are read from the environment when not given.
+    """
+    global _listener
+    if _listener is not None:
+        return
+    level = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+    log_format = log_format or os.getenv("LOG_FORMAT", "text")
+    if log_format not in ("text", "json"):
+        raise ValueError(f"Unknown LOG_FORMAT {log_format!r}, expected 'text' or 'json'")
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter() if log_format == "json" else TextFormatter())
+    handler = _RecordQueueHandler(queue.SimpleQueue())
+    root = logging.getLogger()
+    root.addHandler(handler)
+    root.setLevel(level)
+    # httpx logs every Gemini request at INFO
+    for name in ("httpx", "httpcore"):
+        logging.getLogger(name).setLevel(max(logging.WARNING, root.level))
+    _listener = logging.handlers.QueueListener(handler.queue, output)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _request_id(scope) -> str:
+    for name, value in scope.get("headers", ()):
+        if name == b"x-request-id":
+            value = value.decode("latin-1").strip()
+            # Client-supplied IDs end up in logs; keep them short and printable
+            if 0 < len(value) <= 128 and value.isprintable():
+                return value
+            break
+    return uuid.uuid4().hex
+
+
+class RequestContextMiddleware:
+    """ASGI middleware giving each HTTP request a correlation ID, a trace and HTTP metrics.
+
+    The ID comes from the X-Request-ID header or is generated, and is echoed back in
+    the response. When the request ends (after the last streamed chunk) one log line
+    records its route, status, latency and the stage spans recorded while serving it.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        request_id = _request_id(scope)
+        id_token = correlation_id.set(request_id)
+        trace = []
+        trace_token = _trace.set(trace)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", ())) + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            elapsed = time.perf_counter() - start
+            # Route templates, not raw paths, so plan IDs do not become label values
+            route = getattr(scope.get("route"), "path", "unmatched")
+            method = scope["method"]
+            HTTP_SECONDS.observe(elapsed, method, route)
+            HTTP_REQUESTS.inc(method, route, str(status))
+            logger.info("request finished", extra={"method": method, "route": route, "status": status,
+                                                   "duration_ms": round(elapsed * 1e3, 3), "stages": _trace_fields(trace)})
+            _trace.reset(trace_token)
+            correlation_id.reset(id_token)
@@ -0,0 +1,259 @@
+# plan_cache.py
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+try:
+    import orjson
+
+    def _dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+    _loads = json.loads
+
+
+_BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+_VERSIONED_SOURCES = [
+    os.path.join(_BASE_DIR, "templates.py"),
+]
+
+
+def compute_content_version(curricula_hash: str = "") -> str:
+    """Hash of the prompt templates and curricula data, so edits to either invalidate cached plans"""
+    digest = hashlib.sha256()
+    for path in _VERSIONED_SOURCES:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    digest.update(curricula_hash.encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def normalize_goal(goal: str) -> str:
+    return " ".join(goal.lower().split())
+
+
+def make_plan_key(goal: str, totals: Dict[str, int], subject_category: str,
+                  user_context: Optional[Dict[str, Any]], content_version: str) -> str:
+    payload = json.dumps(
+        [normalize_goal(goal), totals, subject_category, user_context or {}, content_version],
+        sort_keys=True, default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LRUTTLCache:
+    """Bounded in-memory LRU of serialized plans with per-entry expiry"""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 86400):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, payload = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return payload
+
+    def set(self, key: str, payload: bytes) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLitePlanStore:
+    """Persistent cache tier that survives restarts.
+
+    The file can be shared by the worker processes of one host: besides the plans it
+    holds their generation leases (see single_flight.SharedFlight).
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 86400):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS plan_cache ("
+            "key TEXT PRIMARY KEY, payload BLOB NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS plan_leases ("
+            "key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, expires_at FROM plan_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < time.time():
+                self._conn.execute("DELETE FROM plan_cache WHERE key = ?", (key,))
+                self.expirations += 1
+                return None
+            return bytes(row[0])
+
+    def set(self, key: str, payload: bytes) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO plan_cache (key, payload, expires_at) VALUES (?, ?, ?)",
+                (key, payload, time.time() + self.ttl_seconds),
+            )
+
+    def acquire_lease(self, key: str, owner: str, seconds: float) -> bool:
+        """Take the lease on key for owner unless another owner holds one that has not expired"""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO plan_leases (key, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE plan_leases.expires_at < ? OR plan_leases.owner = excluded.owner",
+                (key, owner, now + seconds, now),
+            )
+            return cursor.rowcount > 0
+
+    def release_lease(self, key: str, owner: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM plan_leases WHERE key = ? AND owner = ?", (key, owner))
+
+    def lease_holder(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT owner FROM plan_leases WHERE key = ? AND expires_at >= ?", (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class PlanCache:
+    """Two-tier plan cache: in-memory LRU in front of an optional SQLite store.
+
+    Plans are stored already serialized, so a memory hit is a dict lookup plus
+    one JSON decode and callers always receive a private copy. Coroutines use the
+    a-prefixed methods, which keep memory hits inline and run SQLite in a thread.
+    """
+
+    def __init__(self, memory: LRUTTLCache, disk: Optional[SQLitePlanStore] = None):
+        self.memory = memory
+        self.disk = disk
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    @classmethod
+    def from_env(cls) -> "PlanCache":
+        ttl = float(os.getenv("PLAN_CACHE_TTL_SECONDS", 86400))
+        memory = LRUTTLCache(int(os.getenv("PLAN_CACHE_MAX_ENTRIES", 1024)), ttl)
+        db_path = os.getenv("PLAN_CACHE_DB_PATH", "plan_cache.db")
+        disk = SQLitePlanStore(db_path, ttl) if db_path else None
+        return cls(memory, disk)
+
+    def get_serialized(self, key: str) -> Optional[bytes]:
+        payload = self.memory.get(key)
+        if payload is not None:
+            self.memory_hits += 1
+            return payload
+
+        if self.disk is not None:
+            payload = self.disk.get(key)
+            if payload is not None:
+                self.disk_hits += 1
+                self.memory.set(key, payload)
+                return payload
+
+        self.misses += 1
+        return None
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        payload = self.get_serialized(key)
+        return _loads(payload) if payload is not None else None
+
+    async def aget(self, key: str) -> Optional[Dict[str, Any]]:
+        payload = self.memory.get(key)
+        if payload is not None:
+            self.memory_hits += 1
+            return _loads(payload)
+        
+        if self.disk is not None:
+            payload = await asyncio.to_thread(self.disk.get, key)
+            if payload is not None:
+                self.disk_hits += 1
+                self.memory.set(key, payload)
+                return _loads(payload)
+        
+        self.misses += 1
+        return None
+
+    async def aget_shared(self, key: str) -> Optional[Dict[str, Any]]:
+        """Disk-tier lookup for a plan another process is writing; polling it counts no misses"""
+        payload = await asyncio.to_thread(self.disk.get, key) if self.disk is not None else None
+        if payload is None:
+            return None
+        self.disk_hits += 1
+        self.memory.set(key, payload)
+        return _loads(payload)
+
+    def set(self, key: str, plan: Dict[str, Any]) -> None:
+        payload = _dumps(plan)
+        self.memory.set(key, payload)
+        if self.disk is not None:
+            self.disk.set(key, payload)
+        self.writes += 1
+
+    async def aset(self, key: str, plan: Dict[str, Any]) -> None:
+        payload = _dumps(plan)
+        self.memory.set(key, payload)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.set, key, payload)
+        self.writes += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evictions": self.memory.evictions,
+            "expirations": self.memory.expirations + (self.disk.expirations if self.disk else 0),
+            "memory_entries": len(self.memory),
+        }
+
+    def close(self) -> None:
+        if self.disk is not None:
+            self.disk.close()
@@ -0,0 +1,187 @@
+# plan_repair.py
+import logging
+import re
+from typing import Dict, Any, List, Optional, Tuple
+from observability import span
+from templates import get_repair_prompt
+from LearningPlanComponents.utils import ResponseCleaner, PlanValidator, SECTION_TOTALS, SECTION_LABELS
+from LearningPlanComponents.fallback_plan_generator import FallbackPlanGenerator
+from LearningPlanComponents.stream_parser import salvage_plan_items
+
+logger = logging.getLogger(__name__)
+
+_LABEL_NUMBER = re.compile(r'(\d+)')
+
+Slots = Dict[str, List[Optional[Dict[str, Any]]]]
+
+
+class PlanRepairer:
+    """Repairs a partially valid plan instead of regenerating it from scratch.
+
+    Valid months/weeks/days are kept in place (by label number where possible),
+    surplus entries are trimmed, and only the missing or malformed slots are sent
+    back to Gemini in one small targeted prompt. Whatever is still missing after
+    that is filled from the curriculum-based fallback plan.
+    """
+
+    def __init__(self, llm, response_cleaner: ResponseCleaner, plan_validator: PlanValidator,
+                 fallback_generator: FallbackPlanGenerator, max_llm_items: int = 40):
+        self.llm = llm
+        self.response_cleaner = response_cleaner
+        self.plan_validator = plan_validator
+        self.fallback_generator = fallback_generator
+        self.max_llm_items = max_llm_items
+        
+        self.repairs = 0
+        self.full_retries_avoided = 0
+        self.items_kept = 0
+        self.items_regenerated = 0
+        self.items_filled = 0
+        self.items_trimmed = 0
+    
+    @staticmethod
+    def is_usable(item: Any) -> bool:
+        if not isinstance(item, dict) or not isinstance(item.get("tasks"), list):
+            return False
+        return any(isinstance(task, str) and task.strip() for task in item["tasks"])
+    
+    def place_items(self, items: List[Any], start: int, count: int) -> List[Optional[Dict[str, Any]]]:
+        """Lay usable items into `count` slots covering absolute indices [start, start + count).
+        
+        Items whose label number falls inside the range go to that slot first; the rest fill
+        the remaining free slots in order. Anything left over is trimmed.
+        """
+        slots: List[Optional[Dict[str, Any]]] = [None] * count
+        unplaced = []
+        for item in items:
+            if not self.is_usable(item):
+                continue
+            match = _LABEL_NUMBER.search(str(item.get("label", "")))
+            slot = int(match.group(1)) - 1 - start if match else -1
+            if 0 <= slot < count and slots[slot] is None:
+                slots[slot] = dict(item)
+            else:
+                unplaced.append(item)
+        
+        free = (i for i, slot in enumerate(slots) if slot is None)
+        for item in unplaced:
+            slot = next(free, None)
+            if slot is None:
+                self.items_trimmed += 1
+                continue
+            slots[slot] = dict(item)
+        return slots
+    
+    def place_plan(self, items_by_section: Dict[str, List[Any]], totals: Dict[str, int]) -> Slots:
+        return {
+            section: self.place_items(items_by_section.get(section) or [], 0, totals[total_key])
+            for section, total_key in SECTION_TOTALS.items()
+        }
+    
+    @staticmethod
+    def count_missing(slots: Slots) -> int:
+        return sum(1 for section in slots.values() for slot in section if slot is None)
+    
+    async def arepair(self, items_by_section: Dict[str, List[Any]], goal: str, duration: str,
+                      totals: Dict[str, int], subject_category: str, user_context: Dict[str, Any],
+                      replace: Dict[str, List[int]] = None) -> Tuple[Dict[str, Any], int]:
+        """Return a plan with exact counts and how many items came from the fallback plan.
+        
+        `replace` lists indices per section whose existing items should be regenerated
+        even though they are structurally valid.
+        """
+        slots = self.place_plan(items_by_section, totals)
+        for section, indices in (replace or {}).items():
+            for index in indices:
+                if 0 <= index < len(slots[section]):
+                    slots[section][index] = None
+        
+        self.repairs += 1
+        plan, filled = await self.afill_slots(slots, goal, duration, totals, subject_category, user_context)
+        return plan, filled
+    
+    async def afill_slots(self, slots: Slots, goal: str, duration: str, totals: Dict[str, int],
+                          subject_category: str, user_context: Dict[str, Any]) -> Tuple[Dict[str, Any], int]:
+        missing = {section: [i for i, slot in enumerate(items) if slot is None] for section, items in slots.items()}
+        missing_count = sum(len(indices) for indices in missing.values())
+        self.items_kept += sum(len(items) for items in slots.values()) - missing_count
+        
+        if missing_count and missing_count <= self.max_llm_items:
+            with span("repair", subject_category) as stage:
+                regenerated = await self._aregenerate(slots, missing, goal, subject_category, user_context)
+                if regenerated < missing_count:
+                    stage.outcome = "partial"
+            self.items_regenerated += regenerated
+            logger.info("Repair regenerated %d of %d missing items", regenerated, missing_count)
+        
+        filled = 0
+        fallback_plan = None
+        plan = {"goalTitle": goal, "totalDays": totals["total_days"]}
+        for section, items in slots.items():
+            section_items = []
+            for index, item in enumerate(items):
+                if item is None:
+                    if fallback_plan is None:
+                        fallback_plan = self.fallback_generator.create_intelligent_fallback_plan(goal, duration, user_context)
+                    item = dict(fallback_plan[section][index])
+                    filled += 1
+                item = self.plan_validator.validate_task_item(item, index)
+                item["label"] = f"{SECTION_LABELS[section]} {index + 1}"
+                section_items.append(item)
+            plan[section] = section_items
+        
+        self.items_filled += filled
+        return plan, filled
+    
+    async def _aregenerate(self, slots: Slots, missing: Dict[str, List[int]], goal: str,
+                           subject_category: str, user_context: Dict[str, Any]) -> int:
+        missing_labels = {
+            section: [f"{SECTION_LABELS[section]} {i + 1}" for i in indices]
+            for section, indices in missing.items()
+        }
+        neighbour_tasks = {}
+        for section, indices in missing.items():
+            for index in indices:
+                for neighbour in (index - 1, index + 1):
+                    if 0 <= neighbour < len(slots[section]) and slots[section][neighbour] is not None:
+                        label = f"{SECTION_LABELS[section]} {neighbour + 1}"
+                        neighbour_tasks[label] = "; ".join(str(t) for t in slots[section][neighbour]["tasks"])
+        
+        prompt = get_repair_prompt(goal, subject_category, user_context, missing_labels, neighbour_tasks)
+        try:
+            raw_response = await self.llm.ainvoke(prompt)
+        except Exception as e:
+            logger.warning("Repair call failed: %s", e)
+            return 0
+        
+        salvaged = salvage_plan_items(self.response_cleaner.clean_json_response(raw_response))
+        regenerated = 0
+        for section, indices in missing.items():
+            wanted = set(indices)
+            leftovers = []
+            for item in salvaged.get(section, []):
+                if not self.is_usable(item):
+                    continue
+                match = _LABEL_NUMBER.search(str(item.get("label", "")))
+                index = int(match.group(1)) - 1 if match else -1
+                if index in wanted:
+                    slots[section][index] = dict(item)
+                    wanted.discard(index)
+                    regenerated += 1
+                else:
+                    leftovers.append(item)
+            # Unlabelled or mislabelled answers go to the remaining gaps in order
+            for index, item in zip(sorted(wanted), leftovers):
+                slots[section][index] = dict(item)
+                regenerated += 1
+        return regenerated
+    
+    def stats(self) -> Dict[str, int]:
+        return {
+            "repairs": self.repairs,
+            "full_retries_avoided": self.full_retries_avoided,
+            "items_kept": self.items_kept,
+            "items_regenerated": self.items_regenerated,
+            "items_filled_from_fallback": self.items_filled,
+            "items_trimmed": self.items_trimmed,
+        }
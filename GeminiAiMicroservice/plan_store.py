@@ -0,0 +1,177 @@
+# plan_store.py
+import datetime
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+from plan_cache import _dumps, _loads
+
+PAGED_SECTIONS = ("dailyTasks", "weeklyTasks")
+
+
+class PlanStore:
+    """Generated plans saved under a plan ID so clients can fetch them piecewise.
+
+    Unlike PlanCache, whose keys are derived from the request, entries here are
+    addressed by the planId handed to the client. Each paged section is stored as
+    zlib-compressed chunks of `chunk_size` items, so reading a week of a year-long plan
+    decompresses one chunk instead of the whole plan. Plans are immutable once saved and
+    their ETag is a hash of the full plan.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 90 * 86400, chunk_size: int = 14,
+                 compression_level: int = 6):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.chunk_size = chunk_size
+        self.compression_level = compression_level
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS plans ("
+            "plan_id TEXT PRIMARY KEY, summary BLOB NOT NULL, etag TEXT NOT NULL, start_date TEXT NOT NULL, "
+            "created_at REAL NOT NULL, expires_at REAL NOT NULL, chunk_size INTEGER NOT NULL, "
+            "weekly_count INTEGER NOT NULL, daily_count INTEGER NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS plan_chunks ("
+            "plan_id TEXT NOT NULL, section TEXT NOT NULL, chunk INTEGER NOT NULL, payload BLOB NOT NULL, "
+            "PRIMARY KEY (plan_id, section, chunk)) WITHOUT ROWID"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS plans_expires_at ON plans (expires_at)")
+        self.saves = 0
+        self.summary_reads = 0
+        self.slice_reads = 0
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+        self.purged = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["PlanStore"]:
+        """None when PLAN_STORE_DB_PATH is set empty, which disables saving plans"""
+        db_path = os.getenv("PLAN_STORE_DB_PATH", "plan_store.db")
+        if not db_path:
+            return None
+        return cls(
+            db_path,
+            ttl_seconds=float(os.getenv("PLAN_STORE_TTL_SECONDS", 90 * 86400)),
+            chunk_size=int(os.getenv("PLAN_STORE_CHUNK_SIZE", 14)),
+        )
+
+    def _compress(self, obj: Any) -> bytes:
+        raw = _dumps(obj)
+        payload = zlib.compress(raw, self.compression_level)
+        self.raw_bytes += len(raw)
+        self.stored_bytes += len(payload)
+        return payload
+
+    def save(self, plan: Dict[str, Any], start_date: Optional[datetime.date] = None) -> str:
+        """Persist a plan and return its new plan ID; start_date anchors date lookups (default today)"""
+        plan_id = uuid.uuid4().hex
+        start_date = start_date or datetime.date.today()
+        now = time.time()
+        summary = {key: value for key, value in plan.items() if key not in PAGED_SECTIONS}
+        rows = [
+            (plan_id, section, chunk, self._compress(items[offset:offset + self.chunk_size]))
+            for section in PAGED_SECTIONS
+            for items in [plan.get(section, [])]
+            for chunk, offset in enumerate(range(0, len(items), self.chunk_size))
+        ]
+        etag = hashlib.sha256(_dumps(plan)).hexdigest()[:20]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute(
+                    "INSERT INTO plans (plan_id, summary, etag, start_date, created_at, expires_at, chunk_size, "
+                    "weekly_count, daily_count) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (plan_id, self._compress(summary), etag, start_date.isoformat(), now, now + self.ttl_seconds,
+                     self.chunk_size, len(plan.get("weeklyTasks", [])), len(plan.get("dailyTasks", []))),
+                )
+                self._conn.executemany(
+                    "INSERT INTO plan_chunks (plan_id, section, chunk, payload) VALUES (?, ?, ?, ?)", rows
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self.saves += 1
+            if self.saves % 100 == 0:
+                self._purge_expired(now)
+        return plan_id
+
+    def _purge_expired(self, now: float) -> None:
+        expired = [row[0] for row in self._conn.execute("SELECT plan_id FROM plans WHERE expires_at < ?", (now,))]
+        for plan_id in expired:
+            self._conn.execute("DELETE FROM plan_chunks WHERE plan_id = ?", (plan_id,))
+            self._conn.execute("DELETE FROM plans WHERE plan_id = ?", (plan_id,))
+        self.purged += len(expired)
+
+    def _meta(self, plan_id: str) -> Optional[Tuple]:
+        row = self._conn.execute(
+            "SELECT summary, etag, start_date, created_at, expires_at, chunk_size, weekly_count, daily_count "
+            "FROM plans WHERE plan_id = ?", (plan_id,)
+        ).fetchone()
+        if row is None or row[4] < time.time():
+            return None
+        return row
+
+    def etag(self, plan_id: str) -> Optional[str]:
+        """Cheap existence/version check for conditional requests"""
+        with self._lock:
+            row = self._conn.execute("SELECT etag, expires_at FROM plans WHERE plan_id = ?", (plan_id,)).fetchone()
+        return row[0] if row is not None and row[1] >= time.time() else None
+
+    def get_summary(self, plan_id: str) -> Optional[Dict[str, Any]]:
+        """Everything except the paged sections, plus their sizes; None if unknown or expired"""
+        with self._lock:
+            row = self._meta(plan_id)
+        if row is None:
+            return None
+        self.summary_reads += 1
+        summary, etag, start_date, created_at, _, _, weekly_count, daily_count = row
+        return dict(_loads(zlib.decompress(summary)), planId=plan_id, etag=etag, startDate=start_date,
+                    createdAt=created_at, weeklyCount=weekly_count, dailyCount=daily_count)
+
+    def get_slice(self, plan_id: str, section: str, offset: int,
+                  limit: int) -> Optional[Tuple[List[Dict[str, Any]], int, str, str]]:
+        """(items[offset:offset + limit], section total, etag, start date); None if unknown or expired"""
+        if section not in PAGED_SECTIONS:
+            raise ValueError(f"Unknown section {section!r}, expected one of {PAGED_SECTIONS}")
+        with self._lock:
+            row = self._meta(plan_id)
+            if row is None:
+                return None
+            chunk_size = row[5]
+            payloads = self._conn.execute(
+                "SELECT payload FROM plan_chunks WHERE plan_id = ? AND section = ? AND chunk BETWEEN ? AND ? "
+                "ORDER BY chunk",
+                (plan_id, section, offset // chunk_size, (offset + limit - 1) // chunk_size),
+            ).fetchall() if limit > 0 else []
+        self.slice_reads += 1
+        items = [item for (payload,) in payloads for item in _loads(zlib.decompress(payload))]
+        start = offset % chunk_size
+        total = row[6] if section == "weeklyTasks" else row[7]
+        return items[start:start + limit], total, row[1], row[2]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            plans = self._conn.execute("SELECT COUNT(*) FROM plans").fetchone()[0]
+        return {
+            "plans": plans,
+            "saves": self.saves,
+            "summary_reads": self.summary_reads,
+            "slice_reads": self.slice_reads,
+            "purged": self.purged,
+            "compression_ratio": round(self.raw_bytes / self.stored_bytes, 2) if self.stored_bytes else None,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,209 @@
+# resilience.py
+import os
+import random
+import time
+from typing import Any, AsyncIterator, Dict, Optional
+from admission import AdmissionController
+from gemini_errors import GeminiError, CircuitOpenError
+from LearningPlanComponents.utils import estimate_tokens
+
+
+def compute_backoff(attempt: int, base: float = 0.5, cap: float = 8.0, retry_after: Optional[float] = None) -> float:
+    """Delay before retry number `attempt` (0-based).
+
+    Honours a server-provided Retry-After (plus up to 10% jitter so waiting clients do
+    not return in lockstep); otherwise exponential backoff with full jitter.
+    """
+    if retry_after is not None:
+        return retry_after * (1 + random.uniform(0, 0.1))
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class RetryPolicy:
+    """Decides whether and how long to wait before re-sending a failed Gemini call"""
+
+    def __init__(self, base_delay: float = 0.5, max_delay: float = 8.0, max_retry_after: float = 20.0):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        # A Retry-After longer than this (e.g. an exhausted daily quota) is not worth waiting for
+        self.max_retry_after = max_retry_after
+        
+        self.retries = 0
+        self.gave_up = 0
+
+    @classmethod
+    def from_env(cls) -> "RetryPolicy":
+        return cls(
+            base_delay=float(os.getenv("GEMINI_BACKOFF_BASE_SECONDS", 0.5)),
+            max_delay=float(os.getenv("GEMINI_BACKOFF_MAX_SECONDS", 8)),
+            max_retry_after=float(os.getenv("GEMINI_MAX_RETRY_AFTER_SECONDS", 20)),
+        )
+
+    def delay_for(self, attempt: int, error: GeminiError) -> Optional[float]:
+        """Seconds to sleep before the next attempt, or None when the call should not be retried"""
+        retry_after = getattr(error, "retry_after", None)
+        if not error.retryable or (retry_after is not None and retry_after > self.max_retry_after):
+            self.gave_up += 1
+            return None
+        self.retries += 1
+        return compute_backoff(attempt, self.base_delay, self.max_delay, retry_after)
+
+    def stats(self) -> Dict[str, int]:
+        return {"retries": self.retries, "gave_up": self.gave_up}
+
+
+class CircuitBreaker:
+    """Closed -> open after `failure_threshold` consecutive failures -> half-open after
+    `reset_timeout` seconds, where a single probe call decides whether to close again."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        
+        self.times_opened = 0
+        self.rejected_calls = 0
+
+    @classmethod
+    def from_env(cls) -> "CircuitBreaker":
+        return cls(
+            failure_threshold=int(os.getenv("GEMINI_BREAKER_FAILURE_THRESHOLD", 5)),
+            reset_timeout=float(os.getenv("GEMINI_BREAKER_RESET_SECONDS", 30)),
+        )
+
+    def _retry_after(self) -> float:
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def is_open(self) -> bool:
+        """True while calls would be rejected; does not claim the half-open probe"""
+        if self.state == self.OPEN:
+            return self._retry_after() > 0
+        return self.state == self.HALF_OPEN and self._probe_in_flight
+
+    def before_call(self) -> None:
+        if self.state == self.OPEN and self._retry_after() <= 0:
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+        
+        if self.state == self.OPEN or (self.state == self.HALF_OPEN and self._probe_in_flight):
+            self.rejected_calls += 1
+            raise CircuitOpenError("Gemini circuit breaker is open", retry_after=self._retry_after())
+        
+        if self.state == self.HALF_OPEN:
+            self._probe_in_flight = True
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+        self.state = self.CLOSED
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def record_abandoned(self) -> None:
+        """A call cancelled before Gemini answered says nothing about its health; free the
+        half-open probe slot so the next call probes instead"""
+        self._probe_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "rejected_calls": self.rejected_calls,
+        }
+
+
+class ResilientLLM:
+    """Routes GeminiLLM calls through admission control and a circuit breaker.
+
+    Exposes the same ainvoke/astream surface as the wrapped model, so the generator,
+    chunked generator and repairer share one rate budget and one breaker without
+    knowing about either. Each call reserves its prompt tokens plus
+    `output_token_estimate`, and the reservation is settled against the real size
+    once the answer is in.
+    """
+
+    def __init__(self, llm, breaker: CircuitBreaker, admission: AdmissionController = None,
+                 output_token_estimate: int = 2000):
+        self.llm = llm
+        self.breaker = breaker
+        self.admission = admission
+        self.output_token_estimate = output_token_estimate
+
+    def _record(self, error: Optional[BaseException]) -> None:
+        if error is None or (isinstance(error, GeminiError) and not error.trips_breaker):
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    async def _admit(self, prompt_tokens: int) -> int:
+        reserved = prompt_tokens + self.output_token_estimate
+        if self.admission:
+            await self.admission.acquire(reserved)
+        return reserved
+
+    def _settle(self, reserved: int, actual: int) -> None:
+        if self.admission:
+            self.admission.settle(reserved, actual)
+
+    async def ainvoke(self, prompt: str, **kwargs) -> str:
+        prompt_tokens = estimate_tokens(prompt)
+        reserved = await self._admit(prompt_tokens)
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError:
+            self._settle(reserved, 0)
+            raise
+        try:
+            result = await self.llm.ainvoke(prompt, **kwargs)
+        except Exception as e:
+            self._settle(reserved, prompt_tokens)
+            self._record(e)
+            raise
+        except BaseException:
+            # Cancelled: the client went away or a deadline task was dropped
+            self._settle(reserved, prompt_tokens)
+            self.breaker.record_abandoned()
+            raise
+        self._settle(reserved, prompt_tokens + estimate_tokens(result))
+        self._record(None)
+        return result
+
+    async def astream(self, prompt: str, **kwargs) -> AsyncIterator[str]:
+        prompt_tokens = estimate_tokens(prompt)
+        reserved = await self._admit(prompt_tokens)
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError:
+            self._settle(reserved, 0)
+            raise
+        output_tokens = 0
+        try:
+            async for text in self.llm.astream(prompt, **kwargs):
+                output_tokens += estimate_tokens(text)
+                yield text
+        except Exception as e:
+            self._settle(reserved, prompt_tokens + output_tokens)
+            self._record(e)
+            raise
+        except BaseException:
+            # Cancelled, or the consumer closed the stream early (GeneratorExit)
+            self._settle(reserved, prompt_tokens + output_tokens)
+            self.breaker.record_abandoned()
+            raise
+        self._settle(reserved, prompt_tokens + output_tokens)
+        self._record(None)
@@ -0,0 +1,71 @@
+# response_encoding.py
+import gzip
+import os
+from typing import Dict, Optional
+
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed; the framing overhead is not worth it
+COMPRESSION_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", 1024))
+GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", 4))
+BROTLI_QUALITY = int(os.getenv("RESPONSE_BROTLI_QUALITY", 4))
+
+
+def supported_encodings() -> tuple:
+    """Content codings we can produce, most preferred first (br needs the optional brotli package)"""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Best supported coding allowed by an Accept-Encoding header, or None for identity"""
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip().lower()] = weight
+    candidates = [(weights.get(coding, weights.get("*", 0.0)), -rank, coding)
+                  for rank, coding in enumerate(supported_encodings())]
+    weight, _, coding = max(candidates)
+    return coding if weight > 0 else None
+
+
+def compress(body: bytes, encoding: Optional[str]) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, GZIP_LEVEL, mtime=0)
+    return body
+
+
+def encoded_response(body: bytes, accept_encoding: Optional[str], media_type: str = "application/json",
+                     status_code: int = 200) -> Response:
+    """Response for an already serialized body, compressed as negotiated with the client"""
+    headers = {"Vary": "Accept-Encoding"}
+    encoding = negotiate_encoding(accept_encoding) if len(body) >= COMPRESSION_MIN_BYTES else None
+    if encoding is not None:
+        body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, status_code=status_code, media_type=media_type, headers=headers)
+
+
+def model_response(model: BaseModel, accept_encoding: Optional[str]) -> Response:
+    """Serialize an already validated model with pydantic-core's JSON encoder and compress it.
+
+    Used instead of returning the model to FastAPI, whose response_model handling dumps,
+    re-validates and JSON-encodes it again through jsonable_encoder and json.dumps.
+    """
+    return encoded_response(model.__pydantic_serializer__.to_json(model), accept_encoding)
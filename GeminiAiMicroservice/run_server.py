@@ -1,8 +1,95 @@
-import uvicorn
+import gc
 import os
+import signal
+import time
+
+import uvicorn
 from dotenv import load_dotenv
 
-load_dotenv()  
+load_dotenv()
+
+
+def worker_count() -> int:
+    """WEB_CONCURRENCY worker processes; "auto" starts one per CPU this process may run on"""
+    value = os.getenv("WEB_CONCURRENCY", "1")
+    if value == "auto":
+        return len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    workers = int(value)
+    if workers < 1:
+        raise ValueError(f"WEB_CONCURRENCY must be 'auto' or at least 1, got {value!r}")
+    return workers
+
+
+def serve_preforked(config: uvicorn.Config, workers: int) -> None:
+    """Bind once, build the app's shared read-only state, then fork the workers.
+
+    Curricula, the subject matcher and compiled prompt templates are built here, so the
+    workers start with them as copy-on-write pages; gc.freeze() keeps the collector from
+    writing to (and so copying) those pages. Anything holding a connection or a thread
+    (Gemini transport, SQLite, log writer) is created per worker at startup. The workers
+    share the plan cache file and its generation leases, so one of them generates each
+    plan. A worker that dies is replaced; SIGINT or SIGTERM stops them all.
+
+    Everything else stays per worker. Each one gets GEMINI_RPM/workers and GEMINI_TPM/workers
+    (PREFORK_WORKERS), so together they keep to the host's quota; a worker whose share is
+    used up rejects work even if another has budget left. Circuit breakers open on each
+    worker's own failures. /stats and /metrics report the worker that answers; metric
+    samples carry its slot (PREFORK_WORKER_INDEX) as the `worker` label.
+    """
+    sock = config.bind_socket()
+    import main  # noqa: F401  imports the app and its models before fork
+    from learning_plan_generator import preload_shared_state
+    preload_shared_state()
+    gc.freeze()
+    os.environ["PREFORK_WORKERS"] = str(workers)
+
+    children = {}  # pid -> worker slot, which a replacement inherits
+    stopping = False
+
+    def spawn(index: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            os.environ["PREFORK_WORKER_INDEX"] = str(index)
+            # Own process group, so a terminal Ctrl-C reaches only the supervisor, which
+            # forwards one SIGTERM; uvicorn installs its own handlers in Server.run
+            os.setpgid(0, 0)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            status = 1
+            try:
+                uvicorn.Server(config).run(sockets=[sock])
+                status = 0
+            finally:
+                os._exit(status)
+        children[pid] = index
+
+    def stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    print(f"Starting {workers} workers (supervisor pid {os.getpid()})", flush=True)
+    for index in range(workers):
+        spawn(index)
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        index = children.pop(pid, None)
+        if index is not None and not stopping:
+            print(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}, starting a replacement",
+                  flush=True)
+            time.sleep(1)  # do not spin when workers fail at startup
+            spawn(index)
+    sock.close()
+
 
 if __name__ == "__main__":
     if not os.getenv("GEMINI_API_KEY"):
@@ -11,10 +98,14 @@ if __name__ == "__main__":
         exit(1)
 
     port = int(os.getenv("PORT", 8000))  # Use PORT env var if available
+    workers = worker_count()
 
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=port,
-        reload=False
-    )
+    if workers == 1:
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=port,
+            reload=False
+        )
+    else:
+        serve_preforked(uvicorn.Config("main:app", host="0.0.0.0", port=port, reload=False), workers)
@@ -0,0 +1,134 @@
+# single_flight.py
+import asyncio
+import os
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Task"):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one in-flight execution.
+
+    The first caller for a key starts the work; later callers await the same task.
+    Results and exceptions are delivered to every waiter. A waiter that is cancelled
+    only detaches itself; the shared task is cancelled once no waiters remain.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            self.executions += 1
+            call.task.add_done_callback(lambda _task: self._forget(key, call))
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+
+    def _forget(self, key: str, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls),
+        }
+
+
+class SharedFlight:
+    """Extends SingleFlight's coalescing across the worker processes of one host.
+
+    Workers take a lease on the key in a shared store (plan_cache.SQLitePlanStore) before
+    running the work. A worker that finds the lease taken polls lookup() until the owner's
+    result appears there, and takes the lease over once it is released or expired with no
+    result, so failed or uncacheable generations are simply run again. The owner renews its
+    lease every third of lease_seconds while the work runs, however long that takes, so
+    the lease only expires when its owner died mid-generation.
+    """
+
+    def __init__(self, leases, lease_seconds: float = 120, poll_interval: float = 0.1):
+        self.leases = leases
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.executions = 0
+        self.waits = 0
+        self.shared = 0
+        self.takeovers = 0
+        self.renewals = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]],
+                 lookup: Callable[[], Awaitable[Optional[Any]]]) -> Any:
+        # The store is SQLite shared with the other workers; its calls run in threads, as a
+        # busy file can block for up to its timeout
+        waited = False
+        while True:
+            if await asyncio.to_thread(self.leases.acquire_lease, key, self.owner, self.lease_seconds):
+                try:
+                    # Another worker may have finished between our cache miss and the lease
+                    result = await lookup()
+                    if result is not None:
+                        self.shared += 1
+                        return result
+                    self.executions += 1
+                    self.takeovers += waited
+                    renewal = asyncio.ensure_future(self._renew(key))
+                    try:
+                        return await fn()
+                    finally:
+                        renewal.cancel()
+                finally:
+                    await asyncio.to_thread(self.leases.release_lease, key, self.owner)
+
+            if not waited:
+                self.waits += 1
+                waited = True
+            while True:
+                # Owners store their result before releasing, so check the lease first
+                released = await asyncio.to_thread(self.leases.lease_holder, key) is None
+                result = await lookup()
+                if result is not None:
+                    self.shared += 1
+                    return result
+                if released:
+                    break
+                await asyncio.sleep(self.poll_interval)
+
+    async def _renew(self, key: str) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            if not await asyncio.to_thread(self.leases.acquire_lease, key, self.owner, self.lease_seconds):
+                return  # expired while this worker was stalled and another one took it over
+            self.renewals += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "owner": self.owner,
+            "executions": self.executions,
+            "waits": self.waits,
+            "shared": self.shared,
+            "takeovers": self.takeovers,
+            "renewals": self.renewals,
+            "lease_seconds": self.lease_seconds,
+        }
@@ -1,11 +1,12 @@
 # templates.py
+from functools import lru_cache
+from string import Formatter
 
-def get_enhanced_personalized_prompt(goal: str, duration: str, total_days: int, total_weeks: int, total_months: int, 
-                                    subject_category: str, user_context: dict, attempt_number: int = 1) -> str:
-    """Generate highly personalized and dynamic learning plan prompt"""
-    
-    # Base personalized prompt
-    base_prompt = f"""
+# Static prompt text lives in these templates, built once at import. Per learner profile
+# each template is compiled (and cached) into literal segments with only the per-request
+# fields left open, so building a prompt is a cache lookup plus a short join.
+
+_FULL_PROMPT_TEMPLATE = """
 You are an expert learning coach creating a HIGHLY PERSONALIZED learning plan.
 
 LEARNING GOAL: {goal}
@@ -13,32 +14,32 @@ DURATION: {duration} ({total_days} days, {total_weeks} weeks, {total_months} mon
 SUBJECT CATEGORY: {subject_category}
 
 USER PROFILE:
-- Current Skill Level: {user_context.get('skill_level', 'beginner')}
-- Learning Style: {user_context.get('learning_style', 'practical')}
-- Available Time: {user_context.get('daily_time', '1-2 hours')} per day
-- Specific Interests: {', '.join(user_context.get('specific_interests', ['general application']))}
-- Practical Goals: {', '.join(user_context.get('practical_goals', ['skill development']))}
+- Current Skill Level: {skill_level}
+- Learning Style: {learning_style}
+- Available Time: {daily_time} per day
+- Specific Interests: {interests_or_default}
+- Practical Goals: {practical_goals_or_default}
 
 CRITICAL REQUIREMENTS:
 1. Create EXACTLY {total_days} daily tasks, {total_weeks} weekly tasks, and {total_months} monthly tasks
-2. Each task must be HYPER-SPECIFIC and actionable for {user_context.get('skill_level', 'beginner')} level
+2. Each task must be HYPER-SPECIFIC and actionable for {skill_level} level
 3. NO generic phrases like "learn basics", "study fundamentals", "practice concepts"
 4. Every task must include specific deliverables, metrics, or outcomes
-5. Tasks should build progressively based on {user_context.get('learning_style', 'practical')} learning style
-6. Consider {user_context.get('daily_time', '1-2 hours')} daily time constraint
+5. Tasks should build progressively based on {learning_style} learning style
+6. Consider {daily_time} daily time constraint
 7. Each task must include 1-3 relevant learning resources (videos, articles, tools, websites)
-8. Resources must be specific, high-quality, and appropriate for {user_context.get('skill_level', 'beginner')} level
+8. Resources must be specific, high-quality, and appropriate for {skill_level} level
 9. Resources should include exact titles, URLs when possible, and brief descriptions
 
-SPECIFICITY EXAMPLES FOR {subject_category.upper()}:
-{get_subject_specific_examples(subject_category, user_context)}
+SPECIFICITY EXAMPLES FOR {subject_upper}:
+{examples}
 
 PERSONALIZATION REQUIREMENTS:
-- Adapt difficulty to {user_context.get('skill_level', 'beginner')} level
-- Focus on {user_context.get('learning_style', 'practical')} learning approach
-- Include tasks that align with: {', '.join(user_context.get('specific_interests', []))}
-- Design tasks achievable in {user_context.get('daily_time', '1-2 hours')} daily time slots
-- Connect learning to practical goals: {', '.join(user_context.get('practical_goals', []))}
+- Adapt difficulty to {skill_level} level
+- Focus on {learning_style} learning approach
+- Include tasks that align with: {interests}
+- Design tasks achievable in {daily_time} daily time slots
+- Connect learning to practical goals: {practical_goals}
 
 RESOURCE REQUIREMENTS:
 - Each task must have 1-3 high-quality resources
@@ -87,9 +88,7 @@ MAKE IT ULTRA-SPECIFIC:
 - Provide exact resource titles and URLs
 """
 
-    # Add retry-specific adjustments
-    if attempt_number > 1:
-        base_prompt += f"""
+_FULL_RETRY_TEMPLATE = """
 
 RETRY ATTEMPT #{attempt_number}:
 The previous attempt failed. Make this response even MORE SPECIFIC and DETAILED.
@@ -101,19 +100,34 @@ The previous attempt failed. Make this response even MORE SPECIFIC and DETAILED.
 - Include more specific and high-quality resources with exact URLs
 """
 
-    return base_prompt
+_COMPACT_PROMPT_TEMPLATE = """You are an expert learning coach. Create a personalized learning plan as JSON.
+GOAL: {goal}
+DURATION: {duration} ({total_days} days, {total_weeks} weeks, {total_months} months); SUBJECT: {subject_category}
+LEARNER: {skill_level} level, {learning_style} learning style, {daily_time} per day; interests: {interests_or_general}; goals: {practical_goals_or_general}
 
+RULES:
+1. Create EXACTLY {total_days} daily tasks, {total_weeks} weekly tasks, and {total_months} monthly tasks, labelled "Day N", "Week N", "Month N".
+2. Daily: one action with clear completion criteria. Weekly: 2-3 sub-tasks grouping the days. Monthly: 2-4 milestones.
+3. Every task is hyper-specific (exact tools, techniques, quantities, deliverables, measurable outcome), builds on the previous ones and fits the learner's level, style, time, interests and goals.
+4. Never use vague phrasing such as "learn the basics of", "study fundamentals", "practice concepts", "understand principles", "get familiar with", "review materials".
+5. Each item has 1-3 specific resources (exact title, URL when known, one-line description of how it helps); type is one of video, article, book, tool, course, website, tutorial, documentation; prefer free ones; no generic names like "YouTube videos".
 
-def get_subject_specific_examples(subject_category: str, user_context: dict) -> str:
-    """Get tailored examples based on subject and user context"""
-    
-    skill_level = user_context.get('skill_level', 'beginner')
-    learning_style = user_context.get('learning_style', 'practical')
-    
-    examples = {
-        "dsa": {
-            "beginner": {
-                "practical": """
+EXAMPLE TASKS:
+{compact_examples}
+
+Return only this JSON structure:
+{{"goalTitle": "{goal}", "totalDays": {total_days}, "monthlyTasks": [ITEM], "weeklyTasks": [ITEM], "dailyTasks": [ITEM]}}
+ITEM = {{"label": "Day 1", "tasks": ["..."], "resources": [{{"title": "...", "type": "tutorial", "url": "https://...", "description": "..."}}], "status": false}}
+"""
+
+_COMPACT_RETRY_TEMPLATE = """
+RETRY #{attempt_number}: the previous answer was rejected. Keep the exact counts and be more specific: tool names, versions, quantities, time estimates, exact resource URLs.
+"""
+
+SUBJECT_EXAMPLES = {
+    "dsa": {
+        "beginner": {
+            "practical": """
 - "Solve Array Problem #1: Two Sum using hash map approach, implement in Python, test with 5 different inputs"
   Resources: [{"title": "Two Sum Problem Explained", "type": "video", "url": "https://youtube.com/watch?v=KLlXCFG5TnA", "description": "Visual explanation of hash map solution"}]
 - "Build a simple linked list class with insert(), delete(), display() methods and create test cases for edge conditions"
@@ -125,7 +139,7 @@ def get_subject_specific_examples(subject_category: str, user_context: dict) ->
 - "Design and implement a basic hash table with collision handling using separate chaining method"
   Resources: [{"title": "Hash Tables Explained", "type": "video", "url": "https://youtube.com/watch?v=shs0KM3wKv8", "description": "Collision handling techniques explained"}]
 """,
-                "theoretical": """
+            "theoretical": """
 - "Study and document time complexity of 5 sorting algorithms with mathematical proofs and comparison charts"
   Resources: [{"title": "Big O Cheat Sheet", "type": "website", "url": "https://www.bigocheatsheet.com/", "description": "Comprehensive complexity reference"}]
 - "Analyze space complexity of recursive vs iterative solutions for factorial, Fibonacci, and tree traversal"
@@ -137,9 +151,9 @@ def get_subject_specific_examples(subject_category: str, user_context: dict) ->
 - "Write detailed explanation of why quicksort average case is O(n log n) with mathematical derivation"
   Resources: [{"title": "Quicksort Analysis", "type": "article", "url": "https://www.khanacademy.org/computing/computer-science/algorithms/quick-sort/a/analysis-of-quicksort", "description": "Mathematical analysis of quicksort complexity"}]
 """
-            },
-            "intermediate": {
-                "practical": """
+        },
+        "intermediate": {
+            "practical": """
 - "Solve 5 medium-difficulty tree problems: validate BST, lowest common ancestor, serialize/deserialize, path sum variations"
   Resources: [{"title": "LeetCode Tree Problems", "type": "website", "url": "https://leetcode.com/tag/tree/", "description": "Curated tree problem collection"}]
 - "Implement advanced graph algorithms: Dijkstra's shortest path and A* search for pathfinding applications"
@@ -151,11 +165,11 @@ def get_subject_specific_examples(subject_category: str, user_context: dict) ->
 - "Design and implement a LRU cache using doubly linked list and hash map with O(1) operations"
   Resources: [{"title": "LRU Cache Design", "type": "video", "url": "https://youtube.com/watch?v=7ABFKPK2hD4", "description": "Step-by-step LRU cache implementation"}]
 """
-            }
-        },
-        "react": {
-            "beginner": {
-                "practical": """
+        }
+    },
+    "react": {
+        "beginner": {
+            "practical": """
 - "Create a counter app with increment/decrement buttons using useState hook, style with CSS modules"
   Resources: [{"title": "React useState Hook Tutorial", "type": "tutorial", "url": "https://react.dev/reference/react/useState", "description": "Official useState documentation and examples"}]
 - "Build a todo list with add/delete functionality, local storage persistence, and input validation"
@@ -167,7 +181,7 @@ def get_subject_specific_examples(subject_category: str, user_context: dict) ->
 - "Build a simple e-commerce product catalog with filtering, search, and cart functionality using useContext"
   Resources: [{"title": "React Context API Guide", "type": "article", "url": "https://kentcdodds.com/blog/how-to-use-react-context-effectively", "description": "Best practices for Context API usage"}]
 """,
-                "project-based": """
+            "project-based": """
 - "Build a complete personal portfolio website with React Router, responsive design, and contact form integration"
   Resources: [{"title": "React Router Tutorial", "type": "tutorial", "url": "https://reactrouter.com/en/main/start/tutorial", "description": "Complete routing setup guide"}]
 - "Create a social media dashboard aggregating Twitter and Instagram APIs with real-time updates"
@@ -179,11 +193,11 @@ def get_subject_specific_examples(subject_category: str, user_context: dict) ->
 - "Create a data visualization dashboard using D3.js integration showing COVID-19 statistics with interactive charts"
   Resources: [{"title": "React + D3.js Integration", "type": "article", "url": "https://www.smashingmagazine.com/2018/02/react-d3-ecosystem/", "description": "Best practices for combining React and D3"}]
 """
-            }
-        },
-        "python": {
-            "beginner": {
-                "practical": """
+        }
+    },
+    "python": {
+        "beginner": {
+            "practical": """
 - "Build a expense tracker CLI that reads CSV files, categorizes expenses, and generates monthly reports with charts"
   Resources: [{"title": "Python CSV Module Tutorial", "type": "tutorial", "url": "https://docs.python.org/3/library/csv.html", "description": "Official CSV handling documentation"}]
 - "Create a web scraper for job listings using BeautifulSoup, handle pagination, save to JSON with error handling"
@@ -195,11 +209,11 @@ def get_subject_specific_examples(subject_category: str, user_context: dict) ->
 - "Create a file organizer script that sorts downloads folder by file type, date, and size with progress bars"
   Resources: [{"title": "Python pathlib Tutorial", "type": "article", "url": "https://realpython.com/python-pathlib/", "description": "Modern file system path handling"}]
 """
-            }
-        },
-        "hindi": {
-            "beginner": {
-                "practical": """
+        }
+    },
+    "hindi": {
+        "beginner": {
+            "practical": """
 - "Practice writing 30 Devanagari characters daily with stroke order, pronunciation, and 2 example words each"
   Resources: [{"title": "Devanagari Writing Practice", "type": "tool", "url": "https://www.learnsanskrit.cc/index.php?mode=0", "description": "Interactive Devanagari character practice"}]
 - "Learn 15 essential greetings and introductions, practice with native speaker via HelloTalk app for 20 minutes"
@@ -211,11 +225,11 @@ def get_subject_specific_examples(subject_category: str, user_context: dict) ->
 - "Practice daily routine vocabulary: write 100-word paragraph about your morning routine in Hindi with proper verb forms"
   Resources: [{"title": "Hindi Verb Conjugation Guide", "type": "article", "url": "https://www.hindigrammar.com/verbs/", "description": "Complete verb conjugation reference"}]
 """
-            }
-        },
-        "fitness": {
-            "beginner": {
-                "practical": """
+        }
+    },
+    "fitness": {
+        "beginner": {
+            "practical": """
 - "Complete 20-minute full-body workout: 3 sets of 10 push-ups, 15 squats, 30-second plank, track form and progress"
   Resources: [{"title": "Fitness Blender Beginner Workouts", "type": "website", "url": "https://fitnessblender.com/", "description": "Free workout videos with proper form demos"}]
 - "Walk 5000 steps daily, track with fitness app, note energy levels and mood changes in workout journal"
@@ -227,11 +241,11 @@ def get_subject_specific_examples(subject_category: str, user_context: dict) ->
 - "Do 15-minute morning stretching routine targeting hip flexors, hamstrings, and shoulders with mobility assessment"
   Resources: [{"title": "Yoga with Adriene Morning Stretch", "type": "video", "url": "https://youtube.com/user/yogawithadriene", "description": "Guided morning stretching routines"}]
 """
-            }
-        },
-        "cooking": {
-            "beginner": {
-                "practical": """
+        }
+    },
+    "cooking": {
+        "beginner": {
+            "practical": """
 - "Master knife skills: practice julienne cuts with 2 carrots, dice 1 onion perfectly, chiffonade 5 basil leaves"
   Resources: [{"title": "Gordon Ramsay Knife Skills", "type": "video", "url": "https://youtube.com/watch?v=Ch8mi5urbXs", "description": "Professional knife techniques tutorial"}]
 - "Cook perfect scrambled eggs using 3 different techniques: French, American, and Gordon Ramsay's method"
@@ -243,13 +257,52 @@ def get_subject_specific_examples(subject_category: str, user_context: dict) ->
 - "Learn mother sauces: make béchamel, velouté, and hollandaise from scratch with proper consistency and seasoning"
   Resources: [{"title": "The Food Lab Mother Sauces", "type": "article", "url": "https://www.seriouseats.com/sauce-guide", "description": "Science-based sauce making techniques"}]
 """
-            }
         }
     }
+}
+
+_GENERIC_EXAMPLES_TEMPLATE = """
+- "Research and identify 5 specific tools/resources used by professionals in {subject_category}"
+  Resources: [{{"title": "Industry Tools Guide", "type": "article", "url": "", "description": "Comprehensive tool comparison for {subject_category}"}}]
+- "Complete hands-on tutorial creating tangible deliverable relevant to {subject_category}"
+  Resources: [{{"title": "Beginner Tutorial", "type": "tutorial", "url": "", "description": "Step-by-step {subject_category} tutorial"}}]
+- "Practice core skill for 45 minutes with specific technique, document progress and challenges"
+  Resources: [{{"title": "Practice Exercises", "type": "website", "url": "", "description": "Structured practice materials for {subject_category}"}}]
+- "Build mini-project applying 3 key concepts learned, share with community for feedback"
+  Resources: [{{"title": "Community Forum", "type": "website", "url": "", "description": "Get feedback on your {subject_category} projects"}}]
+- "Connect with 2 professionals in {subject_category} field via LinkedIn, ask specific questions about daily work"
+  Resources: [{{"title": "LinkedIn Professional Network", "type": "tool", "url": "https://linkedin.com", "description": "Connect with {subject_category} professionals"}}]
+"""
+
+
+def get_enhanced_personalized_prompt(goal: str, duration: str, total_days: int, total_weeks: int, total_months: int, 
+                                    subject_category: str, user_context: dict, attempt_number: int = 1) -> str:
+    """Generate highly personalized and dynamic learning plan prompt"""
+    
+    prompt = _fill(_compile_prompt("full", *_profile_key(subject_category, user_context)),
+                   goal, duration, total_days, total_weeks, total_months)
     
+    # Add retry-specific adjustments
+    if attempt_number > 1:
+        prompt += _retry_suffix("full", attempt_number)
+    
+    return prompt
+
+
+def get_subject_specific_examples(subject_category: str, user_context: dict) -> str:
+    """Get tailored examples based on subject and user context"""
+    return _resolve_examples(
+        subject_category,
+        user_context.get('skill_level', 'beginner'),
+        user_context.get('learning_style', 'practical')
+    )
+
+
+@lru_cache(maxsize=256)
+def _resolve_examples(subject_category: str, skill_level: str, learning_style: str) -> str:
     # Get specific examples based on subject, skill level, and learning style
-    if subject_category in examples:
-        subject_examples = examples[subject_category]
+    if subject_category in SUBJECT_EXAMPLES:
+        subject_examples = SUBJECT_EXAMPLES[subject_category]
         if skill_level in subject_examples:
             level_examples = subject_examples[skill_level]
             if learning_style in level_examples:
@@ -266,17 +319,232 @@ def get_subject_specific_examples(subject_category: str, user_context: dict) ->
                 return list(beginner_examples.values())[0] if beginner_examples else ""
     
     # Generic examples for unknown subjects
+    return _GENERIC_EXAMPLES_TEMPLATE.format(subject_category=subject_category)
+
+
+def get_compact_personalized_prompt(goal: str, duration: str, total_days: int, total_weeks: int, total_months: int,
+                                    subject_category: str, user_context: dict, attempt_number: int = 1) -> str:
+    """Same requirements as get_enhanced_personalized_prompt, each stated once, for fewer input tokens"""
+    prompt = _fill(_compile_prompt("compact", *_profile_key(subject_category, user_context)),
+                   goal, duration, total_days, total_weeks, total_months)
+    
+    if attempt_number > 1:
+        prompt += _retry_suffix("compact", attempt_number)
+    
+    return prompt
+
+
+_PROMPT_TEMPLATES = {
+    "full": (_FULL_PROMPT_TEMPLATE, _FULL_RETRY_TEMPLATE),
+    "compact": (_COMPACT_PROMPT_TEMPLATE, _COMPACT_RETRY_TEMPLATE),
+}
+_REQUEST_FIELDS = ("goal", "duration", "total_days", "total_weeks", "total_months")
+
+
+def _profile_key(subject_category: str, user_context: dict) -> tuple:
+    return (
+        subject_category,
+        user_context.get('skill_level', 'beginner'),
+        user_context.get('learning_style', 'practical'),
+        user_context.get('daily_time', '1-2 hours'),
+        tuple(user_context['specific_interests']) if 'specific_interests' in user_context else None,
+        tuple(user_context['practical_goals']) if 'practical_goals' in user_context else None,
+    )
+
+
+@lru_cache(maxsize=1024)
+def _compile_prompt(mode: str, *profile) -> tuple:
+    """Render the profile fields into the template, leaving only _REQUEST_FIELDS open.
+
+    Returns alternating literal segments and request field names: (text, field, text, ..., text).
+    """
+    fields = _render_profile_fields(*profile)
+    parts, literal = [], []
+    for text, field, _, _ in Formatter().parse(_PROMPT_TEMPLATES[mode][0]):
+        literal.append(text)
+        if field is None:
+            continue
+        if field in _REQUEST_FIELDS:
+            parts += ["".join(literal), field]
+            literal = []
+        else:
+            literal.append(fields[field])
+    parts.append("".join(literal))
+    return tuple(parts)
+
+
+def _fill(parts: tuple, goal: str, duration: str, total_days: int, total_weeks: int, total_months: int) -> str:
+    values = {"goal": goal, "duration": duration, "total_days": str(total_days),
+              "total_weeks": str(total_weeks), "total_months": str(total_months)}
+    out = [parts[0]]
+    for i in range(1, len(parts), 2):
+        out.append(values[parts[i]])
+        out.append(parts[i + 1])
+    return "".join(out)
+
+
+@lru_cache(maxsize=64)
+def _retry_suffix(mode: str, attempt_number: int) -> str:
+    return _PROMPT_TEMPLATES[mode][1].format(attempt_number=attempt_number)
+
+
+def _render_profile_fields(subject_category: str, skill_level: str, learning_style: str, daily_time: str,
+                           specific_interests: tuple, practical_goals: tuple) -> dict:
+    """Template fields that depend only on the subject and learner profile"""
+    # None means the key was absent from user_context, which the full prompt words differently from []
+    interests = ', '.join(specific_interests or ())
+    goals = ', '.join(practical_goals or ())
+    examples = _resolve_examples(subject_category, skill_level, learning_style)
+    return {
+        "subject_category": subject_category,
+        "subject_upper": subject_category.upper(),
+        "skill_level": skill_level,
+        "learning_style": learning_style,
+        "daily_time": daily_time,
+        "interests": interests,
+        "practical_goals": goals,
+        "interests_or_default": interests if specific_interests is not None else 'general application',
+        "practical_goals_or_default": goals if practical_goals is not None else 'skill development',
+        "interests_or_general": interests or 'general application',
+        "practical_goals_or_general": goals or 'skill development',
+        "examples": examples,
+        "compact_examples": _first_examples(examples, 2),
+    }
+
+
+def _first_examples(examples: str, count: int) -> str:
+    """Keep the first `count` example bullets (each with its Resources line)"""
+    bullets = [block for block in examples.strip().split('\n- ') if block]
+    return '\n- '.join(bullets[:count])
+
+
+def get_plan_outline_prompt(goal: str, duration: str, total_days: int, total_weeks: int, total_months: int,
+                            subject_category: str, user_context: dict, phases: list) -> str:
+    """High-level outline for chunked generation: monthly milestones plus one focus per phase"""
+    
+    phase_lines = "\n".join(
+        f"- Phase {i + 1}: Day {start + 1} to Day {end}" for i, (start, end) in enumerate(phases)
+    )
+    
     return f"""
-- "Research and identify 5 specific tools/resources used by professionals in {subject_category}"
-  Resources: [{{"title": "Industry Tools Guide", "type": "article", "url": "", "description": "Comprehensive tool comparison for {subject_category}"}}]
-- "Complete hands-on tutorial creating tangible deliverable relevant to {subject_category}"
-  Resources: [{{"title": "Beginner Tutorial", "type": "tutorial", "url": "", "description": "Step-by-step {subject_category} tutorial"}}]
-- "Practice core skill for 45 minutes with specific technique, document progress and challenges"
-  Resources: [{{"title": "Practice Exercises", "type": "website", "url": "", "description": "Structured practice materials for {subject_category}"}}]
-- "Build mini-project applying 3 key concepts learned, share with community for feedback"
-  Resources: [{{"title": "Community Forum", "type": "website", "url": "", "description": "Get feedback on your {subject_category} projects"}}]
-- "Connect with 2 professionals in {subject_category} field via LinkedIn, ask specific questions about daily work"
-  Resources: [{{"title": "LinkedIn Professional Network", "type": "tool", "url": "https://linkedin.com", "description": "Connect with {subject_category} professionals"}}]
+You are an expert learning coach outlining a long, PERSONALIZED learning plan. Daily and weekly
+tasks will be written later, phase by phase, from this outline.
+
+LEARNING GOAL: {goal}
+DURATION: {duration} ({total_days} days, {total_weeks} weeks, {total_months} months)
+SUBJECT CATEGORY: {subject_category}
+
+USER PROFILE:
+- Current Skill Level: {user_context.get('skill_level', 'beginner')}
+- Learning Style: {user_context.get('learning_style', 'practical')}
+- Available Time: {user_context.get('daily_time', '1-2 hours')} per day
+- Specific Interests: {', '.join(user_context.get('specific_interests', [])) or 'general application'}
+- Practical Goals: {', '.join(user_context.get('practical_goals', [])) or 'skill development'}
+
+PHASES:
+{phase_lines}
+
+CRITICAL REQUIREMENTS:
+1. Create EXACTLY {total_months} monthly tasks and EXACTLY {len(phases)} phases
+2. Each monthly task has 2-4 specific milestone tasks and 1-3 high-quality resources
+3. Each phase "focus" is one sentence naming the concrete topics and deliverables for that day range
+4. Phases must build progressively; no generic phrases like "learn basics" or "study fundamentals"
+
+JSON FORMAT (EXACT STRUCTURE REQUIRED):
+{{
+    "monthlyTasks": [
+        {{"label": "Month 1", "tasks": ["Specific milestone task 1", "Specific milestone task 2"], "resources": [{{"title": "Resource Name", "type": "video", "url": "https://example.com", "description": "Brief description of how this helps"}}], "status": false}}
+    ],
+    "phases": [
+        {{"label": "Phase 1", "focus": "Specific topics and deliverables for this day range"}}
+    ]
+}}
+"""
+
+
+def get_plan_chunk_prompt(goal: str, subject_category: str, user_context: dict, phase_focus: str,
+                          previous_focus: str, next_focus: str, day_start: int, day_end: int,
+                          week_start: int, week_end: int) -> str:
+    """Daily and weekly tasks for one slice of a chunked plan (day/week numbers are 1-based, inclusive)"""
+    
+    num_days = day_end - day_start + 1
+    num_weeks = max(0, week_end - week_start + 1)
+    weekly_requirement = (
+        f"EXACTLY {num_weeks} weekly tasks labelled \"Week {week_start}\" to \"Week {week_end}\""
+        if num_weeks else "an empty weeklyTasks list"
+    )
+    
+    return f"""
+You are an expert learning coach writing one phase of a HIGHLY PERSONALIZED learning plan.
+
+LEARNING GOAL: {goal}
+SUBJECT CATEGORY: {subject_category}
+SKILL LEVEL: {user_context.get('skill_level', 'beginner')}
+LEARNING STYLE: {user_context.get('learning_style', 'practical')}
+DAILY TIME: {user_context.get('daily_time', '1-2 hours')}
+
+PREVIOUS PHASE: {previous_focus or 'none, this is the start of the plan'}
+THIS PHASE (Day {day_start} to Day {day_end}): {phase_focus}
+NEXT PHASE: {next_focus or 'none, this is the end of the plan'}
+
+CRITICAL REQUIREMENTS:
+1. Create EXACTLY {num_days} daily tasks labelled "Day {day_start}" to "Day {day_end}", and {weekly_requirement}
+2. Each daily task is a single, specific action with clear completion criteria
+3. Each weekly task has 2-3 specific sub-tasks that group the daily activities
+4. Each task includes 1-3 specific resources (video, article, book, tool, course, website, tutorial, documentation)
+5. NO generic phrases like "learn basics", "study fundamentals", "practice concepts"
+
+JSON FORMAT (EXACT STRUCTURE REQUIRED):
+{{
+    "weeklyTasks": [
+        {{"label": "Week {week_start}", "tasks": ["Specific weekly task 1", "Specific weekly task 2"], "resources": [{{"title": "Resource Name", "type": "article", "url": "https://example.com", "description": "Brief description of how this helps"}}], "status": false}}
+    ],
+    "dailyTasks": [
+        {{"label": "Day {day_start}", "tasks": ["One specific daily task with clear completion criteria"], "resources": [{{"title": "Resource Name", "type": "tutorial", "url": "https://example.com", "description": "Brief description of how this helps"}}], "status": false}}
+    ]
+}}
+"""
+
+
+def get_repair_prompt(goal: str, subject_category: str, user_context: dict,
+                      missing_labels: dict, neighbour_tasks: dict) -> str:
+    """Targeted prompt asking only for the plan items that are missing or malformed"""
+    
+    wanted = "\n".join(
+        f"- {section}: {', '.join(labels)}" for section, labels in missing_labels.items() if labels
+    )
+    context = "\n".join(f"- {label}: {task}" for label, task in neighbour_tasks.items()) or "- none"
+    
+    return f"""
+You are an expert learning coach completing a HIGHLY PERSONALIZED learning plan. Most of the
+plan already exists; write ONLY the entries listed below.
+
+LEARNING GOAL: {goal}
+SUBJECT CATEGORY: {subject_category}
+SKILL LEVEL: {user_context.get('skill_level', 'beginner')}
+LEARNING STYLE: {user_context.get('learning_style', 'practical')}
+DAILY TIME: {user_context.get('daily_time', '1-2 hours')}
+
+ENTRIES TO WRITE (use exactly these labels):
+{wanted}
+
+EXISTING NEIGHBOURING ENTRIES (keep the progression consistent with them):
+{context}
+
+REQUIREMENTS:
+1. Daily entries are one specific action with clear completion criteria
+2. Weekly entries have 2-3 specific sub-tasks; monthly entries have 2-4 milestone tasks
+3. Each entry includes 1-3 specific resources (video, article, book, tool, course, website, tutorial, documentation)
+4. NO generic phrases like "learn basics", "study fundamentals", "practice concepts"
+
+JSON FORMAT (include only the sections you were asked for):
+{{
+    "monthlyTasks": [],
+    "weeklyTasks": [],
+    "dailyTasks": [
+        {{"label": "Day N", "tasks": ["One specific daily task with clear completion criteria"], "resources": [{{"title": "Resource Name", "type": "tutorial", "url": "https://example.com", "description": "Brief description of how this helps"}}], "status": false}}
+    ]
+}}
 """
 
 
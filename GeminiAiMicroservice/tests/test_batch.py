@@ -0,0 +1,43 @@
+# test_batch.py
+import os
+import random
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+os.environ.update(GEMINI_API_KEY="test", PLAN_CACHE_DB_PATH="", PLAN_STORE_DB_PATH="", PLAN_CACHE_TTL_SECONDS="0")
+
+from fastapi.testclient import TestClient
+
+import main
+from fake_gemini import answer_for, render
+
+
+class FakeGeminiLLM:
+    """Answers plan prompts in-process with the load-test stand-in's valid documents"""
+
+    def __init__(self):
+        self.rng = random.Random(1)
+        self.calls = 0
+
+    async def ainvoke(self, prompt: str, **kwargs) -> str:
+        self.calls += 1
+        _, document = answer_for(prompt, self.rng)
+        return render(document, "valid", False, self.rng)
+
+
+def test_null_profile_fields_fall_back_to_defaults():
+    with TestClient(main.app) as client:
+        fake = main.generator.llm.llm = FakeGeminiLLM()
+        response = client.post("/generate-plan/batch", json={"items": [
+            {"goal": "Learn Python", "duration": "7 days",
+             "user_context": {"skill_level": None, "specific_interests": None}},
+        ]})
+
+    assert response.status_code == 200
+    result = response.json()["results"][0]
+    assert result["error"] is None
+    assert result["plan"]["source"] == "llm"
+    assert fake.calls >= 1
@@ -0,0 +1,105 @@
+# test_resilience.py
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from admission import AdmissionController
+from gemini_errors import GeminiError, GeminiTimeoutError
+from resilience import CircuitBreaker, ResilientLLM
+from LearningPlanComponents.utils import estimate_tokens
+
+PROMPT = "Plan a week of Python"
+
+
+class HangingLLM:
+    """Fails while `failing`, otherwise blocks until cancelled unless `answer` is set"""
+
+    def __init__(self):
+        self.failing = True
+        self.answer = None
+        self.started = asyncio.Event()
+
+    async def ainvoke(self, prompt: str, **kwargs) -> str:
+        if self.failing:
+            raise GeminiTimeoutError("upstream down")
+        self.started.set()
+        if self.answer is None:
+            await asyncio.Event().wait()
+        return self.answer
+
+    async def astream(self, prompt: str, **kwargs):
+        if self.failing:
+            raise GeminiTimeoutError("upstream down")
+        yield "first chunk"
+        self.started.set()
+        await asyncio.Event().wait()
+
+
+def _half_open_llm():
+    """ResilientLLM whose breaker has opened and is due for its half-open probe"""
+    llm = HangingLLM()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    admission = AdmissionController(requests_per_minute=1000, tokens_per_minute=100_000)
+    resilient = ResilientLLM(llm, breaker, admission, output_token_estimate=2000)
+    return llm, breaker, admission, resilient
+
+
+async def _open_breaker(llm, resilient):
+    try:
+        await resilient.ainvoke(PROMPT)
+    except GeminiError:
+        pass
+    llm.failing = False
+
+
+def _assert_settled(admission, tokens_before):
+    # Only the prompt tokens stay charged; the output estimate is refunded
+    assert admission.tokens.level >= tokens_before - estimate_tokens(PROMPT) - 1
+
+
+def test_cancelled_probe_releases_the_breaker():
+    async def scenario():
+        llm, breaker, admission, resilient = _half_open_llm()
+        await _open_breaker(llm, resilient)
+        assert breaker.state == CircuitBreaker.OPEN
+        tokens_before = admission.tokens.level
+        
+        probe = asyncio.create_task(resilient.ainvoke(PROMPT))
+        await llm.started.wait()
+        assert breaker.state == CircuitBreaker.HALF_OPEN and breaker.is_open()
+        probe.cancel()
+        try:
+            await probe
+        except asyncio.CancelledError:
+            pass
+        
+        assert not breaker.is_open()
+        _assert_settled(admission, tokens_before)
+        llm.answer = "plan"
+        assert await resilient.ainvoke(PROMPT) == "plan"
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    asyncio.run(scenario())
+
+
+def test_abandoned_stream_probe_releases_the_breaker():
+    async def scenario():
+        llm, breaker, admission, resilient = _half_open_llm()
+        await _open_breaker(llm, resilient)
+        tokens_before = admission.tokens.level
+        
+        stream = resilient.astream(PROMPT)
+        assert await stream.__anext__() == "first chunk"
+        assert breaker.is_open()
+        # A client disconnecting mid-stream closes the generator
+        await stream.aclose()
+        
+        assert not breaker.is_open()
+        _assert_settled(admission, tokens_before - estimate_tokens("first chunk"))
+        llm.answer = "plan"
+        assert await resilient.ainvoke(PROMPT) == "plan"
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    asyncio.run(scenario())
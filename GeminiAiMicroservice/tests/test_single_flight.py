@@ -0,0 +1,37 @@
+# test_single_flight.py
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from plan_cache import SQLitePlanStore
+from single_flight import SharedFlight
+
+
+def test_lease_is_renewed_while_the_owner_generates(tmp_path):
+    store = SQLitePlanStore(str(tmp_path / "plan_cache.db"))
+    owner = SharedFlight(store, lease_seconds=0.3, poll_interval=0.01)
+    other = SharedFlight(store, lease_seconds=0.3, poll_interval=0.01)
+    results = {}
+
+    async def generate():
+        # Runs for several lease lengths; the lease must not expire meanwhile
+        await asyncio.sleep(1.0)
+        results["key"] = "plan"
+        return "plan"
+
+    async def lookup():
+        return results.get("key")
+
+    async def scenario():
+        first = asyncio.create_task(owner.do("key", generate, lookup))
+        await asyncio.sleep(0.05)
+        second = await other.do("key", generate, lookup)
+        return await first, second
+
+    assert asyncio.run(scenario()) == ("plan", "plan")
+    assert owner.executions == 1 and other.executions == 0 and other.shared == 1
+    assert owner.renewals >= 2
+    assert store.lease_holder("key") is None
+    store.close()